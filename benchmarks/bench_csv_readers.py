@@ -0,0 +1,109 @@
+"""
+Benchmark of the CSV reader backends.
+Generates a synthetic store-transactions file and times how long each
+backend takes to parse it from bytes.
+
+Usage:
+    python benchmarks/bench_csv_readers.py --size-mb 2048
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from rules_engine.utils.csv_reader import get_reader
+
+STATUSES = np.array(["APPROVED", "PENDING", "REJECTED", "CANCELLED"])
+
+
+def write_transactions(path, size_mb, rows_per_block=500_000, seed=0):
+    """
+    Write a synthetic transactions CSV of roughly the requested size.
+
+    Args:
+        path (str): Output file path
+        size_mb (int): Approximate file size in megabytes
+        rows_per_block (int, optional): Rows generated per write
+        seed (int, optional): Random seed
+
+    Returns:
+        int: Number of data rows written
+    """
+    rng = np.random.default_rng(seed)
+    rows = 0
+    with open(path, "w") as handle:
+        header = True
+        while handle.tell() < size_mb * 1024 * 1024:
+            ids = np.arange(rows, rows + rows_per_block)
+            block = pd.DataFrame({
+                "transaction_id": ids,
+                "store_id": rng.integers(1, 1000, rows_per_block),
+                "register": rng.integers(1, 30, rows_per_block),
+                "sku": rng.integers(100000, 999999, rows_per_block),
+                "quantity": rng.integers(-2, 20, rows_per_block),
+                "unit_price": rng.random(rows_per_block).round(2) * 100,
+                "amount": rng.normal(50, 40, rows_per_block).round(2),
+                "status": STATUSES[rng.integers(0, len(STATUSES), rows_per_block)],
+                "customer_id": np.where(rng.random(rows_per_block) < 0.05, "", "C" + ids.astype(str)),
+                "order_date": "2024-01-01",
+            })
+            block.to_csv(handle, index=False, header=header)
+            header = False
+            rows += rows_per_block
+    return rows
+
+
+def time_reader(name, path, columns=None, repeat=3):
+    """
+    Best-of-N parse time for one backend.
+
+    Args:
+        name (str): Reader name
+        path (str): CSV file path
+        columns (set, optional): Columns to parse
+        repeat (int, optional): Number of runs
+
+    Returns:
+        float: Fastest run in seconds
+    """
+    reader = get_reader(name)
+    best = float("inf")
+    for _ in range(repeat):
+        with open(path, "rb") as handle:
+            data = handle.read()
+        start = time.perf_counter()
+        frame = reader.read(data, columns)
+        best = min(best, time.perf_counter() - start)
+        del data, frame
+    return best
+
+
+def main():
+    """Run the benchmark and print a summary table."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--size-mb", type=int, default=2048, help="size of the synthetic file")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per backend")
+    parser.add_argument("--path", help="reuse or create the file at this path")
+    args = parser.parse_args()
+
+    path = args.path or os.path.join(tempfile.gettempdir(), f"transactions_{args.size_mb}mb.csv")
+    if not os.path.exists(path):
+        print(f"Writing {args.size_mb} MB synthetic file to {path}")
+        write_transactions(path, args.size_mb)
+    size_mb = os.path.getsize(path) / 1024 / 1024
+
+    print(f"{os.cpu_count()} CPUs, {size_mb:.0f} MB file")
+    print(f"{'reader':<8} {'columns':<8} {'seconds':>8} {'MB/s':>8}")
+    for columns in (None, {"amount", "status", "customer_id"}):
+        for name in ("pandas", "arrow"):
+            seconds = time_reader(name, path, columns, args.repeat)
+            label = "all" if columns is None else str(len(columns))
+            print(f"{name:<8} {label:<8} {seconds:>8.2f} {size_mb / seconds:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
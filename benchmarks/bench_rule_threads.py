@@ -0,0 +1,114 @@
+"""
+Benchmark of parallel rule evaluation.
+Evaluates a set of numeric rules on a synthetic frame with 1 to 16 threads
+and reports the speedup over serial evaluation.
+
+Usage:
+    python benchmarks/bench_rule_threads.py --rows 5000000 --threads 1 2 4 8 16
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from rules_engine.models.rule import Rule
+from rules_engine.models.rule_set import RuleSet
+
+
+def make_frame(rows, seed=0):
+    """
+    Build a synthetic transactions frame.
+
+    Args:
+        rows (int): Number of rows
+        seed (int, optional): Random seed
+
+    Returns:
+        pd.DataFrame: Numeric transaction columns
+    """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "store_id": rng.integers(1, 1000, rows),
+        "register": rng.integers(1, 30, rows),
+        "quantity": rng.integers(-2, 20, rows),
+        "unit_price": rng.random(rows) * 100,
+        "amount": rng.normal(50, 40, rows),
+        "discount": rng.random(rows) * 10,
+    })
+
+
+def make_rules(count):
+    """
+    Build independent numeric rules with few shared subexpressions.
+
+    Args:
+        count (int): Number of rules
+
+    Returns:
+        list: Rule objects
+    """
+    templates = [
+        "amount < {n}",
+        "quantity * unit_price > {n} * 100",
+        "discount > {n} and amount < 0",
+        "store_id == {n} or register > 28",
+        "amount - discount < -{n}",
+        "unit_price / (quantity + 3) > {n} * 10",
+    ]
+    return [
+        Rule(f"R{i:03d}", f"Rule {i}", templates[i % len(templates)].format(n=i + 1))
+        for i in range(count)
+    ]
+
+
+def time_evaluate(rule_set, frame, repeat):
+    """
+    Best-of-N evaluation time.
+
+    Args:
+        rule_set (RuleSet): Rules to evaluate
+        frame (pd.DataFrame): Data
+        repeat (int): Number of runs
+
+    Returns:
+        tuple: Fastest run in seconds and the masks of the last run
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        masks = rule_set.evaluate(frame)
+        best = min(best, time.perf_counter() - start)
+    return best, masks
+
+
+def main():
+    """Run the benchmark and print a summary table."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rows", type=int, default=5_000_000, help="rows in the synthetic frame")
+    parser.add_argument("--rules", type=int, default=24, help="number of rules")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--repeat", type=int, default=3, help="runs per thread count")
+    args = parser.parse_args()
+
+    frame = make_frame(args.rows)
+    rules = make_rules(args.rules)
+
+    print(f"{os.cpu_count()} CPUs, {args.rows} rows, {args.rules} rules")
+    print(f"{'threads':>7} {'seconds':>8} {'Mrows/s':>8} {'speedup':>8}")
+    baseline, expected = time_evaluate(RuleSet(rules), frame, args.repeat)
+    for threads in args.threads:
+        if threads <= 1:
+            seconds, masks = baseline, expected
+        else:
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                seconds, masks = time_evaluate(RuleSet(rules, executor, min_parallel_rows=0), frame, args.repeat)
+        assert all(np.array_equal(a, b) for a, b in zip(expected, masks)), "parallel masks differ"
+        print(f"{threads:>7} {seconds:>8.3f} {args.rows / seconds / 1e6:>8.1f} {baseline / seconds:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark of the violation write paths.
+Writes synthetic violations through BigQueryConnector.log_violations against
+a local stand-in for the BigQuery client that encodes requests the way the
+real client does, without sending them. Compares a single insert_rows_json
+call (the previous behaviour), split streaming inserts and a load job.
+
+Usage:
+    python benchmarks/bench_violation_writer.py --counts 10000 1000000 10000000
+"""
+
+import argparse
+import json
+import time
+import uuid
+from types import SimpleNamespace
+
+from rules_engine.config import settings
+from rules_engine.connectors.bigquery_connector import BigQueryConnector
+from rules_engine.models.violation_batch import ViolationBatch
+
+DETAILS = '{"store_id":1234,"amount":-12.5,"status":"REJECTED","txn_date":"2024-01-01"}'
+
+# BigQuery rejects streaming insert requests above this size
+REQUEST_LIMIT_BYTES = 10 * 1024 * 1024
+
+
+class LocalBigQuery:
+    """Stand-in client that encodes requests and load files but sends nothing."""
+
+    def __init__(self):
+        self.project = "local"
+        self.requests = 0
+        self.rejected = 0
+        self.max_request_bytes = 0
+        self.bytes_sent = 0
+
+    def insert_rows_json(self, table, rows):
+        """Encode a streaming insert request like google-cloud-bigquery does."""
+        body = json.dumps({"rows": [{"insertId": str(uuid.uuid4()), "json": row} for row in rows]})
+        size = len(body.encode("utf-8"))
+        self.requests += 1
+        self.bytes_sent += size
+        self.max_request_bytes = max(self.max_request_bytes, size)
+        if size > REQUEST_LIMIT_BYTES:
+            self.rejected += 1
+            return [{"index": 0, "errors": [{"reason": "Request payload size exceeds the limit"}]}]
+        return []
+
+    def load_table_from_file(self, file_obj, destination, rewind=False, job_config=None):
+        """Read the staged load file like a resumable upload would."""
+        if rewind:
+            file_obj.seek(0)
+        while True:
+            data = file_obj.read(100 * 1024 * 1024)
+            if not data:
+                break
+            self.bytes_sent += len(data)
+        self.requests += 1
+        self.max_request_bytes = max(self.max_request_bytes, self.bytes_sent)
+        return SimpleNamespace(errors=None, job_id="local", result=lambda: None)
+
+
+def make_batches(count, rules=4):
+    """Violation batches with ``count`` violations spread over several rules."""
+    per_rule = count // rules
+    batches = []
+    for index in range(rules):
+        size = per_rule if index < rules - 1 else count - per_rule * (rules - 1)
+        batches.append(ViolationBatch(f"R{index:03d}", f"Rule {index}", range(size), [DETAILS] * size))
+    return batches
+
+
+def run(mode, batches):
+    """Write the batches with one write path and return the stand-in client."""
+    client = LocalBigQuery()
+    bq = BigQueryConnector(client=client)
+    if mode == "single":
+        client.insert_rows_json(f"{bq.dataset_id}.{bq.violations_table}", list(bq.violation_rows(batches)))
+    else:
+        settings.LOAD_JOB_THRESHOLD_ROWS = 0 if mode == "load" else float("inf")
+        bq.log_violations(batches)
+    return client
+
+
+def main():
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument(
+        "--single-max", type=int, default=1_000_000,
+        help="Largest count to run the single-request path for; it holds every row in memory",
+    )
+    args = parser.parse_args()
+
+    print(f"{'violations':>11} {'mode':>7} {'seconds':>8} {'rows/s':>10} {'requests':>9} {'max MB':>7} {'rejected':>9}")
+    for count in args.counts:
+        batches = make_batches(count)
+        for mode in ("single", "split", "load"):
+            if mode == "single" and count > args.single_max:
+                continue
+            start = time.perf_counter()
+            client = run(mode, batches)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{count:>11} {mode:>7} {elapsed:>8.2f} {count / elapsed:>10.0f} {client.requests:>9} "
+                f"{client.max_request_bytes / 2 ** 20:>7.1f} {client.rejected:>9}"
+            )
+
+
+if __name__ == "__main__":
+    main()
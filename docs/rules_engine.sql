@@ -46,69 +46,38 @@ EXECUTE IMMEDIATE FORMAT("""
   )
 """, dataset_path);
 
--- Procedure to run all rules and log violations
-BEGIN
-  -- Create a temporary table to hold the rules from the Google Sheet
+-- Run each rule once and write all of its violations with a single set-based
+-- INSERT ... SELECT. To review the statements before running them, generate a
+-- static script instead: python -m rules_engine.utils.sql_script --help
+EXECUTE IMMEDIATE FORMAT("""
   CREATE TEMP TABLE temp_rules AS
-  SELECT 
-    rule_number,
-    rule_description,
-    rule_query
-  FROM `%s.rules_definition`;
-  
-  -- Loop through each rule and execute it
-  FOR rule_record IN (SELECT * FROM temp_rules)
-  DO
-    DECLARE violation_count INT64;
-    DECLARE result_query STRING;
-    
-    -- Construct the query to execute the rule and count violations
-    SET result_query = FORMAT("""
-      WITH rule_results AS (
-        %s
-      )
-      SELECT COUNT(*) AS violation_count FROM rule_results
-    """, rule_record.rule_query);
-    
-    -- Execute the rule query and get the violation count
-    EXECUTE IMMEDIATE result_query INTO violation_count;
-    
-    -- If violations exist, execute the rule again to get details and log them
-    IF violation_count > 0 THEN
-      DECLARE details_cursor ARRAY<STRUCT<details STRING>>;
-      DECLARE insertion_query STRING;
-      
-      -- Get the detailed violations
-      EXECUTE IMMEDIATE FORMAT("""
-        WITH rule_results AS (
-          %s
-        )
-        SELECT TO_JSON(t) AS details FROM rule_results t
-      """, rule_record.rule_query) INTO details_cursor;
-      
-      -- Log each violation to the violations table
-      FOR detail IN (SELECT details FROM UNNEST(details_cursor))
-      DO
-        EXECUTE IMMEDIATE FORMAT("""
-          INSERT INTO `%s.rule_violations` (
-            violation_id,
-            rule_number,
-            rule_description,
-            violation_timestamp,
-            violation_details
-          )
-          VALUES (
-            GENERATE_UUID(),
-            '%s',
-            '%s',
-            CURRENT_TIMESTAMP(),
-            '%s'
-          )
-        """, dataset_path, rule_record.rule_number, rule_record.rule_description, detail.details);
-      END FOR;
-    END IF;
-  END FOR;
-END;
+  SELECT rule_number, rule_description, rule_query
+  FROM `%s.rules_definition`
+  WHERE rule_query IS NOT NULL
+""", dataset_path);
+
+FOR rule_record IN (SELECT * FROM temp_rules)
+DO
+  EXECUTE IMMEDIATE FORMAT("""
+    INSERT INTO `%s.rule_violations` (
+      violation_id,
+      rule_number,
+      rule_description,
+      violation_timestamp,
+      violation_details
+    )
+    SELECT
+      GENERATE_UUID(),
+      @rule_number,
+      @rule_description,
+      CURRENT_TIMESTAMP(),
+      TO_JSON_STRING(t)
+    FROM (
+      %s
+    ) AS t
+  """, dataset_path, RTRIM(TRIM(rule_record.rule_query), ';'))
+  USING rule_record.rule_number AS rule_number, rule_record.rule_description AS rule_description;
+END FOR;
 
 -- Output a summary of violations
 EXECUTE IMMEDIATE FORMAT("""
@@ -2,4 +2,207 @@
 Cloud Function entry point for the GCS Rules Engine.
 This module contains the main Cloud Function that is triggered by GCS events.
 """
-print("test")
\ No newline at end of file
+
+import functions_framework
+
+from rules_engine.config import settings
+from rules_engine.connectors.bigquery_connector import BigQueryConnector, source_id
+from rules_engine.connectors.clients import get_bigquery_client, get_storage_client
+from rules_engine.connectors.gcs_connector import GCSConnector
+from rules_engine.connectors.ledger import get_ledger
+from rules_engine.connectors.snapshot_loader import get_loader
+from rules_engine.connectors.violation_writer import ViolationWriter
+from rules_engine.models.compiler import cache_info
+from rules_engine.models.rule_output import RuleOutput, sample_seed
+from rules_engine.models.rule_set import RuleSet, get_executor
+from rules_engine.models.sharding import ProcessSharder
+from rules_engine.utils.csv_reader import get_reader
+from rules_engine.utils.logger import setup_logger
+
+# Set up logging
+logger = setup_logger("rules_engine")
+
+def read_frames(gcs, reader, bucket_name, file_name, file_size, columns=None):
+    """
+    Read a CSV file from GCS as one or more dataframes.
+
+    Files above the streaming threshold are downloaded and parsed in chunks,
+    so peak memory is bounded by the chunk size rather than the file size.
+    Smaller files are downloaded as bytes (with concurrent ranged requests
+    when large) and handed straight to the parser, which frees the raw
+    buffer once it is parsed.
+
+    Args:
+        gcs (GCSConnector): Connector used to read the file
+        reader (PandasCSVReader or ArrowCSVReader): Parser for the file contents
+        bucket_name (str): Name of the GCS bucket
+        file_name (str): Path to the file within the bucket
+        file_size (int): Size of the object in bytes
+        columns (set, optional): Names of the columns to parse
+
+    Yields:
+        pd.DataFrame: Consecutive chunks of the file
+    """
+    if file_size > settings.STREAMING_THRESHOLD_BYTES:
+        logger.info(f"Streaming file in chunks of {settings.CHUNK_ROWS} rows")
+        with gcs.open_file(bucket_name, file_name, settings.DOWNLOAD_CHUNK_BYTES) as stream:
+            yield from reader.iter_chunks(stream, columns, settings.CHUNK_ROWS)
+        return
+
+    if file_size >= settings.SLICED_DOWNLOAD_THRESHOLD_BYTES:
+        yield reader.read(
+            gcs.read_bytes_sliced(
+                bucket_name, file_name, settings.DOWNLOAD_SLICE_BYTES, settings.DOWNLOAD_WORKERS
+            ),
+            columns,
+        )
+    else:
+        yield reader.read(gcs.read_bytes(bucket_name, file_name), columns)
+
+
+def load_rules(bq):
+    """
+    Load the rules to apply.
+
+    When a rules snapshot is configured its precompiled rules are used, so no
+    BigQuery query or parsing is needed; newer snapshots are picked up in the
+    background. If the snapshot cannot be loaded the rules are read from
+    BigQuery instead.
+
+    Args:
+        bq (BigQueryConnector): Connector used when no snapshot is available
+
+    Returns:
+        list: List of Rule objects
+    """
+    if settings.RULES_SNAPSHOT_URI:
+        try:
+            loader = get_loader(
+                settings.RULES_SNAPSHOT_URI, get_storage_client(), settings.RULES_SNAPSHOT_CHECK_SECONDS
+            )
+            snapshot = loader.current()
+            logger.info(f"Using rules snapshot {snapshot.version}")
+            return snapshot.rules
+        except Exception as e:
+            logger.warning(f"Loading rules snapshot failed, reading rules from BigQuery: {str(e)}")
+
+    rules = bq.get_rules()
+    logger.info(f"Fetched {len(rules)} rules from BigQuery")
+    return rules
+
+
+@functions_framework.cloud_event
+def process_gcs_file(cloud_event):
+    """
+    Cloud Function triggered by a finalize event on a GCS bucket.
+
+    Args:
+        cloud_event (CloudEvent): The CloudEvent that triggered the function
+
+    Returns:
+        None: The function logs its progress and writes to BigQuery
+    """
+    logger.info("Starting rules engine processing")
+
+    try:
+        # Extract GCS file information from the event
+        payload = cloud_event.data
+        bucket_name = payload["bucket"]
+        file_name = payload["name"]
+        file_size = int(payload.get("size") or 0)
+        generation = payload.get("generation")
+
+        logger.info(f"Processing file: gs://{bucket_name}/{file_name}")
+
+        # Initialize connectors on the clients shared across warm invocations
+        gcs = GCSConnector(get_storage_client())
+        bq = BigQueryConnector(client=get_bigquery_client())
+        reader = get_reader(settings.CSV_READER)
+
+        sharder = None
+        if settings.EVAL_PROCESSES > 0:
+            sharder = ProcessSharder(settings.EVAL_PROCESSES, settings.PROCESS_MIN_ROWS)
+        rule_set = RuleSet(
+            load_rules(bq), get_executor(settings.EVAL_THREADS), settings.PARALLEL_MIN_ROWS, sharder
+        )
+        logger.info(f"Compiled plan cache: {cache_info()}")
+
+        # Skip duplicate deliveries and metadata-only updates of an object version
+        # already evaluated against these rules, before downloading anything
+        ledger = None
+        if settings.LEDGER_ENABLED and generation:
+            ledger = get_ledger(settings.LEDGER_PATH, settings.LEDGER_MAX_ENTRIES)
+            ledger_key = ledger.key(bucket_name, file_name, generation, rule_set.version)
+            if ledger.seen(ledger_key):
+                logger.info(
+                    f"Skipping gs://{bucket_name}/{file_name}#{generation}, already processed with "
+                    f"rules {rule_set.version} ({ledger.skipped} duplicate events skipped)"
+                )
+                return f"Skipped {file_name}, already processed"
+
+        # Skip columns no rule reads when parsing the file (assuming CSV for this example)
+        columns = None
+        if settings.PRUNE_COLUMNS:
+            columns = rule_set.referenced_columns(settings.KEY_COLUMNS)
+
+        # Violation IDs derived from the object version make retried events idempotent
+        source = source_id(bucket_name, file_name, generation) if generation else None
+
+        # Each rule's output mode decides which of its violations are written
+        outputs = [
+            RuleOutput(
+                rule, settings.DEFAULT_SAMPLE_SIZE, settings.DETAIL_COLUMNS or None,
+                sample_seed(source, rule.rule_number),
+            )
+            for rule in rule_set
+        ]
+
+        # Apply all rules to each chunk in a single pass; violations are written in the
+        # background while later rules and chunks are evaluated, buffered across rules and
+        # chunks so large volumes use load jobs, and flushed before returning
+        row_count = 0
+        with ViolationWriter(bq, settings.WRITE_QUEUE_SIZE, source) as writer:
+            for df in read_frames(gcs, reader, bucket_name, file_name, file_size, columns):
+                for output, batch in zip(outputs, rule_set.iter_apply(df, row_offset=row_count)):
+                    kept = output.add(batch)
+                    if kept is not None and settings.WRITE_VIOLATIONS:
+                        writer.submit([kept])
+                row_count += len(df)
+
+            # Samples are serialized when finished, so only finish them to write them
+            if settings.WRITE_VIOLATIONS:
+                for output in outputs:
+                    kept = output.finish()
+                    if kept is not None:
+                        writer.submit([kept])
+
+        logger.info(f"Loaded data with {row_count} rows")
+        found = [output for output in outputs if output.count]
+        for output in found:
+            logger.warning(
+                f"Rule {output.rule_number} found {output.count} violations ({output.mode} output)"
+            )
+
+        summaries = [output.summary() for output in found if output.mode != "all"]
+        if summaries and settings.WRITE_VIOLATIONS:
+            bq.log_violation_summaries(summaries, source)
+
+        total = sum(output.count for output in found)
+        if found and settings.WRITE_VIOLATIONS:
+            written = sum(output.written for output in found)
+            logger.info(f"Logged {written} of {total} total violations to BigQuery")
+        elif found:
+            logger.info(f"Found {total} total violations; writing is disabled, only counts were logged")
+        else:
+            logger.info("No violations found")
+
+        # Only reached once every write succeeded: failed writes raise above, so a
+        # retried event processes the object again instead of being skipped
+        if ledger is not None:
+            ledger.record(ledger_key)
+
+        return f"Processed {file_name} successfully"
+
+    except Exception as e:
+        logger.error(f"Error processing file: {str(e)}")
+        raise
@@ -0,0 +1 @@
+"""Configuration for the rules engine."""
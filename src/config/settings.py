@@ -0,0 +1,154 @@
+"""
+Runtime settings.
+Values are read from environment variables so each deployment can tune them.
+"""
+
+import os
+
+
+def env_bool(name, default):
+    """
+    Read a boolean environment variable.
+
+    Args:
+        name (str): Variable name
+        default (bool): Value when the variable is not set
+
+    Returns:
+        bool: The configured value
+    """
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def env_int(name, default):
+    """
+    Read an integer environment variable.
+
+    Args:
+        name (str): Variable name
+        default (int): Value when the variable is not set
+
+    Returns:
+        int: The configured value
+    """
+    value = os.environ.get(name)
+    if value is None or not value.strip():
+        return default
+    return int(value)
+
+
+def env_list(name, default=()):
+    """
+    Read a comma-separated environment variable.
+
+    Args:
+        name (str): Variable name
+        default (tuple, optional): Value when the variable is not set
+
+    Returns:
+        tuple: The non-empty items
+    """
+    value = os.environ.get(name)
+    if value is None:
+        return tuple(default)
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+
+# Only parse the columns referenced by the rules (plus KEY_COLUMNS)
+PRUNE_COLUMNS = env_bool("RULES_ENGINE_PRUNE_COLUMNS", True)
+
+# Columns always read when pruning, e.g. identifiers shown in violation details
+KEY_COLUMNS = env_list("RULES_ENGINE_KEY_COLUMNS")
+
+# Files larger than this many bytes are evaluated chunk by chunk
+STREAMING_THRESHOLD_BYTES = env_int("RULES_ENGINE_STREAMING_THRESHOLD_BYTES", 256 * 1024 * 1024)
+
+# Rows parsed and evaluated per chunk in streaming mode
+CHUNK_ROWS = env_int("RULES_ENGINE_CHUNK_ROWS", 500_000)
+
+# Bytes fetched from GCS per request in streaming mode
+DOWNLOAD_CHUNK_BYTES = env_int("RULES_ENGINE_DOWNLOAD_CHUNK_BYTES", 32 * 1024 * 1024)
+
+# Files at least this large are downloaded with concurrent ranged requests
+SLICED_DOWNLOAD_THRESHOLD_BYTES = env_int("RULES_ENGINE_SLICED_DOWNLOAD_THRESHOLD_BYTES", 64 * 1024 * 1024)
+
+# Bytes per ranged request and maximum concurrent requests for sliced downloads
+DOWNLOAD_SLICE_BYTES = env_int("RULES_ENGINE_DOWNLOAD_SLICE_BYTES", 16 * 1024 * 1024)
+DOWNLOAD_WORKERS = env_int("RULES_ENGINE_DOWNLOAD_WORKERS", 8)
+
+# CSV parser: "arrow", "pandas" or "auto" (arrow when pyarrow is installed)
+CSV_READER = os.environ.get("RULES_ENGINE_CSV_READER", "auto")
+
+# Pooled connections in the shared HTTP session; keep at least DOWNLOAD_WORKERS
+HTTP_POOL_SIZE = env_int("RULES_ENGINE_HTTP_POOL_SIZE", 32)
+
+# Seconds cached rules are used before checking the rules table for changes
+RULES_CACHE_TTL_SECONDS = env_int("RULES_ENGINE_RULES_CACHE_TTL_SECONDS", 300)
+
+# Column whose maximum versions the rules table; its last modified time when unset
+RULES_VERSION_COLUMN = os.environ.get("RULES_ENGINE_RULES_VERSION_COLUMN", "")
+
+# Rules snapshot (local path or gs://bucket/path) loaded instead of querying
+# BigQuery; see rules_engine.utils.export_snapshot
+RULES_SNAPSHOT_URI = os.environ.get("RULES_ENGINE_RULES_SNAPSHOT_URI", "")
+
+# Minimum seconds between background checks for a newer rules snapshot
+RULES_SNAPSHOT_CHECK_SECONDS = env_int("RULES_ENGINE_RULES_SNAPSHOT_CHECK_SECONDS", 60)
+
+# Streaming inserts are split into requests of at most this many rows and bytes;
+# BigQuery rejects requests above 50,000 rows or 10 MB
+INSERT_BATCH_ROWS = env_int("RULES_ENGINE_INSERT_BATCH_ROWS", 10_000)
+INSERT_BATCH_BYTES = env_int("RULES_ENGINE_INSERT_BATCH_BYTES", 8 * 1024 * 1024)
+
+# Violations written in one call from this many rows on use a batch load job
+LOAD_JOB_THRESHOLD_ROWS = env_int("RULES_ENGINE_LOAD_JOB_THRESHOLD_ROWS", 100_000)
+
+# Violation batches queued for the background writer before evaluation waits;
+# 0 writes each batch synchronously
+WRITE_QUEUE_SIZE = env_int("RULES_ENGINE_WRITE_QUEUE_SIZE", 4)
+
+# Serialized violation details the writer buffers before writing them; the
+# buffer is also written once it reaches LOAD_JOB_THRESHOLD_ROWS violations
+WRITE_BUFFER_BYTES = env_int("RULES_ENGINE_WRITE_BUFFER_BYTES", 64 * 1024 * 1024)
+
+# Skip events for object versions already processed with the same rules
+LEDGER_ENABLED = env_bool("RULES_ENGINE_LEDGER_ENABLED", True)
+
+# SQLite database persisting the processed object ledger; memory only when unset
+LEDGER_PATH = os.environ.get("RULES_ENGINE_LEDGER_PATH", "")
+
+# Processed object versions remembered in memory per instance
+LEDGER_MAX_ENTRIES = env_int("RULES_ENGINE_LEDGER_MAX_ENTRIES", 100_000)
+
+# Concurrent jobs and retries after quota errors when running rule queries in BigQuery
+QUERY_CONCURRENCY = env_int("RULES_ENGINE_QUERY_CONCURRENCY", 8)
+QUERY_MAX_RETRIES = env_int("RULES_ENGINE_QUERY_MAX_RETRIES", 5)
+
+# Rule queries whose dry run estimates more bytes than this are rejected, and
+# once the estimates of a run add up to the budget the rest are deferred; 0 disables
+QUERY_MAX_BYTES = env_int("RULES_ENGINE_QUERY_MAX_BYTES", 0)
+QUERY_BUDGET_BYTES = env_int("RULES_ENGINE_QUERY_BUDGET_BYTES", 0)
+
+# Threads evaluating rules in parallel on large frames (1 evaluates serially),
+# and the smallest frame worth spreading over them
+EVAL_THREADS = env_int("RULES_ENGINE_EVAL_THREADS", min(16, os.cpu_count() or 1))
+PARALLEL_MIN_ROWS = env_int("RULES_ENGINE_PARALLEL_MIN_ROWS", 50_000)
+
+# Worker processes evaluating row ranges of large frames, for rules that hold
+# the GIL (0 disables), and the smallest frame worth sharding; needs pyarrow
+EVAL_PROCESSES = env_int("RULES_ENGINE_EVAL_PROCESSES", 0)
+PROCESS_MIN_ROWS = env_int("RULES_ENGINE_PROCESS_MIN_ROWS", 1_000_000)
+
+# Columns included in violation details; every column read when unset
+DETAIL_COLUMNS = env_list("RULES_ENGINE_DETAIL_COLUMNS")
+
+# Write violating rows to BigQuery; when off only per-rule counts are logged
+# and no violation details are serialized
+WRITE_VIOLATIONS = env_bool("RULES_ENGINE_WRITE_VIOLATIONS", True)
+
+# Rows kept by the "first" and "sample" output modes of rules that do not set
+# a sample_size in the rules table
+DEFAULT_SAMPLE_SIZE = env_int("RULES_ENGINE_DEFAULT_SAMPLE_SIZE", 100)
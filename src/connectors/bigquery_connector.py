@@ -0,0 +1,471 @@
+"""
+Connector for BigQuery.
+Handles reading from and writing to BigQuery tables, including fetching rules
+and logging rule violations.
+"""
+
+from google.cloud import bigquery
+import json
+import logging
+import tempfile
+import uuid
+from datetime import datetime
+
+from rules_engine.config import settings
+from rules_engine.connectors.cost_planner import CostPlanner, cost_rows
+from rules_engine.connectors.query_runner import RuleQueryRunner
+from rules_engine.connectors.rules_cache import rules_cache
+from rules_engine.models.rule import Rule
+
+logger = logging.getLogger("rules_engine")
+
+# Namespace of the name-based violation IDs
+VIOLATION_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "rules_engine/rule_violations")
+
+# Encoded size of a streamed row beyond its fields: braces and insert ID
+ROW_OVERHEAD_BYTES = 64
+
+# Load job data above this size is staged in a temporary file instead of memory
+LOAD_SPOOL_BYTES = 64 * 1024 * 1024
+
+# Queries reading rules from each supported rules table layout
+RULE_QUERIES = {
+    # SELECT * so the optional output_mode and sample_size columns are read
+    # when the table has them
+    "rules_definition": """
+        SELECT *
+        FROM `{table}`
+        """,
+    # Google Sheet backed table used by docs/wow_implementation.sql
+    "gsheet": """
+        SELECT
+            description AS rule_number,
+            description AS rule_description,
+            query AS rule_query
+        FROM `{table}`
+        WHERE query IS NOT NULL
+        """,
+}
+
+class BigQueryConnector:
+    """Connector for BigQuery operations."""
+
+    def __init__(self, project_id=None, dataset_id="rules_engine", client=None):
+        """
+        Initialize the BigQuery connector.
+
+        Args:
+            project_id (str, optional): GCP project ID. If None, default project will be used.
+            dataset_id (str, optional): BigQuery dataset ID. Defaults to "rules_engine".
+            client (bigquery.Client, optional): Existing client to reuse, e.g. the
+                shared client from rules_engine.connectors.clients
+        """
+        self.client = client if client is not None else bigquery.Client(project=project_id)
+        self.dataset_id = dataset_id
+        self.rules_table = "rules_definition"
+        self.violations_table = "rule_violations"
+        self.costs_table = "rule_query_costs"
+        self.rules_version = None
+
+    def get_rules(self, cache=None, ttl=None):
+        """
+        Fetch rules, reusing the rules cached on this instance when possible.
+
+        Within RULES_ENGINE_RULES_CACHE_TTL_SECONDS the cached rules are returned
+        without calling BigQuery. After that the table version is checked and
+        the rules are only queried again if it changed. If the check or the
+        query fails, the previously cached rules are returned.
+
+        Args:
+            cache (RulesCache, optional): Cache to use. Defaults to the
+                process-wide cache.
+            ttl (float, optional): Seconds to trust cached rules without
+                checking. Defaults to RULES_ENGINE_RULES_CACHE_TTL_SECONDS.
+
+        Returns:
+            list: List of Rule objects
+        """
+        cache = cache if cache is not None else rules_cache
+        ttl = ttl if ttl is not None else settings.RULES_CACHE_TTL_SECONDS
+        key = f"{self.client.project}.{self.dataset_id}.{self.rules_table}"
+        rules, self.rules_version = cache.get(key, self.query_rules, self.get_rules_version, ttl)
+        return rules
+
+    def get_rules_version(self):
+        """
+        Fetch the current version of the rules table.
+
+        This is the maximum of RULES_ENGINE_RULES_VERSION_COLUMN when that is
+        set, and the table's last modified time otherwise. A metadata lookup
+        is much cheaper than querying the rules themselves.
+
+        Returns:
+            The version; equal values mean the rules are unchanged
+        """
+        table_id = f"{self.dataset_id}.{self.rules_table}"
+        if settings.RULES_VERSION_COLUMN:
+            query = f"SELECT MAX({settings.RULES_VERSION_COLUMN}) AS version FROM `{table_id}`"
+            for row in self.client.query(query).result():
+                return row.version
+            return None
+        return self.client.get_table(table_id).modified
+
+    def query_rules(self, table=None, layout="rules_definition"):
+        """
+        Fetch rules from a BigQuery rules table.
+
+        Args:
+            table (str, optional): Table to read. Defaults to the connector's
+                rules table.
+            layout (str, optional): Column layout of the table, a key of
+                RULE_QUERIES
+
+        Returns:
+            list: List of Rule objects
+        """
+        if table is None:
+            table = f"{self.dataset_id}.{self.rules_table}"
+        query = RULE_QUERIES[layout].format(table=table)
+
+        query_job = self.client.query(query)
+        rows = query_job.result()
+
+        rules = []
+        for row in rows:
+            rule = Rule(
+                rule_number=row.rule_number,
+                rule_description=row.rule_description,
+                rule_query=row.rule_query,
+                output_mode=getattr(row, "output_mode", None),
+                sample_size=getattr(row, "sample_size", None)
+            )
+            rules.append(rule)
+
+        return rules
+
+    def run_rule_queries(
+        self, queries, max_concurrency=None, max_rule_bytes=None, max_total_bytes=None, priority=None
+    ):
+        """
+        Plan and run warehouse-side rule queries as concurrent jobs.
+
+        Every query is dry-run first. Queries whose dry run fails or that
+        would process more than ``max_rule_bytes`` are rejected, queries that
+        no longer fit ``max_total_bytes`` are deferred, and the rest run
+        cheapest first, after those deferred by the previous run. Estimates
+        and actuals are recorded in the costs table.
+
+        Args:
+            queries (list): (rule_number, sql) pairs
+            max_concurrency (int, optional): Maximum concurrent jobs. Defaults
+                to RULES_ENGINE_QUERY_CONCURRENCY.
+            max_rule_bytes (int, optional): Maximum bytes per query, 0 for no
+                limit. Defaults to RULES_ENGINE_QUERY_MAX_BYTES.
+            max_total_bytes (int, optional): Maximum bytes for all queries, 0
+                for no limit. Defaults to RULES_ENGINE_QUERY_BUDGET_BYTES.
+            priority (iterable, optional): Rule numbers to run before the
+                others. Defaults to ``deferred_rule_queries``.
+
+        Returns:
+            list: One RuleQueryResult per query, in input order
+        """
+        if max_concurrency is None:
+            max_concurrency = settings.QUERY_CONCURRENCY
+        if max_rule_bytes is None:
+            max_rule_bytes = settings.QUERY_MAX_BYTES
+        if max_total_bytes is None:
+            max_total_bytes = settings.QUERY_BUDGET_BYTES
+        if priority is None:
+            priority = self.deferred_rule_queries() if max_total_bytes else ()
+
+        plan = CostPlanner(self.client, max_rule_bytes, max_total_bytes, max_concurrency).plan(queries, priority)
+        runner = RuleQueryRunner(
+            self.client, max_concurrency, settings.QUERY_MAX_RETRIES, maximum_bytes_billed=max_rule_bytes or None
+        )
+        results = plan.complete(runner.run(plan.queries))
+        self.log_rule_costs(cost_rows(results, uuid.uuid4().hex))
+        return results
+
+    def deferred_rule_queries(self):
+        """
+        Rule numbers the latest recorded run deferred over its budget.
+
+        Failures are logged and treated as no deferred rules, so a missing
+        costs table does not stop the run.
+
+        Returns:
+            set: Rule numbers, or labels of shared scans
+        """
+        table = f"{self.dataset_id}.{self.costs_table}"
+        query = (
+            f"SELECT rule_number FROM `{table}` "
+            f"WHERE status = 'deferred' AND run_id = ("
+            f"SELECT run_id FROM `{table}` ORDER BY recorded_at DESC LIMIT 1)"
+        )
+        try:
+            return {row.rule_number for row in self.client.query(query).result()}
+        except Exception as e:
+            logger.warning(f"Error reading deferred rule queries: {str(e)}")
+            return set()
+
+    def log_rule_costs(self, rows):
+        """
+        Record estimated and actual bytes of rule queries.
+
+        Failures are logged but not raised, the queries have already run.
+
+        Args:
+            rows (list): Rows from ``cost_rows``
+        """
+        if not rows:
+            return
+        table = f"{self.dataset_id}.{self.costs_table}"
+        try:
+            errors = self.client.insert_rows_json(table, rows)
+        except Exception as e:
+            errors = [str(e)]
+        if errors:
+            logger.warning(f"Errors recording rule query costs: {errors}")
+
+    def violation_rows(self, violations, source=None):
+        """
+        Build the violations table rows for a list of batches.
+
+        Details of lazy batches are serialized here, one batch at a time and
+        limited to RULES_ENGINE_DETAIL_COLUMNS when set.
+
+        Args:
+            violations (list): List of ViolationBatch objects
+            source (str, optional): Identifier of the exact object version the
+                violations were found in, see ``source_id``. When given,
+                violation IDs are derived from it, otherwise they are random.
+
+        Yields:
+            dict: One row per violation
+        """
+        timestamp = datetime.now().isoformat()
+        columns = settings.DETAIL_COLUMNS or None
+        for batch in violations:
+            for row_number, details in zip(batch.row_numbers.tolist(), batch.serialize(columns)):
+                yield {
+                    "violation_id": violation_id(source, batch.rule_number, row_number),
+                    "rule_number": batch.rule_number,
+                    "rule_description": batch.rule_description,
+                    "violation_timestamp": timestamp,
+                    "row_number": row_number,
+                    "violation_details": details
+                }
+
+    def log_violations(self, violations, source=None):
+        """
+        Log rule violations to the BigQuery violations table.
+
+        With a ``source``, a retried event produces the same violation IDs,
+        which are also sent as insert IDs so BigQuery drops streamed
+        duplicates on a best-effort basis.
+
+        Up to RULES_ENGINE_LOAD_JOB_THRESHOLD_ROWS violations are streamed with
+        ``insert_rows_json``, split into requests of at most
+        RULES_ENGINE_INSERT_BATCH_ROWS rows and RULES_ENGINE_INSERT_BATCH_BYTES
+        bytes. Larger volumes are written with a single batch load job, which
+        has no request size limit and no streaming ingestion cost.
+
+        Args:
+            violations (list): List of ViolationBatch objects
+            source (str, optional): Identifier of the object version the
+                violations were found in, see ``source_id``
+
+        Returns:
+            None
+
+        Raises:
+            RuntimeError: If BigQuery rejected streamed rows, e.g. because the
+                table lacks the ``row_number`` column
+            google.api_core.exceptions.GoogleAPICallError: If the load job
+                failed
+        """
+        total = sum(len(batch) for batch in violations)
+        if not total:
+            return
+
+        rows = self.violation_rows(violations, source)
+        if total >= settings.LOAD_JOB_THRESHOLD_ROWS:
+            self._load_rows(rows)
+        else:
+            self._insert_rows(rows)
+
+    def log_violation_summaries(self, summaries, source=None):
+        """
+        Log the violation counts of rules that do not write every violation.
+
+        Each summary becomes a rule_violations row without a row number,
+        whose details hold the output mode, the exact number of violations
+        and the number of rows written.
+
+        Args:
+            summaries (list): Dictionaries from ``RuleOutput.summary``
+            source (str, optional): Identifier of the object version, see
+                ``source_id``
+
+        Raises:
+            RuntimeError: If BigQuery rejected rows
+        """
+        timestamp = datetime.now().isoformat()
+        rows = [
+            {
+                "violation_id": violation_id(source, summary["rule_number"], "summary"),
+                "rule_number": summary["rule_number"],
+                "rule_description": summary["rule_description"],
+                "violation_timestamp": timestamp,
+                "row_number": None,
+                "violation_details": json.dumps({
+                    "output_mode": summary["output_mode"],
+                    "violation_count": summary["violation_count"],
+                    "rows_written": summary["rows_written"],
+                }),
+            }
+            for summary in summaries
+        ]
+        if rows:
+            self._insert_rows(rows)
+
+    def _insert_rows(self, rows):
+        """Stream rows into the violations table in size-limited requests, raising on rejected rows."""
+        table = f"{self.dataset_id}.{self.violations_table}"
+        inserted = 0
+        requests = 0
+        for chunk in split_rows(rows, settings.INSERT_BATCH_ROWS, settings.INSERT_BATCH_BYTES):
+            row_ids = [row["violation_id"] for row in chunk]
+            errors = self.client.insert_rows_json(table, chunk, row_ids=row_ids)
+            if errors:
+                # Schema errors reject every row, so stop at the first failed request
+                logger.error(f"Errors inserting rows: {errors}")
+                raise RuntimeError(f"BigQuery rejected {len(errors)} of {len(chunk)} rows inserted into {table}")
+            inserted += len(chunk)
+            requests += 1
+
+        logger.info(f"Inserted {inserted} violation records in {requests} requests")
+
+    def _load_rows(self, rows):
+        """Write rows to the violations table with a batch load job, raising if the job fails."""
+        table = f"{self.dataset_id}.{self.violations_table}"
+        job_config = bigquery.LoadJobConfig(
+            source_format=bigquery.SourceFormat.NEWLINE_DELIMITED_JSON,
+            write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+        )
+
+        # Staged in memory, spilling to a temporary file for large volumes
+        with tempfile.SpooledTemporaryFile(max_size=LOAD_SPOOL_BYTES) as staging:
+            count = write_ndjson(rows, staging)
+            job = self.client.load_table_from_file(staging, table, rewind=True, job_config=job_config)
+            # Raises if the job failed, like rejected streaming inserts do
+            job.result()
+
+        logger.info(f"Loaded {count} violation records with load job {job.job_id}")
+
+
+def source_id(bucket_name, file_name, generation):
+    """
+    Identifier of one version of a GCS object.
+
+    Args:
+        bucket_name (str): Name of the GCS bucket
+        file_name (str): Path to the file within the bucket
+        generation (str or int): Generation of the object
+
+    Returns:
+        str: ``gs://bucket/name#generation``
+    """
+    return f"gs://{bucket_name}/{file_name}#{generation}"
+
+
+def violation_id(source, rule_number, row_number):
+    """
+    ID of a violation.
+
+    Args:
+        source (str): Identifier of the object version, or None
+        rule_number (str): Identifier of the violated rule
+        row_number (int): Position of the violating row in the file
+
+    Returns:
+        str: A name-based UUID of the three values, so reprocessing the same
+        object version yields the same ID, or a random UUID without a source
+    """
+    if source is None:
+        return str(uuid.uuid4())
+    return str(uuid.uuid5(VIOLATION_NAMESPACE, f"{source}|{rule_number}|{row_number}"))
+
+
+def json_size(value):
+    """
+    Length of a value once encoded as a JSON field, without encoding it.
+
+    Exact for ASCII strings (violation details are ASCII, since pandas escapes
+    other characters); close enough for limiting request sizes otherwise.
+
+    Args:
+        value: String, number or None
+
+    Returns:
+        int: Encoded length in bytes
+    """
+    if isinstance(value, str):
+        return len(value) + value.count('"') + value.count("\\") + 2
+    if value is None:
+        return 4
+    return len(str(value))
+
+
+def split_rows(rows, max_rows, max_bytes):
+    """
+    Group rows into requests that respect row count and byte limits.
+
+    A row larger than ``max_bytes`` on its own is sent alone.
+
+    Args:
+        rows (iterable): Row dictionaries
+        max_rows (int): Maximum rows per request
+        max_bytes (int): Maximum encoded bytes per request
+
+    Yields:
+        list: Consecutive groups of rows
+    """
+    chunk = []
+    chunk_bytes = 0
+    for row in rows:
+        size = ROW_OVERHEAD_BYTES + sum(len(key) + json_size(value) + 4 for key, value in row.items())
+        if chunk and (len(chunk) >= max_rows or chunk_bytes + size > max_bytes):
+            yield chunk
+            chunk = []
+            chunk_bytes = 0
+        chunk.append(row)
+        chunk_bytes += size
+    if chunk:
+        yield chunk
+
+
+def write_ndjson(rows, stream, rows_per_write=10_000):
+    """
+    Write rows as newline-delimited JSON.
+
+    Args:
+        rows (iterable): Row dictionaries
+        stream (file-like): Binary stream to write to
+        rows_per_write (int, optional): Rows encoded per write call
+
+    Returns:
+        int: Number of rows written
+    """
+    count = 0
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(row))
+        if len(lines) >= rows_per_write:
+            stream.write(("\n".join(lines) + "\n").encode("utf-8"))
+            count += len(lines)
+            lines = []
+    if lines:
+        stream.write(("\n".join(lines) + "\n").encode("utf-8"))
+        count += len(lines)
+    return count
@@ -0,0 +1,100 @@
+"""
+Shared Google Cloud clients.
+Lazily creates one storage client, one BigQuery client and one pooled HTTP
+session per process, so warm Cloud Function instances reuse credentials,
+connections and TLS sessions across invocations.
+"""
+
+import logging
+import threading
+
+import google.auth
+from google.auth.transport.requests import AuthorizedSession
+from google.cloud import bigquery, storage
+from requests.adapters import HTTPAdapter
+
+from rules_engine.config import settings
+
+logger = logging.getLogger("rules_engine")
+
+SCOPES = ["https://www.googleapis.com/auth/cloud-platform"]
+
+_lock = threading.Lock()
+_credentials = None
+_project = None
+_session = None
+_storage_client = None
+_bigquery_client = None
+
+
+def _get_session():
+    """Create the shared session on first use. Must be called with the lock held."""
+    global _credentials, _project, _session
+    if _session is None:
+        _credentials, _project = google.auth.default(scopes=SCOPES)
+        _session = AuthorizedSession(_credentials)
+        adapter = HTTPAdapter(
+            pool_connections=settings.HTTP_POOL_SIZE,
+            pool_maxsize=settings.HTTP_POOL_SIZE,
+        )
+        _session.mount("https://", adapter)
+        logger.info(f"Created shared HTTP session with {settings.HTTP_POOL_SIZE} pooled connections")
+    return _session
+
+
+def get_http_session():
+    """
+    Return the process-wide authorized HTTP session.
+
+    Returns:
+        AuthorizedSession: Session with a connection pool sized by
+        RULES_ENGINE_HTTP_POOL_SIZE
+    """
+    with _lock:
+        return _get_session()
+
+
+def get_storage_client():
+    """
+    Return the process-wide storage client, creating it on first use.
+
+    Returns:
+        storage.Client: Shared client
+    """
+    global _storage_client
+    if _storage_client is None:
+        with _lock:
+            if _storage_client is None:
+                session = _get_session()
+                _storage_client = storage.Client(
+                    project=_project, credentials=_credentials, _http=session
+                )
+    return _storage_client
+
+
+def get_bigquery_client():
+    """
+    Return the process-wide BigQuery client, creating it on first use.
+
+    Returns:
+        bigquery.Client: Shared client
+    """
+    global _bigquery_client
+    if _bigquery_client is None:
+        with _lock:
+            if _bigquery_client is None:
+                session = _get_session()
+                _bigquery_client = bigquery.Client(
+                    project=_project, credentials=_credentials, _http=session
+                )
+    return _bigquery_client
+
+
+def reset_clients():
+    """Drop the shared clients and session, e.g. after a fork or in tests."""
+    global _credentials, _project, _session, _storage_client, _bigquery_client
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _credentials = _project = _session = None
+        _storage_client = _bigquery_client = None
@@ -0,0 +1,223 @@
+"""
+Rule query cost planner.
+Dry-runs warehouse-side rule queries before they run, so rules that would scan
+more than a configured budget are rejected or deferred and the rest run
+cheapest first, after the rules deferred by the previous run.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from google.cloud import bigquery
+from rules_engine.connectors.query_runner import RuleQueryResult
+
+logger = logging.getLogger("rules_engine")
+
+
+def format_bytes(size):
+    """
+    Format a byte count for log messages.
+
+    Args:
+        size (int): Number of bytes
+
+    Returns:
+        str: Size with a binary unit, e.g. ``"1.5 GiB"``
+    """
+    for unit in ("B", "KiB", "MiB", "GiB", "TiB"):
+        if size < 1024 or unit == "TiB":
+            break
+        size /= 1024
+    return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+
+
+class QueryPlan:
+    """
+    Outcome of planning a set of rule queries.
+
+    Holds one RuleQueryResult per query in input order, with the estimated
+    bytes filled in and the status set to ``"rejected"`` or ``"deferred"``
+    for queries that must not run, and the queries that may run ordered
+    cheapest first.
+    """
+
+    def __init__(self, queries, results, order):
+        """
+        Initialize the plan.
+
+        Args:
+            queries (list): (rule_number, sql) pairs, in input order
+            results (list): RuleQueryResult per query, in input order
+            order (list): Indexes of the queries to run, cheapest first
+        """
+        self._queries = queries
+        self.results = results
+        self.order = order
+
+    @property
+    def queries(self):
+        """(rule_number, sql) pairs to run, cheapest first."""
+        return [self._queries[index] for index in self.order]
+
+    @property
+    def estimated_bytes(self):
+        """Estimated bytes processed by the queries to run."""
+        return sum(self.results[index].estimated_bytes for index in self.order)
+
+    def complete(self, ran):
+        """
+        Merge the results of running ``queries`` into the plan.
+
+        Args:
+            ran (list): RuleQueryResult per query in ``queries``, in the same
+                order
+
+        Returns:
+            list: One RuleQueryResult per planned query, in input order
+        """
+        for index, result in zip(self.order, ran):
+            result.estimated_bytes = self.results[index].estimated_bytes
+            self.results[index] = result
+        return self.results
+
+
+class CostPlanner:
+    """
+    Plans rule queries from dry-run estimates.
+
+    A query is rejected when its dry run fails or it would process more than
+    ``max_rule_bytes``. The others are ordered by estimated bytes, with the
+    queries deferred by the previous run first so an expensive rule is not
+    deferred forever; once the running total would exceed
+    ``max_total_bytes``, the remaining queries are deferred to a later run.
+    A limit of 0 disables it.
+    """
+
+    def __init__(self, client, max_rule_bytes=0, max_total_bytes=0, max_concurrency=8):
+        """
+        Initialize the planner.
+
+        Args:
+            client (bigquery.Client): Client used for dry runs
+            max_rule_bytes (int, optional): Maximum bytes a single query may process
+            max_total_bytes (int, optional): Maximum bytes all queries of a run
+                may process together
+            max_concurrency (int, optional): Maximum concurrent dry runs
+        """
+        self.client = client
+        self.max_rule_bytes = max_rule_bytes
+        self.max_total_bytes = max_total_bytes
+        self.max_concurrency = max_concurrency
+
+    def estimate(self, sql):
+        """
+        Dry-run a query.
+
+        Dry runs are free and return the bytes the query would process
+        without running it.
+
+        Args:
+            sql (str): Query to estimate
+
+        Returns:
+            int: Estimated bytes processed
+        """
+        job_config = bigquery.QueryJobConfig(dry_run=True, use_query_cache=False)
+        job = self.client.query(sql, job_config=job_config)
+        return job.total_bytes_processed or 0
+
+    def plan(self, queries, priority=()):
+        """
+        Estimate and plan rule queries.
+
+        Args:
+            queries (list): (rule_number, sql) pairs
+            priority (iterable, optional): Rule numbers to fit into the budget
+                before the others, e.g. those deferred by the previous run
+
+        Returns:
+            QueryPlan: The plan
+        """
+        priority = set(priority)
+        queries = list(queries)
+        results = [RuleQueryResult(rule_number) for rule_number, _ in queries]
+        workers = max(1, min(self.max_concurrency, len(queries)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rule-dry-run") as pool:
+            futures = [pool.submit(self.estimate, sql) for _, sql in queries]
+
+        candidates = []
+        for index, (result, future) in enumerate(zip(results, futures)):
+            try:
+                result.estimated_bytes = future.result()
+            except Exception as e:
+                self._skip(result, "rejected", f"Dry run failed: {str(e)}")
+                continue
+            if self.max_rule_bytes and result.estimated_bytes > self.max_rule_bytes:
+                self._skip(
+                    result, "rejected",
+                    f"Estimated {format_bytes(result.estimated_bytes)} exceeds the "
+                    f"{format_bytes(self.max_rule_bytes)} per-rule limit",
+                )
+                continue
+            candidates.append(index)
+
+        order = []
+        total = 0
+        for index in sorted(
+            candidates, key=lambda index: (results[index].rule_number not in priority, results[index].estimated_bytes)
+        ):
+            result = results[index]
+            if self.max_total_bytes and total + result.estimated_bytes > self.max_total_bytes:
+                self._skip(
+                    result, "deferred",
+                    f"Estimated {format_bytes(result.estimated_bytes)} does not fit the remaining "
+                    f"{format_bytes(self.max_total_bytes - total)} of the run budget",
+                )
+                continue
+            total += result.estimated_bytes
+            order.append(index)
+
+        logger.info(
+            f"Planned {len(order)} of {len(queries)} rule queries, estimated {format_bytes(total)}; "
+            f"{sum(result.status == 'rejected' for result in results)} rejected, "
+            f"{sum(result.status == 'deferred' for result in results)} deferred"
+        )
+        return QueryPlan(queries, results, order)
+
+    @staticmethod
+    def _skip(result, status, reason):
+        """Mark a query as not run."""
+        result.status = status
+        result.error = reason
+        logger.warning(f"Rule {result.rule_number} {status}: {reason}")
+
+
+def cost_rows(results, run_id, recorded_at=None):
+    """
+    Build rule_query_costs table rows comparing estimates with actuals.
+
+    Args:
+        results (list): RuleQueryResult objects
+        run_id (str): Identifier shared by all queries of a run
+        recorded_at (datetime, optional): Row timestamp. Defaults to now.
+
+    Returns:
+        list: Rows for the costs table
+    """
+    recorded_at = (recorded_at or datetime.now(timezone.utc)).isoformat()
+    return [
+        {
+            "run_id": run_id,
+            "rule_number": str(result.rule_number),
+            "status": result.status,
+            "estimated_bytes": result.estimated_bytes,
+            "bytes_processed": result.bytes_processed,
+            "job_id": result.job_id,
+            "attempts": result.attempts,
+            "run_seconds": round(result.run_seconds, 3),
+            "error": result.error,
+            "recorded_at": recorded_at,
+        }
+        for result in results
+    ]
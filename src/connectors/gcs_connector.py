@@ -0,0 +1,207 @@
+"""
+Connector for Google Cloud Storage (GCS).
+Handles reading files from and writing files to GCS buckets.
+"""
+
+from google.cloud import storage
+from concurrent.futures import ThreadPoolExecutor
+import base64
+import google_crc32c
+import logging
+
+from rules_engine.config import settings
+
+logger = logging.getLogger("rules_engine")
+
+CHECKSUM_BLOCK_SIZE = 8 * 1024 * 1024
+
+
+class ChecksumMismatch(IOError):
+    """Raised when downloaded data does not match the object's CRC32C."""
+
+
+class IncompleteDownload(IOError):
+    """Raised when a ranged download returned fewer bytes than requested."""
+
+
+class _SliceWriter:
+    """Write-only file object that fills one slice of a preallocated buffer."""
+
+    def __init__(self, view):
+        """
+        Initialize the writer.
+
+        Args:
+            view (memoryview): The slice of the buffer to fill
+        """
+        self.view = view
+        self.position = 0
+
+    def write(self, data):
+        """Copy downloaded bytes into the buffer."""
+        end = self.position + len(data)
+        self.view[self.position:end] = data
+        self.position = end
+        return len(data)
+
+
+class GCSConnector:
+    """Connector for Google Cloud Storage operations."""
+
+    def __init__(self, client=None):
+        """
+        Initialize the GCS connector.
+
+        Args:
+            client (storage.Client, optional): Existing client to reuse, e.g. the
+                shared client from rules_engine.connectors.clients
+        """
+        self.client = client if client is not None else storage.Client()
+
+    def read_file(self, bucket_name, file_name):
+        """
+        Read a file from GCS.
+
+        Args:
+            bucket_name (str): Name of the GCS bucket
+            file_name (str): Path to the file within the bucket
+
+        Returns:
+            str: The contents of the file as a string
+        """
+        bucket = self.client.get_bucket(bucket_name)
+        blob = bucket.blob(file_name)
+
+        content = blob.download_as_text()
+        return content
+
+    def read_bytes(self, bucket_name, file_name):
+        """
+        Read a file from GCS without decoding it.
+
+        Args:
+            bucket_name (str): Name of the GCS bucket
+            file_name (str): Path to the file within the bucket
+
+        Returns:
+            bytes: The raw contents of the file
+        """
+        bucket = self.client.get_bucket(bucket_name)
+        blob = bucket.blob(file_name)
+
+        return blob.download_as_bytes()
+
+    def open_file(self, bucket_name, file_name, chunk_size=None):
+        """
+        Open a file in GCS for streaming reads.
+
+        The object is downloaded in ranged requests of ``chunk_size`` bytes as
+        the returned reader is consumed, so only one chunk is held in memory.
+
+        Args:
+            bucket_name (str): Name of the GCS bucket
+            file_name (str): Path to the file within the bucket
+            chunk_size (int, optional): Bytes fetched per request
+
+        Returns:
+            BlobReader: Binary file-like object over the file contents
+        """
+        bucket = self.client.get_bucket(bucket_name)
+        blob = bucket.blob(file_name)
+
+        if chunk_size is None:
+            return blob.open("rb")
+        return blob.open("rb", chunk_size=chunk_size)
+
+    def read_bytes_sliced(self, bucket_name, file_name, slice_size=None, max_workers=None):
+        """
+        Read a file from GCS with concurrent ranged downloads.
+
+        The object is split into byte ranges of ``slice_size`` that are fetched
+        on a thread pool straight into one preallocated buffer. Every range is
+        pinned to the same object generation and must fill its range exactly,
+        and the assembled data is verified against the object's CRC32C when
+        it has one.
+
+        Args:
+            bucket_name (str): Name of the GCS bucket
+            file_name (str): Path to the file within the bucket
+            slice_size (int, optional): Bytes per ranged request. Defaults to
+                RULES_ENGINE_DOWNLOAD_SLICE_BYTES.
+            max_workers (int, optional): Maximum concurrent requests. Defaults
+                to RULES_ENGINE_DOWNLOAD_WORKERS.
+
+        Returns:
+            bytearray: The contents of the file
+
+        Raises:
+            FileNotFoundError: If the object does not exist
+            IncompleteDownload: If a range returned fewer bytes than requested
+            ChecksumMismatch: If the data does not match the object's CRC32C
+        """
+        slice_size = slice_size or settings.DOWNLOAD_SLICE_BYTES
+        max_workers = max_workers or settings.DOWNLOAD_WORKERS
+        bucket = self.client.get_bucket(bucket_name)
+        blob = bucket.get_blob(file_name)
+        if blob is None:
+            raise FileNotFoundError(f"gs://{bucket_name}/{file_name} does not exist")
+
+        # Byte ranges of a gzip-encoded object refer to the compressed data
+        if blob.content_encoding == "gzip" or blob.size <= slice_size:
+            return bytearray(blob.download_as_bytes(if_generation_match=blob.generation))
+
+        buffer = bytearray(blob.size)
+        view = memoryview(buffer)
+
+        def fetch(start):
+            end = min(start + slice_size, blob.size)
+            writer = _SliceWriter(view[start:end])
+            blob.download_to_file(
+                writer,
+                start=start,
+                end=end - 1,
+                if_generation_match=blob.generation,
+                checksum=None,
+            )
+            # Without a CRC32C, a short range would go unnoticed as zero bytes
+            if writer.position != end - start:
+                raise IncompleteDownload(
+                    f"Range {start}-{end - 1} of gs://{bucket_name}/{file_name} returned "
+                    f"{writer.position} of {end - start} bytes"
+                )
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            list(pool.map(fetch, range(0, blob.size, slice_size)))
+
+        if blob.crc32c is not None:
+            # The C extension only hashes read-only buffers, so feed it bounded copies
+            checksum = google_crc32c.Checksum()
+            for start in range(0, blob.size, CHECKSUM_BLOCK_SIZE):
+                checksum.update(bytes(view[start:start + CHECKSUM_BLOCK_SIZE]))
+            if checksum.digest() != base64.b64decode(blob.crc32c):
+                raise ChecksumMismatch(f"CRC32C mismatch for gs://{bucket_name}/{file_name}")
+
+        view.release()
+        logger.info(
+            f"Downloaded {blob.size} bytes from gs://{bucket_name}/{file_name} "
+            f"in {-(-blob.size // slice_size)} slices"
+        )
+        return buffer
+
+    def write_file(self, bucket_name, file_name, content):
+        """
+        Write content to a file in GCS.
+
+        Args:
+            bucket_name (str): Name of the GCS bucket
+            file_name (str): Path to the file within the bucket
+            content (str): Content to write to the file
+
+        Returns:
+            None
+        """
+        bucket = self.client.get_bucket(bucket_name)
+        blob = bucket.blob(file_name)
+
+        blob.upload_from_string(content)
+        logger.info(f"Wrote content to gs://{bucket_name}/{file_name}")
@@ -0,0 +1,221 @@
+"""
+Processed object ledger.
+Remembers which object versions were already evaluated against which rules,
+so duplicate and metadata-only GCS events are skipped before any download.
+"""
+
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+logger = logging.getLogger("rules_engine")
+
+DEFAULT_MAX_ENTRIES = 100_000
+
+
+class SQLiteLedgerStore:
+    """
+    Persistent ledger store in a SQLite database.
+
+    Stands in for a shared store (e.g. Firestore or a BigQuery table) that
+    instances would use in production; any object with the same ``contains``
+    and ``add`` methods can be plugged into ProcessedLedger instead.
+    """
+
+    def __init__(self, path):
+        """
+        Open the database, creating the table if needed.
+
+        Args:
+            path (str): Database file, or ``":memory:"``
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS processed_objects (
+                    bucket TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    generation TEXT NOT NULL,
+                    rules_version TEXT NOT NULL,
+                    processed_at TEXT NOT NULL,
+                    PRIMARY KEY (bucket, name, generation, rules_version)
+                )
+                """
+            )
+
+    def contains(self, key):
+        """
+        Check whether an object version was processed.
+
+        Args:
+            key (tuple): Bucket, name, generation and rules version
+
+        Returns:
+            bool: Whether the key was recorded
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT 1 FROM processed_objects"
+                " WHERE bucket = ? AND name = ? AND generation = ? AND rules_version = ?",
+                key,
+            ).fetchone()
+        return row is not None
+
+    def add(self, key):
+        """
+        Record a processed object version.
+
+        Args:
+            key (tuple): Bucket, name, generation and rules version
+        """
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR IGNORE INTO processed_objects VALUES (?, ?, ?, ?, ?)",
+                tuple(key) + (datetime.now(timezone.utc).isoformat(),),
+            )
+
+    def close(self):
+        """Close the database."""
+        with self._lock:
+            self._connection.close()
+
+
+class ProcessedLedger:
+    """
+    Ledger of processed (bucket, name, generation, rules version) keys.
+
+    Keys are kept in an in-memory LRU for the lifetime of a warm instance and,
+    when a store is configured, in the store so other instances and cold
+    starts see them too.
+    """
+
+    def __init__(self, store=None, max_entries=DEFAULT_MAX_ENTRIES):
+        """
+        Initialize the ledger.
+
+        Args:
+            store (SQLiteLedgerStore, optional): Persistent store
+            max_entries (int, optional): Maximum keys kept in memory
+        """
+        self.store = store
+        self.max_entries = max_entries
+        self.skipped = 0
+        self.recorded = 0
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(bucket_name, file_name, generation, rules_version):
+        """
+        Ledger key of an object version evaluated against a rules version.
+
+        Args:
+            bucket_name (str): Name of the GCS bucket
+            file_name (str): Path to the file within the bucket
+            generation (str or int): Generation of the object
+            rules_version (str): Version of the rules applied
+
+        Returns:
+            tuple: The key
+        """
+        return (bucket_name, file_name, str(generation), str(rules_version))
+
+    def seen(self, key):
+        """
+        Check whether a key was processed, counting it as skipped if so.
+
+        Args:
+            key (tuple): Key from ``ProcessedLedger.key``
+
+        Returns:
+            bool: Whether the event is a duplicate
+        """
+        with self._lock:
+            found = key in self._keys
+            if found:
+                self._keys.move_to_end(key)
+
+        if not found and self.store is not None:
+            try:
+                found = self.store.contains(key)
+            except Exception as e:
+                logger.warning(f"Checking the processed object ledger failed: {str(e)}")
+            if found:
+                self._remember(key)
+
+        if found:
+            with self._lock:
+                self.skipped += 1
+        return found
+
+    def record(self, key):
+        """
+        Record a key once its object was fully processed.
+
+        Args:
+            key (tuple): Key from ``ProcessedLedger.key``
+        """
+        self._remember(key)
+        with self._lock:
+            self.recorded += 1
+        if self.store is not None:
+            try:
+                self.store.add(key)
+            except Exception as e:
+                logger.warning(f"Recording in the processed object ledger failed: {str(e)}")
+
+    def info(self):
+        """
+        Ledger statistics.
+
+        Returns:
+            dict: Skipped events, recorded objects and keys held in memory
+        """
+        with self._lock:
+            return {"skipped": self.skipped, "recorded": self.recorded, "size": len(self._keys)}
+
+    def _remember(self, key):
+        """Add a key to the in-memory LRU."""
+        with self._lock:
+            self._keys[key] = True
+            self._keys.move_to_end(key)
+            while len(self._keys) > self.max_entries:
+                self._keys.popitem(last=False)
+
+
+_lock = threading.Lock()
+_ledger = None
+
+
+def get_ledger(path="", max_entries=DEFAULT_MAX_ENTRIES):
+    """
+    Return the process-wide ledger, creating it on first use.
+
+    Args:
+        path (str, optional): SQLite database backing the ledger; memory only
+            when empty
+        max_entries (int, optional): Maximum keys kept in memory
+
+    Returns:
+        ProcessedLedger: Shared ledger
+    """
+    global _ledger
+    with _lock:
+        if _ledger is None:
+            store = SQLiteLedgerStore(path) if path else None
+            _ledger = ProcessedLedger(store, max_entries)
+        return _ledger
+
+
+def reset_ledger():
+    """Drop the shared ledger, e.g. in tests."""
+    global _ledger
+    with _lock:
+        if _ledger is not None and _ledger.store is not None:
+            _ledger.store.close()
+        _ledger = None
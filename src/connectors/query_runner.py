@@ -0,0 +1,212 @@
+"""
+Concurrent rule query runner.
+Runs warehouse-side rule queries as concurrent BigQuery jobs instead of one
+after another in a script, backing off when BigQuery reports quota limits.
+"""
+
+import logging
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from google.api_core import exceptions
+from google.cloud import bigquery
+
+logger = logging.getLogger("rules_engine")
+
+# Error reasons BigQuery uses for rate and quota limits
+QUOTA_REASONS = {"rateLimitExceeded", "quotaExceeded", "jobRateLimitExceeded"}
+
+
+def is_quota_error(error):
+    """
+    Whether an error is a BigQuery rate or quota limit worth retrying later.
+
+    Args:
+        error (Exception): Error raised while submitting or waiting for a job
+
+    Returns:
+        bool: Whether the error is a quota error
+    """
+    if isinstance(error, exceptions.TooManyRequests):
+        return True
+    if isinstance(error, exceptions.Forbidden):
+        return any(item.get("reason") in QUOTA_REASONS for item in (error.errors or []))
+    return False
+
+
+class RuleQueryResult:
+    """Outcome of running one rule query."""
+
+    def __init__(self, rule_number):
+        """
+        Initialize the result of a rule that has not run yet.
+
+        Args:
+            rule_number (str): Identifier of the rule
+        """
+        self.rule_number = rule_number
+        self.status = "pending"
+        self.estimated_bytes = None
+        self.job_id = None
+        self.attempts = 0
+        self.queued_seconds = 0.0
+        self.run_seconds = 0.0
+        self.bytes_processed = None
+        self.rows_affected = None
+        self.error = None
+
+    @property
+    def ok(self):
+        """Whether the query succeeded."""
+        return self.status == "done"
+
+    def __repr__(self):
+        """String representation of the result."""
+        return f"RuleQueryResult({self.rule_number}: {self.status}, {self.run_seconds:.2f}s, {self.attempts} attempts)"
+
+
+class _AdaptiveLimit:
+    """
+    Concurrency limit that halves on quota errors and recovers on success.
+
+    Running jobs count against the limit; callers wait while it is reached.
+    """
+
+    def __init__(self, maximum):
+        """
+        Initialize the limit.
+
+        Args:
+            maximum (int): Highest number of concurrent jobs
+        """
+        self.maximum = maximum
+        self.limit = maximum
+        self.active = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """Wait for a free slot and take it."""
+        with self._condition:
+            while self.active >= self.limit:
+                self._condition.wait()
+            self.active += 1
+
+    def release(self, throttled=False):
+        """
+        Free a slot, adjusting the limit.
+
+        Args:
+            throttled (bool, optional): Whether the job hit a quota limit
+        """
+        with self._condition:
+            self.active -= 1
+            if throttled:
+                self.limit = max(1, self.limit // 2)
+            elif self.limit < self.maximum:
+                self.limit += 1
+            self._condition.notify_all()
+
+
+class RuleQueryRunner:
+    """
+    Runs independent rule queries as concurrent BigQuery jobs.
+
+    At most ``max_concurrency`` jobs run at a time. When BigQuery answers with
+    a rate or quota error, the job is retried with exponential backoff and
+    the concurrency limit is halved, then raised again one step per
+    successful job.
+    """
+
+    def __init__(self, client, max_concurrency=8, max_retries=5, backoff=1.0, max_backoff=32.0,
+                 maximum_bytes_billed=None, sleep=time.sleep, clock=time.monotonic):
+        """
+        Initialize the runner.
+
+        Args:
+            client (bigquery.Client): Client used to submit jobs
+            max_concurrency (int, optional): Maximum concurrent jobs
+            max_retries (int, optional): Retries of a query after quota errors
+            backoff (float, optional): Seconds to wait before the first retry
+            max_backoff (float, optional): Maximum seconds between retries
+            maximum_bytes_billed (int, optional): Bytes above which BigQuery
+                fails a query instead of running it
+            sleep (callable, optional): Sleep function, replaceable in tests
+            clock (callable, optional): Monotonic time source in seconds
+        """
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.maximum_bytes_billed = maximum_bytes_billed
+        self.sleep = sleep
+        self.clock = clock
+
+    def run(self, queries):
+        """
+        Run rule queries concurrently and wait for all of them.
+
+        A failing query does not stop the others.
+
+        Args:
+            queries (list): (rule_number, sql) pairs
+
+        Returns:
+            list: One RuleQueryResult per query, in input order
+        """
+        limit = _AdaptiveLimit(self.max_concurrency)
+        submitted = self.clock()
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="rule-query") as pool:
+            futures = [
+                pool.submit(self._run_query, rule_number, sql, limit, submitted)
+                for rule_number, sql in queries
+            ]
+            results = [future.result() for future in futures]
+
+        failed = [result.rule_number for result in results if not result.ok]
+        logger.info(
+            f"Ran {len(results)} rule queries in {self.clock() - submitted:.1f}s "
+            f"with up to {self.max_concurrency} concurrent jobs, {len(failed)} failed"
+        )
+        return results
+
+    def _run_query(self, rule_number, sql, limit, submitted):
+        """Run one query, retrying on quota errors."""
+        result = RuleQueryResult(rule_number)
+        prefix = "rule_" + re.sub(r"[^A-Za-z0-9_-]", "_", str(rule_number)) + "_"
+        job_config = None
+        if self.maximum_bytes_billed:
+            job_config = bigquery.QueryJobConfig(maximum_bytes_billed=self.maximum_bytes_billed)
+        while True:
+            limit.acquire()
+            started = self.clock()
+            if result.attempts == 0:
+                result.queued_seconds = started - submitted
+            result.attempts += 1
+            throttled = False
+            try:
+                job = self.client.query(sql, job_config=job_config, job_id_prefix=prefix)
+                result.job_id = job.job_id
+                job.result()
+                result.status = "done"
+                result.bytes_processed = job.total_bytes_processed
+                result.rows_affected = job.num_dml_affected_rows
+            except Exception as e:
+                throttled = is_quota_error(e)
+                if not throttled or result.attempts > self.max_retries:
+                    result.status = "failed"
+                    result.error = str(e)
+                    logger.error(f"Rule {rule_number} query failed: {str(e)}")
+            finally:
+                result.run_seconds += self.clock() - started
+                limit.release(throttled)
+
+            if result.status != "pending":
+                return result
+
+            delay = min(self.max_backoff, self.backoff * 2 ** (result.attempts - 1))
+            logger.warning(f"Rule {rule_number} hit a BigQuery quota limit, retrying in {delay:.1f}s")
+            self.sleep(delay * random.uniform(0.5, 1.0))
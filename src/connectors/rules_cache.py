@@ -0,0 +1,120 @@
+"""
+Rules cache.
+Keeps fetched rules in memory for the lifetime of a warm instance and only
+reloads them when the rules table reports a new version.
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger("rules_engine")
+
+
+class _Entry:
+    """Cached rules for one table."""
+
+    def __init__(self, rules, version, checked_at):
+        """
+        Initialize a cache entry.
+
+        Args:
+            rules (list): Cached Rule objects
+            version: Version the rules were loaded at
+            checked_at (float): Monotonic time the version was last confirmed
+        """
+        self.rules = rules
+        self.version = version
+        self.checked_at = checked_at
+
+
+class RulesCache:
+    """
+    TTL cache with change detection for rule definitions.
+
+    Within the TTL cached rules are served without any BigQuery call. Once it
+    expires, only the (cheap) version is fetched; the rules themselves are
+    reloaded only if the version changed. If the refresh fails, the last
+    rules loaded are served instead.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        """
+        Initialize the cache.
+
+        Args:
+            clock (callable, optional): Monotonic time source in seconds
+        """
+        self.clock = clock
+        self.hits = 0
+        self.reloads = 0
+        self.stale_serves = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, load, version, ttl):
+        """
+        Return the rules for a table, refreshing them if needed.
+
+        Args:
+            key (str): Identifier of the rules table
+            load (callable): Returns the list of rules from BigQuery
+            version (callable): Returns the current version of the rules table
+            ttl (float): Seconds a confirmed version is trusted without checking
+
+        Returns:
+            tuple: The list of rules and the version they were loaded at
+
+        Raises:
+            Exception: Whatever ``load`` or ``version`` raised, if nothing is cached
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            now = self.clock()
+            if entry is not None and now - entry.checked_at < ttl:
+                self.hits += 1
+                return list(entry.rules), entry.version
+
+            try:
+                current = version()
+                if entry is not None and current == entry.version:
+                    entry.checked_at = now
+                    self.hits += 1
+                    return list(entry.rules), entry.version
+
+                rules = load()
+                self._entries[key] = _Entry(rules, current, now)
+                self.reloads += 1
+                logger.info(f"Loaded {len(rules)} rules from {key} at version {current}")
+                return list(rules), current
+
+            except Exception as e:
+                if entry is None:
+                    raise
+                # Back off for another TTL rather than retrying on every event
+                entry.checked_at = now
+                self.stale_serves += 1
+                logger.warning(f"Refreshing rules from {key} failed, serving cached rules: {str(e)}")
+                return list(entry.rules), entry.version
+
+    def info(self):
+        """
+        Cache statistics.
+
+        Returns:
+            dict: Hits, reloads and stale serves
+        """
+        with self._lock:
+            return {"hits": self.hits, "reloads": self.reloads, "stale_serves": self.stale_serves}
+
+    def clear(self):
+        """Drop all cached rules and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.reloads = 0
+            self.stale_serves = 0
+
+
+# Module level so cached rules survive between invocations on a warm instance
+rules_cache = RulesCache()
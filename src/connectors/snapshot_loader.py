@@ -0,0 +1,268 @@
+"""
+Rules snapshot loader.
+Loads a rules snapshot from local disk or GCS when an instance starts and
+picks up newer snapshots in the background while it stays warm.
+"""
+
+import logging
+import os
+import threading
+import time
+
+from rules_engine.models.rules_snapshot import RulesSnapshot
+
+logger = logging.getLogger("rules_engine")
+
+
+class LocalSnapshotSource:
+    """Snapshot stored in a local file, e.g. deployed with the function source."""
+
+    def __init__(self, path):
+        """
+        Initialize the source.
+
+        Args:
+            path (str): Path of the snapshot file
+        """
+        self.path = path
+
+    def fetch(self, marker=None):
+        """
+        Read the snapshot if the file changed.
+
+        Args:
+            marker (tuple, optional): Marker returned by the previous fetch
+
+        Returns:
+            tuple: The snapshot bytes and a new marker, or None if unchanged
+        """
+        stat = os.stat(self.path)
+        current = (stat.st_mtime_ns, stat.st_size)
+        if current == marker:
+            return None
+        with open(self.path, "rb") as handle:
+            return handle.read(), current
+
+    def write(self, data):
+        """
+        Replace the snapshot file atomically.
+
+        Args:
+            data (bytes): Serialized snapshot
+        """
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "wb") as handle:
+            handle.write(data)
+        os.replace(temporary, self.path)
+
+    def __repr__(self):
+        """String representation of the source."""
+        return self.path
+
+
+class GCSSnapshotSource:
+    """Snapshot stored as a GCS object."""
+
+    def __init__(self, client, bucket_name, blob_name):
+        """
+        Initialize the source.
+
+        Args:
+            client (storage.Client): Storage client
+            bucket_name (str): Name of the GCS bucket
+            blob_name (str): Path to the snapshot within the bucket
+        """
+        self.client = client
+        self.bucket_name = bucket_name
+        self.blob_name = blob_name
+
+    def fetch(self, marker=None):
+        """
+        Download the snapshot if the object has a new generation.
+
+        Args:
+            marker (int, optional): Generation returned by the previous fetch
+
+        Returns:
+            tuple: The snapshot bytes and its generation, or None if unchanged
+
+        Raises:
+            FileNotFoundError: If the object does not exist
+        """
+        blob = self.client.bucket(self.bucket_name).get_blob(self.blob_name)
+        if blob is None:
+            raise FileNotFoundError(f"gs://{self.bucket_name}/{self.blob_name} not found")
+        if blob.generation == marker:
+            return None
+        return blob.download_as_bytes(if_generation_match=blob.generation), blob.generation
+
+    def write(self, data):
+        """
+        Upload the snapshot.
+
+        Args:
+            data (bytes): Serialized snapshot
+        """
+        blob = self.client.bucket(self.bucket_name).blob(self.blob_name)
+        blob.upload_from_string(data, content_type="application/json")
+
+    def __repr__(self):
+        """String representation of the source."""
+        return f"gs://{self.bucket_name}/{self.blob_name}"
+
+
+def open_source(uri, storage_client=None):
+    """
+    Create the snapshot source for a URI.
+
+    Args:
+        uri (str): ``gs://bucket/path`` or a local file path
+        storage_client (storage.Client, optional): Client for GCS URIs
+
+    Returns:
+        LocalSnapshotSource or GCSSnapshotSource: The source
+
+    Raises:
+        ValueError: If a GCS URI has no object name or no client is given
+    """
+    if not uri.startswith("gs://"):
+        return LocalSnapshotSource(uri)
+    bucket_name, _, blob_name = uri[len("gs://"):].partition("/")
+    if not bucket_name or not blob_name:
+        raise ValueError(f"Invalid snapshot URI: {uri}")
+    if storage_client is None:
+        raise ValueError("A storage client is required for GCS snapshots")
+    return GCSSnapshotSource(storage_client, bucket_name, blob_name)
+
+
+class SnapshotLoader:
+    """
+    Keeps the current rules snapshot of a warm instance.
+
+    The first call to ``current`` loads the snapshot synchronously. Later calls
+    return immediately and, at most once per check interval, start a
+    background thread that swaps in a newer snapshot if one was published.
+    """
+
+    def __init__(self, source, check_interval=60, clock=time.monotonic):
+        """
+        Initialize the loader.
+
+        Args:
+            source (LocalSnapshotSource or GCSSnapshotSource): Where the snapshot is read from
+            check_interval (float, optional): Minimum seconds between checks
+                for a newer snapshot
+            clock (callable, optional): Monotonic time source in seconds
+        """
+        self.source = source
+        self.check_interval = check_interval
+        self.clock = clock
+        self._snapshot = None
+        self._marker = None
+        self._checked_at = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def current(self):
+        """
+        Return the current snapshot.
+
+        Returns:
+            RulesSnapshot: The most recent snapshot loaded
+
+        Raises:
+            Exception: If no snapshot has been loaded yet and loading fails
+        """
+        with self._lock:
+            if self._snapshot is None:
+                self._apply(self._fetch())
+            elif self._check_due():
+                self._thread = threading.Thread(target=self.refresh, name="rules-snapshot-check", daemon=True)
+                self._thread.start()
+            return self._snapshot
+
+    def refresh(self):
+        """
+        Load the snapshot now if it changed, keeping the current one on errors.
+
+        Returns:
+            bool: Whether a new snapshot was applied
+        """
+        try:
+            fetched = self._fetch()
+            with self._lock:
+                return self._apply(fetched)
+        except Exception as e:
+            logger.warning(f"Checking for a newer rules snapshot at {self.source} failed: {str(e)}")
+            return False
+
+    def wait(self, timeout=None):
+        """
+        Wait for a background check to finish.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait
+        """
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _check_due(self):
+        """Whether a background check should start. Must be called with the lock held."""
+        if self._thread is not None and self._thread.is_alive():
+            return False
+        return self.clock() - self._checked_at >= self.check_interval
+
+    def _fetch(self):
+        """Fetch and parse the snapshot if it changed since the last fetch."""
+        self._checked_at = self.clock()
+        fetched = self.source.fetch(self._marker)
+        if fetched is None:
+            return None
+        data, marker = fetched
+        return RulesSnapshot.from_bytes(data), marker
+
+    def _apply(self, fetched):
+        """Swap in a fetched snapshot. Must be called with the lock held."""
+        if fetched is None:
+            return False
+
+        snapshot, marker = fetched
+        self._marker = marker
+        if self._snapshot is not None and snapshot.version == self._snapshot.version:
+            return False
+
+        self._snapshot = snapshot
+        logger.info(f"Loaded rules snapshot {snapshot.version} with {len(snapshot)} rules from {self.source}")
+        return True
+
+
+_lock = threading.Lock()
+_loaders = {}
+
+
+def get_loader(uri, storage_client=None, check_interval=60):
+    """
+    Return the process-wide loader for a snapshot URI, creating it on first use.
+
+    Args:
+        uri (str): ``gs://bucket/path`` or a local file path
+        storage_client (storage.Client, optional): Client for GCS URIs
+        check_interval (float, optional): Minimum seconds between checks for
+            a newer snapshot
+
+    Returns:
+        SnapshotLoader: Shared loader
+    """
+    with _lock:
+        loader = _loaders.get(uri)
+        if loader is None:
+            loader = SnapshotLoader(open_source(uri, storage_client), check_interval)
+            _loaders[uri] = loader
+        return loader
+
+
+def reset_loaders():
+    """Drop the shared loaders, e.g. in tests."""
+    with _lock:
+        _loaders.clear()
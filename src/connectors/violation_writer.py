@@ -0,0 +1,160 @@
+"""
+Background violation writer.
+Writes violation batches to BigQuery on a separate thread, so network writes
+overlap with the evaluation of later rules and chunks.
+"""
+
+import logging
+import queue
+import threading
+
+from rules_engine.config import settings
+
+logger = logging.getLogger("rules_engine")
+
+_STOP = object()
+
+
+class ViolationWriter:
+    """
+    Writes violation batches through a BigQueryConnector on a background thread.
+
+    Batches are handed over through a bounded queue: when the writer falls
+    behind, ``submit`` blocks until there is room again, so at most
+    ``max_pending`` unwritten submissions are held in memory.
+
+    Submissions are serialized as they arrive, which releases the dataframes
+    of lazy batches, and buffered until ``flush_rows`` violations or
+    ``flush_bytes`` bytes of details are pending, so many small per-rule,
+    per-chunk batches are written together and large volumes reach the load
+    job path. Use it as a context manager to guarantee everything is written
+    before returning.
+    """
+
+    def __init__(self, bq, max_pending=4, source=None, flush_rows=None, flush_bytes=None):
+        """
+        Initialize the writer and start its thread.
+
+        Args:
+            bq (BigQueryConnector): Connector used to write the violations
+            max_pending (int, optional): Maximum submissions waiting to be
+                written. 0 writes synchronously in ``submit`` instead.
+            source (str, optional): Identifier of the object version the
+                violations come from, passed on to ``log_violations``
+            flush_rows (int, optional): Buffered violations that trigger a
+                write. Defaults to RULES_ENGINE_LOAD_JOB_THRESHOLD_ROWS.
+            flush_bytes (int, optional): Buffered bytes of details that
+                trigger a write. Defaults to RULES_ENGINE_WRITE_BUFFER_BYTES.
+        """
+        self.bq = bq
+        self.max_pending = max_pending
+        self.source = source
+        self.flush_rows = settings.LOAD_JOB_THRESHOLD_ROWS if flush_rows is None else flush_rows
+        self.flush_bytes = settings.WRITE_BUFFER_BYTES if flush_bytes is None else flush_bytes
+        self.written = 0
+        self._buffer = []
+        self._buffered_rows = 0
+        self._buffered_bytes = 0
+        self._error = None
+        self._queue = None
+        self._thread = None
+        if max_pending > 0:
+            self._queue = queue.Queue(maxsize=max_pending)
+            self._thread = threading.Thread(target=self._run, name="violation-writer", daemon=True)
+            self._thread.start()
+
+    def submit(self, violations):
+        """
+        Queue violation batches for writing, blocking while the queue is full.
+
+        Args:
+            violations (list): List of ViolationBatch objects
+
+        Raises:
+            Exception: The error of an earlier failed write
+        """
+        self._raise_error()
+        if self._queue is None:
+            self._add(violations)
+            self._raise_error()
+        else:
+            self._queue.put(violations)
+
+    def close(self, raise_errors=True):
+        """
+        Write everything still queued or buffered and stop the thread.
+
+        Args:
+            raise_errors (bool, optional): Raise the error of a failed write
+
+        Raises:
+            Exception: The first error raised while writing
+        """
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+        else:
+            self._flush()
+        if raise_errors:
+            self._raise_error()
+
+    def __enter__(self):
+        """Return the writer."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Flush the writer, without masking an exception raised in the block."""
+        self.close(raise_errors=exc_type is None)
+        return False
+
+    def _run(self):
+        """Write queued submissions until stopped."""
+        while True:
+            violations = self._queue.get()
+            if violations is _STOP:
+                self._flush()
+                return
+            self._add(violations)
+
+    def _add(self, violations):
+        """Buffer one submission, writing the buffer once it is full, remembering the first error."""
+        if self._error is not None:
+            # Writes already failed; the invocation will fail, so skip the rest
+            return
+        columns = settings.DETAIL_COLUMNS or None
+        try:
+            for batch in violations:
+                if len(batch) == 0:
+                    continue
+                batch = batch.compact(columns)
+                self._buffer.append(batch)
+                self._buffered_rows += len(batch)
+                self._buffered_bytes += sum(len(detail) for detail in batch.serialize(columns))
+        except Exception as e:
+            # The thread keeps draining the queue, so submit and close cannot block on it
+            logger.error(f"Error serializing violations: {str(e)}")
+            self._error = e
+            return
+        if self._buffered_rows >= self.flush_rows or self._buffered_bytes >= self.flush_bytes:
+            self._flush()
+
+    def _flush(self):
+        """Write the buffered batches in one call, remembering the first error."""
+        violations = self._buffer
+        self._buffer = []
+        self._buffered_rows = 0
+        self._buffered_bytes = 0
+        if not violations or self._error is not None:
+            return
+        try:
+            self.bq.log_violations(violations, self.source)
+            self.written += sum(len(batch) for batch in violations)
+        except Exception as e:
+            logger.error(f"Error writing violations: {str(e)}")
+            self._error = e
+
+    def _raise_error(self):
+        """Raise the first write error, if any."""
+        if self._error is not None:
+            raise self._error
@@ -0,0 +1,204 @@
+"""
+Rule query compiler.
+Turns rule queries into compiled plans and keeps them in a process-wide LRU
+cache, so warm Cloud Function instances never parse the same query twice.
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+from rules_engine.models.expression import UnsupportedExpression, columns, parse
+from rules_engine.models.sql_predicate import parse_sql
+
+DEFAULT_CACHE_SIZE = 1024
+
+# Bump whenever the parsers or the expression format change, so plans
+# precompiled into rules snapshots are recompiled instead of trusted
+COMPILER_VERSION = 2
+
+# Keywords, in any case, whose SQL meaning differs from pandas' for NULLs;
+# queries using them are read as SQL first
+_SQL_NULL_SYNTAX = re.compile(r"\b(NOT|IN|IS|NULL|LIKE|BETWEEN)\b", re.IGNORECASE)
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+
+
+class CompiledPlan:
+    """The compiled form of a single rule query."""
+
+    def __init__(self, query, expression, dialect=None, error=None):
+        """
+        Initialize a compiled plan.
+
+        Args:
+            query (str): The rule query the plan was compiled from
+            expression (tuple): Parsed expression, or None if the query is not
+                natively supported
+            dialect (str, optional): ``"pandas"`` or ``"sql"``, the syntax the
+                query was parsed as
+            error (str, optional): Why the query could not be compiled
+        """
+        self.query = query
+        self.expression = expression
+        self.dialect = dialect
+        self.error = error
+        self.columns = frozenset(columns(expression)) if expression is not None else None
+
+    @property
+    def is_native(self):
+        """Whether the plan can be evaluated without DataFrame.eval."""
+        return self.expression is not None
+
+    def __repr__(self):
+        """String representation of the plan."""
+        return f"CompiledPlan({self.query!r}, dialect={self.dialect})"
+
+
+def compile_plan(query):
+    """
+    Compile a rule query without consulting the cache.
+
+    Queries are first read as ``DataFrame.query`` syntax, which keeps existing
+    rules behaving exactly as before, then as a BigQuery-style SQL predicate.
+    Queries using ``NOT``, ``IN``, ``IS``, ``NULL``, ``LIKE`` or ``BETWEEN``
+    in any case are read as SQL first, so lowercase SQL keeps SQL's NULL
+    semantics instead of pandas'.
+
+    Args:
+        query (str): Rule query
+
+    Returns:
+        CompiledPlan: The compiled plan; a failed, non-native plan for a
+        missing or blank query
+    """
+    if query is None or not str(query).strip():
+        return CompiledPlan(query, None, error="Rule query is empty")
+
+    parsers = [(parse, "pandas"), (parse_sql, "sql")]
+    if _SQL_NULL_SYNTAX.search(_STRING_LITERAL.sub("''", query)):
+        parsers.reverse()
+
+    errors = {}
+    for parser, dialect in parsers:
+        try:
+            return CompiledPlan(query, parser(query), dialect)
+        except UnsupportedExpression as e:
+            errors[dialect] = str(e)
+    return CompiledPlan(query, None, error=errors["sql"])
+
+
+class PlanCache:
+    """Thread-safe LRU cache of compiled plans keyed by a hash of the query text."""
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize (int, optional): Maximum number of plans to keep
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(query):
+        """
+        Cache key for a rule query.
+
+        Args:
+            query (str): Rule query, or None
+
+        Returns:
+            str: SHA-256 hex digest of the query text
+        """
+        return hashlib.sha256((query or "").encode("utf-8")).hexdigest()
+
+    def compile(self, query):
+        """
+        Return the compiled plan for a query, compiling it on a cache miss.
+
+        Args:
+            query (str): Rule query
+
+        Returns:
+            CompiledPlan: The compiled plan
+        """
+        key = self.key(query)
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                self.hits += 1
+                return plan
+            self.misses += 1
+
+        plan = compile_plan(query)
+
+        with self._lock:
+            self._plans[key] = plan
+            self._plans.move_to_end(key)
+            while len(self._plans) > self.maxsize:
+                self._plans.popitem(last=False)
+        return plan
+
+    def info(self):
+        """
+        Cache statistics.
+
+        Returns:
+            dict: Hits, misses, current size and maximum size
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._plans),
+                "maxsize": self.maxsize,
+            }
+
+    def clear(self):
+        """Remove all plans and reset the counters."""
+        with self._lock:
+            self._plans.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        """Number of cached plans."""
+        return len(self._plans)
+
+
+# Module level so the cache survives between invocations on a warm instance
+_plan_cache = PlanCache()
+
+
+def compile_query(query):
+    """
+    Compile a rule query using the process-wide plan cache.
+
+    Args:
+        query (str): Rule query
+
+    Returns:
+        CompiledPlan: The compiled plan
+    """
+    return _plan_cache.compile(query)
+
+
+def cache_info():
+    """
+    Statistics of the process-wide plan cache.
+
+    Returns:
+        dict: Hits, misses, current size and maximum size
+    """
+    return _plan_cache.info()
+
+
+def clear_cache():
+    """Empty the process-wide plan cache and reset its counters."""
+    _plan_cache.clear()
@@ -0,0 +1,439 @@
+"""
+Rule expressions.
+Parses rule queries into a small expression tree and evaluates the tree
+against a dataframe, sharing column loads and repeated subexpressions.
+"""
+
+import ast
+import io
+import operator
+import threading
+import tokenize
+
+import numpy as np
+import pandas as pd
+
+COMPARISONS = {
+    ast.Eq: "==",
+    ast.NotEq: "!=",
+    ast.Lt: "<",
+    ast.LtE: "<=",
+    ast.Gt: ">",
+    ast.GtE: ">=",
+}
+
+ARITHMETIC = {
+    ast.Add: "+",
+    ast.Sub: "-",
+    ast.Mult: "*",
+    ast.Div: "/",
+    ast.FloorDiv: "//",
+    ast.Mod: "%",
+    ast.Pow: "**",
+}
+
+OPERATORS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "//": operator.floordiv,
+    "%": operator.mod,
+    "**": operator.pow,
+}
+
+
+class UnsupportedExpression(ValueError):
+    """Raised when a rule query uses syntax the expression parser does not handle."""
+
+
+def parse(query):
+    """
+    Parse a rule query written in ``DataFrame.query`` syntax.
+
+    Expressions are nested tuples, so identical subexpressions compare and
+    hash equal and can be shared between rules. The operands of ``and`` and
+    ``or`` are sorted to give commuted forms the same key.
+
+    Args:
+        query (str): Rule query, e.g. ``"amount < 0 and status == 'NEW'"``
+
+    Returns:
+        tuple: The parsed expression
+
+    Raises:
+        UnsupportedExpression: If the query uses unsupported syntax
+    """
+    if "`" in query or "@" in query:
+        raise UnsupportedExpression(f"Unsupported syntax in query: {query}")
+
+    try:
+        tree = ast.parse(_replace_booleans(query).strip(), mode="eval")
+    except (SyntaxError, tokenize.TokenError) as e:
+        raise UnsupportedExpression(f"Cannot parse query {query!r}: {e}")
+
+    return _convert(tree.body)
+
+
+def _replace_booleans(query):
+    """Give ``&`` and ``|`` the precedence of ``and``/``or``, as pandas does."""
+    tokens = []
+    for token in tokenize.generate_tokens(io.StringIO(query).readline):
+        if token.type == tokenize.OP and token.string == "&":
+            tokens.append((tokenize.NAME, "and"))
+        elif token.type == tokenize.OP and token.string == "|":
+            tokens.append((tokenize.NAME, "or"))
+        else:
+            tokens.append((token.type, token.string))
+    return tokenize.untokenize(tokens)
+
+
+def logical(kind, operands):
+    """
+    Build a flattened, canonically ordered ``and``/``or`` node.
+
+    Args:
+        kind (str): ``"and"`` or ``"or"``
+        operands (list): Operand expressions
+
+    Returns:
+        tuple: The combined expression
+    """
+    flat = []
+    for operand in operands:
+        if operand[0] == kind:
+            flat.extend(operand[1])
+        else:
+            flat.append(operand)
+    unique = sorted(set(flat), key=repr)
+    if len(unique) == 1:
+        return unique[0]
+    return (kind, tuple(unique))
+
+
+def _convert(node):
+    """Convert a Python AST node into an expression tuple."""
+    if isinstance(node, ast.BoolOp):
+        kind = "and" if isinstance(node.op, ast.And) else "or"
+        return logical(kind, [_convert(value) for value in node.values])
+
+    if isinstance(node, ast.UnaryOp):
+        operand = _convert(node.operand)
+        if isinstance(node.op, (ast.Not, ast.Invert)):
+            return ("not", operand)
+        if isinstance(node.op, ast.USub):
+            if operand[0] == "literal":
+                return ("literal", -operand[1])
+            return ("arith", "*", ("literal", -1), operand)
+        if isinstance(node.op, ast.UAdd):
+            return operand
+
+    if isinstance(node, ast.Compare):
+        comparisons = []
+        left = _convert(node.left)
+        for op, comparator in zip(node.ops, node.comparators):
+            right = _convert(comparator)
+            comparisons.append(_compare(op, left, right))
+            left = right
+        return logical("and", comparisons)
+
+    if isinstance(node, ast.BinOp) and type(node.op) in ARITHMETIC:
+        return ("arith", ARITHMETIC[type(node.op)], _convert(node.left), _convert(node.right))
+
+    if isinstance(node, ast.Name):
+        return ("column", node.id)
+
+    if isinstance(node, ast.Constant):
+        return ("literal", node.value)
+
+    if isinstance(node, (ast.List, ast.Tuple)):
+        values = [_convert(element) for element in node.elts]
+        if any(value[0] != "literal" for value in values):
+            raise UnsupportedExpression("List elements must be literals")
+        return ("literal", tuple(value[1] for value in values))
+
+    raise UnsupportedExpression(f"Unsupported expression: {ast.dump(node)}")
+
+
+def _compare(op, left, right):
+    """Build the node for a single comparison."""
+    if isinstance(op, (ast.In, ast.NotIn)):
+        if right[0] != "literal" or not isinstance(right[1], tuple):
+            raise UnsupportedExpression("'in' requires a list of literals")
+        node = ("isin", left, right[1])
+        return ("not", node) if isinstance(op, ast.NotIn) else node
+
+    if type(op) not in COMPARISONS:
+        raise UnsupportedExpression(f"Unsupported comparison: {type(op).__name__}")
+    symbol = COMPARISONS[type(op)]
+
+    # pandas treats ``column == [a, b]`` as a membership test
+    if symbol in ("==", "!=") and right[0] == "literal" and isinstance(right[1], tuple):
+        node = ("isin", left, right[1])
+        return ("not", node) if symbol == "!=" else node
+
+    return ("compare", symbol, left, right)
+
+
+def columns(expression):
+    """
+    Collect the column names an expression reads.
+
+    Args:
+        expression (tuple): Parsed expression
+
+    Returns:
+        set: Referenced column names
+    """
+    kind = expression[0]
+    if kind == "column":
+        return {expression[1]}
+    if kind == "literal":
+        return set()
+    if kind in ("and", "or"):
+        operands = expression[1]
+    elif kind in ("compare", "sql_compare", "arith"):
+        operands = expression[2:]
+    else:
+        operands = expression[1:2]
+    return set().union(*(columns(operand) for operand in operands))
+
+
+class Truth:
+    """
+    Result of a predicate under SQL three-valued logic.
+
+    Rows are true, false or unknown (NULL); ``true`` and ``null`` are boolean
+    arrays and rows in neither are false. Predicates without unknown rows are
+    represented by a plain boolean array instead.
+    """
+
+    __slots__ = ("true", "null")
+
+    def __init__(self, true, null):
+        """
+        Initialize a three-valued result.
+
+        Args:
+            true (np.ndarray): Rows where the predicate is true
+            null (np.ndarray): Rows where the predicate is unknown
+        """
+        self.true = true
+        self.null = null
+
+
+class Evaluator:
+    """
+    Evaluates expressions against one dataframe.
+
+    Every column and every distinct subexpression is computed at most once,
+    so rules that share columns or conditions reuse each other's work.
+    Logical operators follow SQL three-valued logic; pandas-style comparisons
+    never produce unknown rows, so they behave exactly as in DataFrame.query.
+    """
+
+    def __init__(self, dataframe, concurrent=False):
+        """
+        Initialize the evaluator.
+
+        Args:
+            dataframe (pd.DataFrame): Data the expressions are evaluated on
+            concurrent (bool, optional): Whether several threads evaluate
+                expressions at once. Each subexpression is then computed by
+                one thread while the others wait for its result.
+        """
+        self.dataframe = dataframe
+        self._results = {}
+        self._locks = {} if concurrent else None
+        self._locks_lock = threading.Lock()
+
+    def mask(self, expression):
+        """
+        Evaluate a boolean expression to a row mask.
+
+        Rows where a SQL predicate is unknown are not part of the mask.
+
+        Args:
+            expression (tuple): Parsed expression
+
+        Returns:
+            np.ndarray: Boolean array with one entry per row
+        """
+        return self._as_mask(self.evaluate(expression))
+
+    def evaluate(self, expression):
+        """
+        Evaluate an expression, reusing earlier results.
+
+        Args:
+            expression (tuple): Parsed expression
+
+        Returns:
+            The value of the expression: a mask, a Truth, a Series or a scalar
+        """
+        try:
+            return self._results[expression]
+        except KeyError:
+            pass
+
+        if self._locks is None:
+            result = self._compute(expression)
+            self._results[expression] = result
+            return result
+
+        # Locks are taken from an expression down to its operands, never the
+        # other way round, so threads cannot wait on each other in a cycle
+        with self._locks_lock:
+            lock = self._locks.setdefault(expression, threading.Lock())
+        with lock:
+            if expression not in self._results:
+                self._results[expression] = self._compute(expression)
+        return self._results[expression]
+
+    def _compute(self, expression):
+        """Compute a single expression node."""
+        kind = expression[0]
+
+        if kind == "column":
+            return self.dataframe[expression[1]]
+
+        if kind == "literal":
+            return expression[1]
+
+        if kind == "compare":
+            _, symbol, left, right = expression
+            result = OPERATORS[symbol](self.evaluate(left), self.evaluate(right))
+            return self._as_mask(result)
+
+        if kind == "isin":
+            operand = self.evaluate(expression[1])
+            if not isinstance(operand, pd.Series):
+                return self._as_mask(operand in expression[2])
+            return self._as_mask(operand.isin(list(expression[2])))
+
+        if kind == "arith":
+            _, symbol, left, right = expression
+            return OPERATORS[symbol](self.evaluate(left), self.evaluate(right))
+
+        if kind == "sql_compare":
+            _, symbol, left, right = expression
+            left, right = self.evaluate(left), self.evaluate(right)
+            if left is None or right is None:
+                return self._truth_result(self._full(False), self._full(True))
+            null = self._or_null(self._nulls(left), self._nulls(right))
+            true = self._as_mask(OPERATORS[symbol](left, right))
+            if null is not None:
+                true = true & ~null
+            return self._truth_result(true, null)
+
+        if kind == "sql_in":
+            operand = self.evaluate(expression[1])
+            values = [value for value in expression[2] if value is not None]
+            if operand is None:
+                return self._truth_result(self._full(False), self._full(True))
+            if isinstance(operand, pd.Series):
+                true = self._as_mask(operand.isin(values))
+            else:
+                true = self._full(operand in values)
+            null = self._nulls(operand)
+            if len(values) < len(expression[2]):
+                # x IN (..., NULL) is unknown rather than false when nothing matches
+                null = ~true if null is None else null | ~true
+            return self._truth_result(true, null)
+
+        if kind == "is_null":
+            operand = self.evaluate(expression[1])
+            null = self._nulls(operand)
+            if not isinstance(operand, pd.Series):
+                return self._full(operand is None)
+            return null if null is not None else self._full(False)
+
+        if kind == "like":
+            operand = self.evaluate(expression[1])
+            if not isinstance(operand, pd.Series):
+                operand = pd.Series([operand] * len(self.dataframe), index=self.dataframe.index)
+            matches = operand.astype("string").str.fullmatch(expression[2])
+            return self._truth_result(self._as_mask(matches), self._nulls(operand))
+
+        if kind == "not":
+            true, null = self._truth(self.evaluate(expression[1]))
+            if null is None:
+                return ~true
+            return self._truth_result(~true & ~null, null)
+
+        if kind == "and":
+            parts = [self._truth(self.evaluate(operand)) for operand in expression[1]]
+            true = np.logical_and.reduce([part[0] for part in parts])
+            if all(part[1] is None for part in parts):
+                return true
+            false = np.logical_or.reduce([
+                ~part[0] if part[1] is None else ~part[0] & ~part[1] for part in parts
+            ])
+            return self._truth_result(true, ~true & ~false)
+
+        if kind == "or":
+            parts = [self._truth(self.evaluate(operand)) for operand in expression[1]]
+            true = np.logical_or.reduce([part[0] for part in parts])
+            nulls = [part[1] for part in parts if part[1] is not None]
+            if not nulls:
+                return true
+            return self._truth_result(true, ~true & np.logical_or.reduce(nulls))
+
+        raise UnsupportedExpression(f"Unknown expression kind: {kind}")
+
+    def _full(self, value):
+        """Boolean array with the same value for every row."""
+        return np.full(len(self.dataframe), bool(value))
+
+    def _nulls(self, value):
+        """Mask of the NULL rows of a value, or None if it has none."""
+        if isinstance(value, pd.Series):
+            null = value.isna().to_numpy()
+            return null if null.any() else None
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            return self._full(True)
+        return None
+
+    @staticmethod
+    def _or_null(left, right):
+        """Combine two optional NULL masks."""
+        if left is None:
+            return right
+        if right is None:
+            return left
+        return left | right
+
+    @staticmethod
+    def _truth_result(true, null):
+        """Wrap a predicate result, dropping the NULL mask when it is empty."""
+        if null is None or not null.any():
+            return true
+        return Truth(true, null)
+
+    def _truth(self, value):
+        """Split a predicate result into its true and NULL masks."""
+        if isinstance(value, Truth):
+            return value.true, value.null
+        if isinstance(value, pd.Series):
+            return self._as_mask(value), self._nulls(value)
+        if value is None:
+            return self._full(False), self._full(True)
+        return self._as_mask(value), None
+
+    def _as_mask(self, value):
+        """Convert a comparison result to a boolean NumPy array."""
+        if isinstance(value, np.ndarray) and value.dtype == bool:
+            return value
+        if isinstance(value, Truth):
+            return value.true
+        if isinstance(value, pd.Series):
+            return value.to_numpy(dtype=bool, na_value=False)
+        if np.ndim(value) == 0:
+            return self._full(value)
+        return np.asarray(value, dtype=bool)
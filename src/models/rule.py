@@ -0,0 +1,129 @@
+"""
+Rule model.
+Represents a business rule that can be applied to data.
+"""
+
+import logging
+
+import numpy as np
+
+from rules_engine.models.compiler import compile_query
+from rules_engine.models.expression import Evaluator
+from rules_engine.models.violation_batch import ViolationBatch
+
+logger = logging.getLogger("rules_engine")
+
+
+class Rule:
+    """Rule class representing a business rule that can be applied to data."""
+
+    def __init__(self, rule_number, rule_description, rule_query, plan=None, output_mode=None, sample_size=None):
+        """
+        Initialize a rule.
+
+        Args:
+            rule_number (str): Unique identifier for the rule
+            rule_description (str): Human-readable description of what the rule checks
+            rule_query (str): SQL-like query that identifies violations
+            plan (CompiledPlan, optional): Plan already compiled for ``rule_query``,
+                e.g. loaded from a rules snapshot
+            output_mode (str, optional): Violations written for the rule, one of
+                OUTPUT_MODES in rules_engine.models.rule_output. Defaults to "all".
+            sample_size (int, optional): Rows kept by the "first" and "sample"
+                output modes
+        """
+        self.rule_number = rule_number
+        self.rule_description = rule_description
+        self.rule_query = rule_query
+        self.output_mode = (output_mode or "all").strip().lower()
+        self.sample_size = int(sample_size) if sample_size is not None else None
+        self._plan = plan
+
+    @property
+    def plan(self):
+        """The compiled plan for the rule query, from the process-wide plan cache."""
+        if self._plan is None:
+            self._plan = compile_query(self.rule_query)
+        return self._plan
+
+    @property
+    def expression(self):
+        """
+        The parsed rule query, or None if it cannot be parsed natively.
+
+        Queries the expression parser does not understand are still evaluated
+        through ``DataFrame.eval``.
+        """
+        return self.plan.expression
+
+    @property
+    def is_empty(self):
+        """Whether the rule has a missing or blank query, e.g. a NULL in the rules table."""
+        return self.rule_query is None or not str(self.rule_query).strip()
+
+    def evaluate(self, dataframe, evaluator=None):
+        """
+        Compute which rows of a dataframe violate the rule.
+
+        Args:
+            dataframe (pd.DataFrame): Data to check for rule violations
+            evaluator (Evaluator, optional): Evaluator shared with other rules
+                so column loads and common subexpressions are reused
+
+        Returns:
+            np.ndarray: Boolean mask of the violating rows
+
+        Raises:
+            ValueError: If the rule has no query
+        """
+        if self.is_empty:
+            raise ValueError(f"Rule {self.rule_number} has no query")
+
+        if self.expression is None:
+            mask = dataframe.eval(self.rule_query)
+            return mask.to_numpy(dtype=bool, na_value=False)
+
+        if evaluator is None:
+            evaluator = Evaluator(dataframe)
+        return evaluator.mask(self.expression)
+
+    def violations(self, dataframe, mask, row_offset=0):
+        """
+        Build the violation batch for a precomputed mask.
+
+        Args:
+            dataframe (pd.DataFrame): Data the mask was computed on
+            mask (np.ndarray): Boolean mask of the violating rows
+            row_offset (int, optional): Row number of the first row of the
+                dataframe within the whole file, for chunked reads
+
+        Returns:
+            ViolationBatch: The violations found; their details are serialized
+            in a single pass when first needed
+        """
+        positions = np.flatnonzero(mask)
+        if len(positions) == 0:
+            return ViolationBatch.empty(self.rule_number, self.rule_description)
+
+        return ViolationBatch.lazy(self.rule_number, self.rule_description, dataframe, positions, row_offset)
+
+    def apply(self, dataframe):
+        """
+        Apply the rule to a dataframe.
+
+        Args:
+            dataframe (pd.DataFrame): Data to check for rule violations
+
+        Returns:
+            ViolationBatch: The violations found, serialized in a single pass
+        """
+        try:
+            return self.violations(dataframe, self.evaluate(dataframe))
+
+        except Exception as e:
+            logger.error(f"Error applying rule {self.rule_number}: {str(e)}")
+            return ViolationBatch.empty(self.rule_number, self.rule_description)
+
+    def __repr__(self):
+        """String representation of the rule."""
+        return f"Rule({self.rule_number}: {self.rule_description})"
@@ -0,0 +1,190 @@
+"""
+Rule output modes.
+Decides which violations of a rule are written: all of them, only their
+count, the first K rows, or a uniform sample of K rows, in a single pass over
+the data and with memory bounded by K.
+"""
+
+import hashlib
+import logging
+
+import numpy as np
+
+from rules_engine.models.violation_batch import ViolationBatch
+
+logger = logging.getLogger("rules_engine")
+
+# "all" writes every violating row, "count" only the number of violations,
+# "first" the first sample_size rows and "sample" a uniform random sample
+OUTPUT_MODES = ("all", "count", "first", "sample")
+
+DEFAULT_SAMPLE_SIZE = 100
+
+
+def sample_seed(source, rule_number):
+    """
+    Seed for a rule's sample, so a retried event samples the same rows.
+
+    Args:
+        source (str): Identifier of the object version, or None
+        rule_number (str): Identifier of the rule
+
+    Returns:
+        int: Seed, or None for a random sample without a source
+    """
+    if source is None:
+        return None
+    digest = hashlib.sha256(f"{source}|{rule_number}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+class RuleOutput:
+    """
+    Accumulates one rule's violations across chunks according to its
+    output mode.
+
+    The count is always exact. In "first" mode rows past the first
+    ``sample_size`` are dropped without being serialized. In "sample" mode a
+    reservoir (Algorithm R) keeps ``sample_size`` rows as references into
+    their chunk's batch; only the rows still in the reservoir are serialized,
+    in ``finish``, so runs that do not write the sample encode nothing. Each
+    kept row holds on to its chunk's dataframe until then.
+    """
+
+    def __init__(self, rule, default_sample_size=DEFAULT_SAMPLE_SIZE, columns=None, seed=None):
+        """
+        Initialize the output of a rule.
+
+        Args:
+            rule (Rule): The rule
+            default_sample_size (int, optional): Rows kept when the rule does
+                not set a sample size
+            columns (iterable, optional): Columns serialized for sampled rows;
+                every column when omitted
+            seed (int, optional): Seed of the sample, see ``sample_seed``
+        """
+        self.rule_number = rule.rule_number
+        self.rule_description = rule.rule_description
+        self.mode = rule.output_mode
+        if self.mode not in OUTPUT_MODES:
+            logger.warning(f"Rule {rule.rule_number} has unknown output mode {self.mode!r}, writing all violations")
+            self.mode = "all"
+        self.sample_size = max(0, rule.sample_size if rule.sample_size is not None else default_sample_size)
+        self.columns = columns
+        self.count = 0
+        self.written = 0
+        self._rng = np.random.default_rng(seed)
+        self._rows = np.zeros(0, dtype=np.int64)
+        self._entries = []
+
+    def add(self, batch):
+        """
+        Account for the violations found in one chunk.
+
+        Args:
+            batch (ViolationBatch): The rule's violations in the chunk
+
+        Returns:
+            ViolationBatch: Violations to write now, or None
+        """
+        seen = self.count
+        self.count += len(batch)
+        if len(batch) == 0 or self.mode == "count":
+            return None
+
+        if self.mode == "all":
+            kept = batch
+        elif self.mode == "first":
+            remaining = self.sample_size - seen
+            if remaining <= 0:
+                return None
+            kept = batch.take(np.arange(min(remaining, len(batch))))
+        else:
+            self._sample(batch, seen)
+            return None
+
+        self.written += len(kept)
+        return kept
+
+    def finish(self):
+        """
+        Complete the output once every chunk was added, serializing the sample.
+
+        Only call it when the sample is going to be written.
+
+        Returns:
+            ViolationBatch: The sampled violations in row order for "sample"
+            mode, otherwise None
+        """
+        if self.mode != "sample" or len(self._rows) == 0:
+            return None
+        order = np.argsort(self._rows, kind="stable").tolist()
+        entries = [self._entries[index] for index in order]
+        self._entries = []
+
+        # One serialization per chunk batch the sampled rows come from
+        groups = {}
+        for slot, (batch, index) in enumerate(entries):
+            groups.setdefault(id(batch), (batch, [], []))
+            groups[id(batch)][1].append(index)
+            groups[id(batch)][2].append(slot)
+        details = [None] * len(entries)
+        for batch, indices, slots in groups.values():
+            for slot, detail in zip(slots, batch.take(indices).serialize(self.columns)):
+                details[slot] = detail
+
+        self.written = len(order)
+        return ViolationBatch(
+            self.rule_number, self.rule_description, self._rows[order], details, columns=self.columns
+        )
+
+    def summary(self):
+        """
+        Counts of the rule's violations.
+
+        Returns:
+            dict: Rule number and description, output mode, exact number of
+            violations and number of rows written
+        """
+        return {
+            "rule_number": self.rule_number,
+            "rule_description": self.rule_description,
+            "output_mode": self.mode,
+            "violation_count": self.count,
+            "rows_written": self.written,
+        }
+
+    def _sample(self, batch, seen):
+        """Update the reservoir with a chunk's violations."""
+        size = self.sample_size
+        if size == 0:
+            return
+
+        # Violation i (counting from 0 over the whole file) fills slot i while
+        # the reservoir is not full, and then replaces a random slot with
+        # probability size / (i + 1)
+        fill = min(max(size - seen, 0), len(batch))
+        slots = np.arange(seen, seen + fill)
+        indices = np.arange(fill)
+        if fill < len(batch):
+            rest = np.arange(fill, len(batch))
+            draws = self._rng.integers(0, seen + rest + 1)
+            chosen = draws < size
+            slots = np.concatenate([slots, draws[chosen]])
+            indices = np.concatenate([indices, rest[chosen]])
+        if len(slots) == 0:
+            return
+
+        # A later violation drawing the same slot replaces the earlier one
+        slots, last = np.unique(slots[::-1], return_index=True)
+        indices = indices[::-1][last]
+
+        # Keep only the chosen rows of the batch, still unserialized
+        chosen = batch.take(indices)
+        if len(self._rows) < size:
+            grown = min(size, seen + len(batch))
+            self._rows = np.concatenate([self._rows, np.zeros(grown - len(self._rows), dtype=np.int64)])
+            self._entries.extend([None] * (grown - len(self._entries)))
+        self._rows[slots] = chosen.row_numbers
+        for position, slot in enumerate(slots.tolist()):
+            self._entries[slot] = (chosen, position)
@@ -0,0 +1,267 @@
+"""
+Rule set model.
+Evaluates a collection of rules together in a single pass over the data.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+from rules_engine.models.expression import Evaluator
+from rules_engine.models.rules_snapshot import RulesSnapshot
+from rules_engine.models.violation_batch import ViolationBatch
+from rules_engine.models.violation_matrix import ViolationMatrix
+
+logger = logging.getLogger("rules_engine")
+
+# Frames with fewer rows are evaluated serially; below this the thread
+# handoffs cost more than the comparisons they parallelize
+DEFAULT_MIN_PARALLEL_ROWS = 50_000
+
+
+class RuleSet:
+    """A collection of rules that are compiled and evaluated together."""
+
+    def __init__(self, rules, executor=None, min_parallel_rows=DEFAULT_MIN_PARALLEL_ROWS, sharder=None):
+        """
+        Initialize the rule set and parse every rule query once.
+
+        Args:
+            rules (list): List of Rule objects
+            executor (ThreadPoolExecutor, optional): Pool rules are evaluated
+                on in parallel, e.g. from ``get_executor``; serial when None
+            min_parallel_rows (int, optional): Smallest frame evaluated on
+                the executor
+            sharder (ProcessSharder, optional): Evaluates frames of at least
+                its ``min_rows`` rows in worker processes
+        """
+        self.rules = list(rules)
+        self.executor = executor
+        self.min_parallel_rows = min_parallel_rows
+        self.sharder = sharder
+        self._version = None
+        for rule in self.rules:
+            if rule.is_empty:
+                logger.error(f"Rule {rule.rule_number} has no query and will be skipped")
+            elif rule.expression is None:
+                logger.info(
+                    f"Rule {rule.rule_number} is not natively supported, "
+                    "falling back to DataFrame.eval"
+                )
+
+    @property
+    def version(self):
+        """Hash of the rule definitions; equal for equal sets of rules."""
+        if self._version is None:
+            self._version = RulesSnapshot.content_version(self.rules)
+        return self._version
+
+    def referenced_columns(self, key_columns=()):
+        """
+        Columns the rules need, so a reader can skip every other column.
+
+        Args:
+            key_columns (iterable, optional): Columns to keep regardless of the
+                rules, e.g. identifiers that should appear in violation details
+
+        Returns:
+            set: Column names, or None if some rule falls back to
+            DataFrame.eval and may read any column
+        """
+        referenced = set(key_columns)
+        for rule in self.rules:
+            if rule.is_empty:
+                continue
+            if rule.plan.columns is None:
+                return None
+            referenced.update(rule.plan.columns)
+        return referenced
+
+    def evaluate(self, dataframe):
+        """
+        Compute the violation mask of every rule.
+
+        All rules share one evaluator, so each referenced column is loaded
+        once and each distinct subexpression is computed once, however many
+        rules use it. With an executor, rules run on its threads (NumPy
+        kernels release the GIL) and the masks are returned in rule order
+        whichever finishes first. Rules falling back to DataFrame.eval always
+        run on the calling thread.
+
+        Args:
+            dataframe (pd.DataFrame): Data to check for rule violations
+
+        Returns:
+            list: One boolean mask per rule, or None for rules that failed
+        """
+        masks = [None] * len(self.rules)
+        for index, mask in self._iter_masks(dataframe):
+            masks[index] = mask
+        return masks
+
+    def evaluate_matrix(self, dataframe):
+        """
+        Compute which rows violate which rules as a bit-packed matrix.
+
+        Each mask is packed as soon as its rule is evaluated and then
+        dropped, so at most one unpacked mask per evaluating thread is held
+        instead of one per rule. Frames large enough for the sharder are
+        evaluated in its worker processes.
+
+        Args:
+            dataframe (pd.DataFrame): Data to check for rule violations
+
+        Returns:
+            ViolationMatrix: One bit per rule per row
+        """
+        n_rows = len(dataframe)
+        bits = np.zeros((len(self.rules), (n_rows + 7) // 8), dtype=np.uint8)
+        failed = []
+        if self.sharder is not None and n_rows >= self.sharder.min_rows:
+            found = enumerate(self.sharder.positions(self, dataframe))
+            masks = ((index, None if rows is None else _positions_mask(rows, n_rows)) for index, rows in found)
+        else:
+            masks = self._iter_masks(dataframe)
+        for index, mask in masks:
+            if mask is None:
+                failed.append(self.rules[index].rule_number)
+            else:
+                bits[index] = np.packbits(mask)
+        return ViolationMatrix([rule.rule_number for rule in self.rules], bits, n_rows, failed)
+
+    def _iter_masks(self, dataframe):
+        """Yield (rule index, mask) pairs in the order the rules finish."""
+        parallel = (
+            self.executor is not None
+            and len(self.rules) > 1
+            and len(dataframe) >= self.min_parallel_rows
+        )
+        evaluator = Evaluator(dataframe, concurrent=parallel)
+        if not parallel:
+            for index, rule in enumerate(self.rules):
+                yield index, self._evaluate_rule(rule, dataframe, evaluator)
+            return
+
+        futures = {
+            self.executor.submit(self._evaluate_rule, rule, dataframe, evaluator): index
+            for index, rule in enumerate(self.rules)
+            if rule.expression is not None
+        }
+        for index, rule in enumerate(self.rules):
+            if rule.expression is None:
+                yield index, self._evaluate_rule(rule, dataframe, evaluator)
+        for future in as_completed(futures):
+            # Forget the future so its mask can be freed once consumed
+            yield futures.pop(future), future.result()
+
+    @staticmethod
+    def _evaluate_rule(rule, dataframe, evaluator):
+        """Compute one rule's mask, logging failures instead of raising them."""
+        try:
+            return rule.evaluate(dataframe, evaluator)
+        except Exception as e:
+            logger.error(f"Error applying rule {rule.rule_number}: {str(e)}")
+            return None
+
+    def apply(self, dataframe, row_offset=0):
+        """
+        Apply every rule to a dataframe.
+
+        Args:
+            dataframe (pd.DataFrame): Data to check for rule violations
+            row_offset (int, optional): Row number of the first row of the
+                dataframe within the whole file, for chunked reads
+
+        Returns:
+            list: One ViolationBatch per rule, in rule order
+        """
+        return list(self.iter_apply(dataframe, row_offset))
+
+    def iter_apply(self, dataframe, row_offset=0, matrix=None):
+        """
+        Apply every rule to a dataframe, yielding each batch once it is built.
+
+        Masks are held as a bit-packed ViolationMatrix; each rule's
+        violations are then serialized only when the next batch is requested,
+        so a consumer can write one batch while the next is being built.
+
+        Args:
+            dataframe (pd.DataFrame): Data to check for rule violations
+            row_offset (int, optional): Row number of the first row of the
+                dataframe within the whole file, for chunked reads
+            matrix (ViolationMatrix, optional): Result of
+                ``evaluate_matrix`` for this dataframe, for callers that also
+                need the matrix; computed when omitted
+
+        Yields:
+            ViolationBatch: One batch per rule, in rule order
+        """
+        if matrix is None:
+            matrix = self.evaluate_matrix(dataframe)
+        for rule, mask in zip(self.rules, matrix.masks()):
+            if rule.rule_number in matrix.failed:
+                yield ViolationBatch.empty(rule.rule_number, rule.rule_description)
+            else:
+                yield rule.violations(dataframe, mask, row_offset)
+
+    def __len__(self):
+        """Number of rules in the set."""
+        return len(self.rules)
+
+    def __iter__(self):
+        """Iterate over the rules."""
+        return iter(self.rules)
+
+    def __repr__(self):
+        """String representation of the rule set."""
+        return f"RuleSet({len(self.rules)} rules)"
+
+
+def _positions_mask(positions, n_rows):
+    """Boolean mask with the given positions set."""
+    mask = np.zeros(n_rows, dtype=bool)
+    mask[positions] = True
+    return mask
+
+
+_lock = threading.Lock()
+_executor = None
+_executor_workers = 0
+
+
+def get_executor(max_workers):
+    """
+    Return the process-wide rule evaluation pool, creating it on first use.
+
+    The pool is kept for the lifetime of the instance so warm invocations
+    do not start new threads.
+
+    Args:
+        max_workers (int): Threads in the pool
+
+    Returns:
+        ThreadPoolExecutor: Shared pool, or None when ``max_workers`` is 1
+        or less and rules are evaluated serially
+    """
+    global _executor, _executor_workers
+    if max_workers <= 1:
+        return None
+    with _lock:
+        if _executor is None or _executor_workers != max_workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rule-eval")
+            _executor_workers = max_workers
+        return _executor
+
+
+def reset_executor():
+    """Shut down the shared pool, e.g. in tests."""
+    global _executor, _executor_workers
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown()
+        _executor = None
+        _executor_workers = 0
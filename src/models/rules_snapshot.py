@@ -0,0 +1,169 @@
+"""
+Rules snapshot model.
+A versioned, self-contained export of the rule definitions together with
+their compiled plans, so an instance can start evaluating without querying
+BigQuery or parsing any rule query.
+"""
+
+import hashlib
+import json
+import logging
+from datetime import datetime, timezone
+
+from rules_engine.models.compiler import COMPILER_VERSION, CompiledPlan, compile_query
+from rules_engine.models.rule import Rule
+
+logger = logging.getLogger("rules_engine")
+
+# Bump when the snapshot file layout changes
+SNAPSHOT_FORMAT = 1
+
+
+def _to_json(expression):
+    """Expression tuples as nested JSON lists."""
+    if isinstance(expression, tuple):
+        return [_to_json(item) for item in expression]
+    return expression
+
+
+def _from_json(expression):
+    """Nested JSON lists back to expression tuples."""
+    if isinstance(expression, list):
+        return tuple(_from_json(item) for item in expression)
+    return expression
+
+
+class RulesSnapshot:
+    """Rule definitions and their compiled plans at one version."""
+
+    def __init__(self, rules, version=None, created_at=None, sources=()):
+        """
+        Initialize a snapshot.
+
+        Args:
+            rules (list): Rule objects; their plans are compiled if needed
+            version (str, optional): Snapshot version. Defaults to a hash of
+                the rule definitions, so unchanged rules keep their version.
+            created_at (str, optional): ISO timestamp of the export
+            sources (iterable, optional): Tables the rules were exported from
+        """
+        self.rules = list(rules)
+        self.version = version if version is not None else self.content_version(self.rules)
+        self.created_at = created_at or datetime.now(timezone.utc).isoformat()
+        self.sources = tuple(sources)
+
+    @staticmethod
+    def content_version(rules):
+        """
+        Version derived from the rule definitions.
+
+        Args:
+            rules (list): Rule objects
+
+        Returns:
+            str: Hex digest of the rule numbers, descriptions and queries, and
+            of the output modes that are not the default
+        """
+        definitions = []
+        for r in rules:
+            definition = [r.rule_number, r.rule_description, r.rule_query]
+            if r.output_mode != "all" or r.sample_size is not None:
+                definition += [r.output_mode, r.sample_size]
+            definitions.append(definition)
+        payload = json.dumps(definitions, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(payload).hexdigest()[:16]
+
+    def referenced_columns(self):
+        """
+        Columns read by the rules.
+
+        Returns:
+            set: Column names, or None if some rule is not natively supported.
+            Rules without a query are skipped, as ``RuleSet`` does.
+        """
+        referenced = set()
+        for rule in self.rules:
+            if rule.is_empty:
+                continue
+            if rule.plan.columns is None:
+                return None
+            referenced.update(rule.plan.columns)
+        return referenced
+
+    def to_bytes(self):
+        """
+        Serialize the snapshot.
+
+        Returns:
+            bytes: UTF-8 encoded JSON document
+        """
+        columns = self.referenced_columns()
+        document = {
+            "format": SNAPSHOT_FORMAT,
+            "compiler_version": COMPILER_VERSION,
+            "version": self.version,
+            "created_at": self.created_at,
+            "sources": list(self.sources),
+            "columns": sorted(columns) if columns is not None else None,
+            "rules": [
+                {
+                    "rule_number": rule.rule_number,
+                    "rule_description": rule.rule_description,
+                    "rule_query": rule.rule_query,
+                    "output_mode": rule.output_mode,
+                    "sample_size": rule.sample_size,
+                    "dialect": rule.plan.dialect,
+                    "expression": _to_json(rule.plan.expression),
+                    "error": rule.plan.error,
+                }
+                for rule in self.rules
+            ],
+        }
+        return json.dumps(document, indent=1).encode("utf-8")
+
+    @classmethod
+    def from_bytes(cls, data):
+        """
+        Load a serialized snapshot.
+
+        Plans are taken from the snapshot as is, unless it was written by a
+        different compiler version, in which case the queries are recompiled.
+
+        Args:
+            data (bytes): Output of ``to_bytes``
+
+        Returns:
+            RulesSnapshot: The snapshot
+
+        Raises:
+            ValueError: If the data is not a snapshot this version can read
+        """
+        document = json.loads(data)
+        if not isinstance(document, dict) or document.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError("Unsupported rules snapshot format")
+
+        precompiled = document.get("compiler_version") == COMPILER_VERSION
+        if not precompiled:
+            logger.info("Rules snapshot was compiled by another compiler version, recompiling")
+
+        rules = []
+        for entry in document["rules"]:
+            query = entry["rule_query"]
+            if precompiled:
+                plan = CompiledPlan(query, _from_json(entry["expression"]), entry["dialect"], entry["error"])
+            else:
+                plan = compile_query(query)
+            rules.append(Rule(
+                entry["rule_number"], entry["rule_description"], query, plan=plan,
+                output_mode=entry.get("output_mode"), sample_size=entry.get("sample_size"),
+            ))
+
+        return cls(rules, document["version"], document["created_at"], document.get("sources", ()))
+
+    def __len__(self):
+        """Number of rules in the snapshot."""
+        return len(self.rules)
+
+    def __repr__(self):
+        """String representation of the snapshot."""
+        return f"RulesSnapshot({self.version}: {len(self.rules)} rules)"
@@ -0,0 +1,215 @@
+"""
+Process-pool sharding.
+Evaluates rules on row ranges of a large dataframe in worker processes, for
+rules whose string and date work holds the GIL and gains nothing from threads.
+"""
+
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from rules_engine.models.rule import Rule
+from rules_engine.models.rule_set import RuleSet
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - exercised when pyarrow is missing
+    pa = None
+
+logger = logging.getLogger("rules_engine")
+
+# Rule sets kept compiled in each worker, by rules version
+WORKER_RULE_SETS = 4
+
+# Frames are shared through tmpfs when available so they never touch disk
+SHARED_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+
+_worker_rule_sets = {}
+
+
+def write_shared_frame(dataframe, directory=SHARED_DIR):
+    """
+    Write a dataframe to an Arrow IPC file that processes can memory-map.
+
+    Args:
+        dataframe (pd.DataFrame): Data to share
+        directory (str, optional): Directory of the file
+
+    Returns:
+        str: Path of the file; the caller removes it
+    """
+    table = pa.Table.from_pandas(dataframe, preserve_index=False)
+    handle, path = tempfile.mkstemp(prefix="rules_engine_", suffix=".arrow", dir=directory)
+    try:
+        with os.fdopen(handle, "wb") as stream, pa.ipc.new_file(stream, table.schema) as writer:
+            writer.write_table(table)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+def evaluate_shard(version, definitions, path, start, stop):
+    """
+    Evaluate a rule set on one row range of a shared frame, in a worker process.
+
+    The file is memory-mapped, so workers read the shared pages instead of
+    receiving a pickled copy, and only the shard's rows are converted to a
+    dataframe. Rule sets are cached per worker by version, so warm workers
+    reuse their compiled rules across invocations. Only the positions of the
+    violating rows are returned; details are serialized by the parent from
+    its own frame when, and for the columns, they are needed.
+
+    Args:
+        version (str): Version of the rule set
+        definitions (list): (rule_number, rule_description, rule_query) tuples,
+            optionally followed by the rule's plan, output mode and sample size
+        path (str): Arrow IPC file written by ``write_shared_frame``
+        start (int): First row of the shard
+        stop (int): Row after the last row of the shard
+
+    Returns:
+        list: Per rule, the violating positions within the frame, or None if
+        the rule failed
+    """
+    rule_set = _worker_rule_sets.get(version)
+    if rule_set is None:
+        rule_set = RuleSet([Rule(*definition) for definition in definitions])
+        while len(_worker_rule_sets) >= WORKER_RULE_SETS:
+            _worker_rule_sets.pop(next(iter(_worker_rule_sets)))
+        _worker_rule_sets[version] = rule_set
+
+    with pa.memory_map(path) as source:
+        table = pa.ipc.open_file(source).read_all()
+        shard = table.slice(start, stop - start).to_pandas()
+        del table
+    return [None if mask is None else np.flatnonzero(mask) + start for mask in rule_set.evaluate(shard)]
+
+
+class ProcessSharder:
+    """
+    Splits large frames into row ranges evaluated by a warm process pool.
+
+    The frame is written once to a memory-mapped Arrow IPC file; each worker
+    evaluates the whole rule set on its shard and returns the violating row
+    positions, which are concatenated per rule in shard order, so the result
+    matches serial evaluation exactly.
+    """
+
+    def __init__(self, workers, min_rows=1_000_000, directory=SHARED_DIR, executor=None):
+        """
+        Initialize the sharder.
+
+        Args:
+            workers (int): Worker processes, and shards per frame
+            min_rows (int, optional): Smallest frame worth sharding
+            directory (str, optional): Directory of the shared frame files
+            executor (ProcessPoolExecutor, optional): Pool to run shards on.
+                Defaults to the process-wide pool from ``get_process_pool``.
+
+        Raises:
+            ImportError: If pyarrow is not installed
+        """
+        if pa is None:
+            raise ImportError("pyarrow is required for process sharding")
+        self.workers = workers
+        self.min_rows = min_rows
+        self.directory = directory
+        self.executor = executor
+
+    def positions(self, rule_set, dataframe):
+        """
+        Find the violating rows of every rule across the worker processes.
+
+        Falls back to evaluating in this process if the frame cannot be
+        converted to Arrow (e.g. a mixed-type object column) or the pool fails.
+
+        Args:
+            rule_set (RuleSet): Rules to evaluate
+            dataframe (pd.DataFrame): Data to check for rule violations
+
+        Returns:
+            list: Per rule, the violating positions within the frame, or None
+            if the rule failed
+        """
+        definitions = [
+            (rule.rule_number, rule.rule_description, rule.rule_query, None, rule.output_mode, rule.sample_size)
+            for rule in rule_set
+        ]
+        shard_rows = -(-len(dataframe) // self.workers)
+        path = None
+        try:
+            path = write_shared_frame(dataframe, self.directory)
+            executor = self.executor or get_process_pool(self.workers)
+            futures = [
+                executor.submit(
+                    evaluate_shard, rule_set.version, definitions, path,
+                    start, min(start + shard_rows, len(dataframe)),
+                )
+                for start in range(0, len(dataframe), shard_rows)
+            ]
+            shards = [future.result() for future in futures]
+        except Exception as e:
+            logger.warning(f"Sharded evaluation failed, evaluating in process: {str(e)}")
+            if isinstance(e, BrokenProcessPool) and self.executor is None:
+                # A worker died; start a fresh pool on the next call
+                reset_process_pool()
+            local = RuleSet(rule_set.rules, rule_set.executor, rule_set.min_parallel_rows)
+            return [None if mask is None else np.flatnonzero(mask) for mask in local.evaluate(dataframe)]
+        finally:
+            if path is not None:
+                os.remove(path)
+
+        positions = []
+        for rule, parts in zip(rule_set, zip(*shards)):
+            if any(part is None for part in parts):
+                logger.error(f"Error applying rule {rule.rule_number} in a worker process")
+                positions.append(None)
+            else:
+                positions.append(np.concatenate(parts))
+        return positions
+
+
+_lock = threading.Lock()
+_pool = None
+_pool_workers = 0
+
+
+def get_process_pool(workers):
+    """
+    Return the process-wide worker pool, creating it on first use.
+
+    Workers are started with ``spawn`` so they do not inherit the threads
+    and locks of this process, and are kept for the lifetime of the
+    instance so warm invocations skip their start-up.
+
+    Args:
+        workers (int): Worker processes
+
+    Returns:
+        ProcessPoolExecutor: Shared pool
+    """
+    global _pool, _pool_workers
+    with _lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def reset_process_pool():
+    """Shut down the shared pool, e.g. in tests."""
+    global _pool, _pool_workers
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = None
+        _pool_workers = 0
@@ -0,0 +1,280 @@
+"""
+SQL predicate parser.
+Parses the BigQuery-style predicate subset used in rules_definition into
+expression tuples that the native evaluator runs with NULL-aware semantics.
+"""
+
+import re
+
+from rules_engine.models.expression import UnsupportedExpression, logical
+
+KEYWORDS = {"AND", "OR", "NOT", "IS", "NULL", "IN", "LIKE", "BETWEEN", "TRUE", "FALSE"}
+
+COMPARISONS = {"=": "==", "==": "==", "<>": "!=", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+
+TOKEN_PATTERN = re.compile(
+    r"""
+    (?P<space>\s+)
+    |(?P<number>(?:\d+\.\d*|\.\d+|\d+)(?:[eE][+-]?\d+)?)
+    |(?P<string>'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")
+    |(?P<quoted>`[^`]+`)
+    |(?P<name>[A-Za-z_][A-Za-z0-9_]*)
+    |(?P<op><>|!=|<=|>=|==|[=<>(),+\-*/])
+    """,
+    re.VERBOSE,
+)
+
+ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "\\": "\\", "'": "'", '"': '"'}
+
+
+def tokenize(query):
+    """
+    Split a SQL predicate into tokens.
+
+    Args:
+        query (str): SQL predicate
+
+    Returns:
+        list: List of (kind, value) tuples
+
+    Raises:
+        UnsupportedExpression: If the predicate contains unknown characters
+    """
+    tokens = []
+    position = 0
+    while position < len(query):
+        match = TOKEN_PATTERN.match(query, position)
+        if match is None:
+            raise UnsupportedExpression(f"Unexpected character {query[position]!r} in {query!r}")
+        position = match.end()
+        kind = match.lastgroup
+        text = match.group()
+
+        if kind == "space":
+            continue
+        if kind == "number":
+            value = float(text) if any(c in text for c in ".eE") else int(text)
+            tokens.append(("literal", value))
+        elif kind == "string":
+            body = re.sub(r"\\(.)", lambda m: ESCAPES.get(m.group(1), m.group(1)), text[1:-1])
+            tokens.append(("literal", body))
+        elif kind == "quoted":
+            tokens.append(("name", text[1:-1]))
+        elif kind == "name" and text.upper() in KEYWORDS:
+            tokens.append(("keyword", text.upper()))
+        else:
+            tokens.append((kind, text))
+    return tokens
+
+
+def like_to_regex(pattern):
+    """
+    Translate a LIKE pattern to an anchored regular expression.
+
+    Args:
+        pattern (str): LIKE pattern using ``%`` and ``_`` wildcards
+
+    Returns:
+        str: Equivalent regular expression
+    """
+    parts = []
+    escaped = False
+    for char in pattern:
+        if escaped:
+            parts.append(re.escape(char))
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == "%":
+            parts.append(".*")
+        elif char == "_":
+            parts.append(".")
+        else:
+            parts.append(re.escape(char))
+    return "(?s)" + "".join(parts)
+
+
+class _Parser:
+    """Recursive descent parser over a token list."""
+
+    def __init__(self, query):
+        """Tokenize the predicate to parse."""
+        self.query = query
+        self.tokens = tokenize(query)
+        self.position = 0
+
+    def parse(self):
+        """Parse the whole predicate."""
+        expression = self.parse_or()
+        if self.peek() is not None:
+            self.fail(f"unexpected {self.peek()[1]!r}")
+        return expression
+
+    def fail(self, message):
+        """Raise a parse error for the predicate."""
+        raise UnsupportedExpression(f"Cannot parse SQL predicate {self.query!r}: {message}")
+
+    def peek(self, offset=0):
+        """Look at a token without consuming it."""
+        index = self.position + offset
+        return self.tokens[index] if index < len(self.tokens) else None
+
+    def accept(self, kind, value=None):
+        """Consume the next token if it matches."""
+        token = self.peek()
+        if token is not None and token[0] == kind and (value is None or token[1] == value):
+            self.position += 1
+            return token
+        return None
+
+    def expect(self, kind, value=None):
+        """Consume the next token, which must match."""
+        token = self.accept(kind, value)
+        if token is None:
+            self.fail(f"expected {value or kind}")
+        return token
+
+    def parse_or(self):
+        """Parse ``a OR b``."""
+        operands = [self.parse_and()]
+        while self.accept("keyword", "OR"):
+            operands.append(self.parse_and())
+        return logical("or", operands)
+
+    def parse_and(self):
+        """Parse ``a AND b``."""
+        operands = [self.parse_not()]
+        while self.accept("keyword", "AND"):
+            operands.append(self.parse_not())
+        return logical("and", operands)
+
+    def parse_not(self):
+        """Parse ``NOT a``."""
+        if self.accept("keyword", "NOT"):
+            return ("not", self.parse_not())
+        return self.parse_predicate()
+
+    def parse_predicate(self):
+        """Parse a comparison, IS NULL, IN, LIKE or BETWEEN test."""
+        left = self.parse_additive()
+
+        token = self.peek()
+        if token is not None and token[0] == "op" and token[1] in COMPARISONS:
+            self.position += 1
+            return ("sql_compare", COMPARISONS[token[1]], left, self.parse_additive())
+
+        if self.accept("keyword", "IS"):
+            negated = self.accept("keyword", "NOT") is not None
+            self.expect("keyword", "NULL")
+            node = ("is_null", left)
+            return ("not", node) if negated else node
+
+        negated = self.accept("keyword", "NOT") is not None
+        if self.accept("keyword", "IN"):
+            node = ("sql_in", left, self.parse_list())
+        elif self.accept("keyword", "LIKE"):
+            pattern = self.parse_additive()
+            if pattern[0] != "literal" or not isinstance(pattern[1], str):
+                self.fail("LIKE requires a string pattern")
+            node = ("like", left, like_to_regex(pattern[1]))
+        elif self.accept("keyword", "BETWEEN"):
+            low = self.parse_additive()
+            self.expect("keyword", "AND")
+            high = self.parse_additive()
+            node = logical("and", [
+                ("sql_compare", ">=", left, low),
+                ("sql_compare", "<=", left, high),
+            ])
+        elif negated:
+            self.fail("expected IN, LIKE or BETWEEN after NOT")
+        else:
+            return left
+        return ("not", node) if negated else node
+
+    def parse_list(self):
+        """Parse the literal list of an IN test."""
+        self.expect("op", "(")
+        values = []
+        while True:
+            value = self.parse_additive()
+            if value[0] != "literal":
+                self.fail("IN lists must contain literals")
+            values.append(value[1])
+            if not self.accept("op", ","):
+                break
+        self.expect("op", ")")
+        return tuple(values)
+
+    def parse_additive(self):
+        """Parse ``a + b`` and ``a - b``."""
+        left = self.parse_multiplicative()
+        while True:
+            token = self.accept("op", "+") or self.accept("op", "-")
+            if token is None:
+                return left
+            left = ("arith", token[1], left, self.parse_multiplicative())
+
+    def parse_multiplicative(self):
+        """Parse ``a * b`` and ``a / b``."""
+        left = self.parse_unary()
+        while True:
+            token = self.accept("op", "*") or self.accept("op", "/")
+            if token is None:
+                return left
+            left = ("arith", token[1], left, self.parse_unary())
+
+    def parse_unary(self):
+        """Parse unary plus and minus."""
+        if self.accept("op", "-"):
+            operand = self.parse_unary()
+            if operand[0] == "literal" and isinstance(operand[1], (int, float)):
+                return ("literal", -operand[1])
+            return ("arith", "*", ("literal", -1), operand)
+        if self.accept("op", "+"):
+            return self.parse_unary()
+        return self.parse_primary()
+
+    def parse_primary(self):
+        """Parse a literal, column or parenthesized expression."""
+        token = self.peek()
+        if token is None:
+            self.fail("unexpected end of predicate")
+        self.position += 1
+
+        if token[0] == "literal":
+            return token
+        if token[0] == "name":
+            return ("column", token[1])
+        if token == ("keyword", "NULL"):
+            return ("literal", None)
+        if token == ("keyword", "TRUE"):
+            return ("literal", True)
+        if token == ("keyword", "FALSE"):
+            return ("literal", False)
+        if token == ("op", "("):
+            expression = self.parse_or()
+            self.expect("op", ")")
+            return expression
+        self.fail(f"unexpected {token[1]!r}")
+
+
+def parse_sql(query):
+    """
+    Parse a BigQuery-style SQL predicate.
+
+    Supports comparisons (``=``, ``<>``, ``!=``, ``<``, ``<=``, ``>``,
+    ``>=``), ``IS [NOT] NULL``, ``[NOT] IN``, ``[NOT] LIKE``,
+    ``[NOT] BETWEEN``, arithmetic and ``AND``/``OR``/``NOT``. Comparisons
+    with NULL are unknown, as in SQL, and only rows where the predicate is
+    true count as violations.
+
+    Args:
+        query (str): SQL predicate, e.g. ``"customer_id IS NULL OR customer_id = ''"``
+
+    Returns:
+        tuple: The parsed expression
+
+    Raises:
+        UnsupportedExpression: If the predicate uses unsupported syntax
+    """
+    return _Parser(query).parse()
@@ -0,0 +1,274 @@
+"""
+Violation batch model.
+Holds the violations found by a single rule in columnar form.
+"""
+
+import json
+
+import numpy as np
+
+
+def rows_to_json(frame):
+    """
+    Serialize every row of a dataframe to a JSON object string in one pass.
+
+    The output matches what ``row.to_json()`` produces for each row yielded by
+    ``frame.iterrows()``. ``iterrows`` upcasts each row to the frame's common
+    dtype, so mixed int/float frames are cast to the common numeric dtype
+    before the single ``to_json`` call.
+
+    Args:
+        frame (pd.DataFrame): Rows to serialize
+
+    Returns:
+        list: One JSON string per row, in frame order
+    """
+    if len(frame) == 0:
+        return []
+
+    dtypes = set(frame.dtypes)
+    if len(dtypes) > 1 and all(
+        isinstance(dtype, np.dtype) and dtype.kind in "iuf" for dtype in dtypes
+    ):
+        frame = frame.astype(np.result_type(*dtypes))
+
+    # JSON escapes embedded newlines, so each line is exactly one record
+    payload = frame.to_json(orient="records", lines=True)
+    return payload.rstrip("\n").split("\n")
+
+
+def select_columns(detail, columns):
+    """
+    Keep only some keys of a serialized row, in the row's key order.
+
+    Args:
+        detail (str): JSON object string, as built by ``rows_to_json``
+        columns (iterable): Keys to keep; keys missing from the row are skipped
+
+    Returns:
+        str: JSON object string with the kept keys
+    """
+    row = json.loads(detail)
+    wanted = set(columns)
+    if wanted.issuperset(row):
+        return detail
+    return json.dumps({key: value for key, value in row.items() if key in wanted}, separators=(",", ":"))
+
+
+class ViolationBatch:
+    """
+    Columnar collection of the violations found by a single rule.
+
+    Details are either given as JSON strings or kept as row positions in the
+    source dataframe and serialized on first use, so consumers that only
+    need counts never pay for JSON encoding. A lazy batch keeps its source
+    dataframe alive until it is serialized or dropped.
+    """
+
+    def __init__(
+        self, rule_number, rule_description, row_numbers, details=None, source=None, positions=None, columns=None
+    ):
+        """
+        Initialize a violation batch.
+
+        Args:
+            rule_number (str): Identifier of the rule that was violated
+            rule_description (str): Description of the rule that was violated
+            row_numbers (array-like): Position of each violating row in the
+                source file
+            details (list, optional): JSON string with the row data, one per
+                violation. Built from ``source`` when omitted.
+            source (pd.DataFrame, optional): Dataframe holding the violating rows
+            positions (array-like, optional): Positions of the violating rows
+                in ``source``
+            columns (iterable, optional): Columns the details were limited to
+                when serialized; every column when omitted
+        """
+        self.rule_number = rule_number
+        self.rule_description = rule_description
+        self.row_numbers = np.asarray(row_numbers, dtype=np.int64)
+        self.source = source
+        self.positions = None if positions is None else np.asarray(positions, dtype=np.int64)
+        self._details = details
+        self.columns = None if columns is None else tuple(columns)
+
+    @classmethod
+    def from_frame(cls, rule_number, rule_description, violations_df, row_numbers):
+        """
+        Build a batch from the violating rows of a dataframe.
+
+        Args:
+            rule_number (str): Identifier of the rule that was violated
+            rule_description (str): Description of the rule that was violated
+            violations_df (pd.DataFrame): The violating rows
+            row_numbers (array-like): Position of each violating row in the
+                source data
+
+        Returns:
+            ViolationBatch: Batch with one violation per row
+        """
+        return cls(rule_number, rule_description, row_numbers, rows_to_json(violations_df))
+
+    @classmethod
+    def lazy(cls, rule_number, rule_description, dataframe, positions, row_offset=0):
+        """
+        Build a batch that serializes its rows only when details are needed.
+
+        Args:
+            rule_number (str): Identifier of the rule that was violated
+            rule_description (str): Description of the rule that was violated
+            dataframe (pd.DataFrame): Data the rule was evaluated on
+            positions (np.ndarray): Positions of the violating rows
+            row_offset (int, optional): Row number of the first row of the
+                dataframe within the whole file
+
+        Returns:
+            ViolationBatch: Batch referencing the dataframe
+        """
+        positions = np.asarray(positions, dtype=np.int64)
+        return cls(
+            rule_number, rule_description, positions + row_offset, source=dataframe, positions=positions
+        )
+
+    @property
+    def details(self):
+        """JSON string with the row data of each violation, built on first use."""
+        if self._details is None:
+            self._details = self.serialize()
+            self.source = None
+            self.positions = None
+        return self._details
+
+    @property
+    def materialized(self):
+        """Whether the details have been serialized."""
+        return self._details is not None
+
+    def serialize(self, columns=None):
+        """
+        Serialize the violating rows to JSON.
+
+        Args:
+            columns (iterable, optional): Columns to include; every column
+                when omitted. Columns missing from the data are skipped.
+
+        Returns:
+            list: One JSON string per violation
+        """
+        if self._details is not None:
+            if not columns or (self.columns is not None and set(self.columns).issubset(columns)):
+                return self._details
+            return [select_columns(detail, columns) for detail in self._details]
+        if self.source is None:
+            return []
+        frame = self.source.iloc[self.positions]
+        if columns:
+            frame = frame[[column for column in columns if column in frame.columns]]
+        return rows_to_json(frame)
+
+    def compact(self, columns=None):
+        """
+        Serialize a lazy batch for some columns, releasing its source dataframe.
+
+        Args:
+            columns (iterable, optional): Columns to include; every column
+                when omitted
+
+        Returns:
+            ViolationBatch: Batch with serialized details, or this batch if
+            it already has them
+        """
+        if self._details is not None:
+            return self
+        return ViolationBatch(
+            self.rule_number, self.rule_description, self.row_numbers, self.serialize(columns), columns=columns
+        )
+
+    @classmethod
+    def empty(cls, rule_number, rule_description):
+        """
+        Build a batch without violations.
+
+        Args:
+            rule_number (str): Identifier of the rule
+            rule_description (str): Description of the rule
+
+        Returns:
+            ViolationBatch: Empty batch
+        """
+        return cls(rule_number, rule_description, [], [])
+
+    @classmethod
+    def concat(cls, batches):
+        """
+        Join batches of the same rule, e.g. found in consecutive row ranges.
+
+        Args:
+            batches (list): ViolationBatch objects of one rule, in row order
+
+        Returns:
+            ViolationBatch: Batch with the violations of every batch, in order
+        """
+        first = batches[0]
+        details = []
+        for batch in batches:
+            details.extend(batch.details)
+        row_numbers = np.concatenate([batch.row_numbers for batch in batches])
+        return cls(first.rule_number, first.rule_description, row_numbers, details)
+
+    def take(self, indices):
+        """
+        Select some of the violations, staying lazy if the batch is.
+
+        Args:
+            indices (array-like): Positions of the violations within the batch
+
+        Returns:
+            ViolationBatch: Batch with the selected violations, in the given order
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        row_numbers = self.row_numbers[indices]
+        if self._details is None:
+            positions = None if self.positions is None else self.positions[indices]
+            return ViolationBatch(
+                self.rule_number, self.rule_description, row_numbers, source=self.source, positions=positions
+            )
+        details = [self._details[index] for index in indices.tolist()]
+        return ViolationBatch(self.rule_number, self.rule_description, row_numbers, details, columns=self.columns)
+
+    def to_records(self):
+        """
+        Convert the batch to violation dictionaries.
+
+        Returns:
+            list: List of violation dictionaries
+        """
+        return [self[i] for i in range(len(self))]
+
+    def __len__(self):
+        """Number of violations in the batch."""
+        return len(self.row_numbers)
+
+    def __getitem__(self, index):
+        """Violation dictionary for a single violating row."""
+        return {
+            "rule_number": self.rule_number,
+            "rule_description": self.rule_description,
+            "row_number": int(self.row_numbers[index]),
+            "details": self.details[index],
+        }
+
+    def __iter__(self):
+        """Iterate over the violations as dictionaries."""
+        for index in range(len(self)):
+            yield self[index]
+
+    def __getstate__(self):
+        """Serialize the details before pickling instead of the source dataframe."""
+        state = self.__dict__.copy()
+        state.update(_details=self.details, source=None, positions=None)
+        return state
+
+    def __repr__(self):
+        """String representation of the batch."""
+        return f"ViolationBatch({self.rule_number}: {len(self)} violations)"
@@ -0,0 +1,209 @@
+"""
+Violation matrix model.
+Holds which rows violate which rules as a bit-packed rules x rows matrix, so
+cross-rule questions are answered without another pass over the data.
+"""
+
+import numpy as np
+
+# Set bits of every byte value
+_POPCOUNT = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def popcount(packed, axis=-1):
+    """
+    Count the set bits of packed bytes.
+
+    Args:
+        packed (np.ndarray): uint8 array from ``np.packbits``
+        axis (int, optional): Axis to sum over
+
+    Returns:
+        np.ndarray: Number of set bits along the axis
+    """
+    return _POPCOUNT[packed].sum(axis=axis, dtype=np.int64)
+
+
+class ViolationMatrix:
+    """
+    Bit-packed matrix with one row per rule and one bit per data row.
+
+    Memory use is one bit per rule per row, rounded up to whole bytes per
+    rule. Rules that failed to evaluate have no bits set and are listed in
+    ``failed``.
+    """
+
+    def __init__(self, rule_numbers, bits, n_rows, failed=()):
+        """
+        Initialize a violation matrix.
+
+        Args:
+            rule_numbers (list): Rule identifiers, one per matrix row
+            bits (np.ndarray): uint8 array of shape (rules, ceil(rows / 8))
+                packed along the last axis, most significant bit first
+            n_rows (int): Number of data rows
+            failed (iterable, optional): Rule numbers that failed to evaluate
+        """
+        self.rule_numbers = list(rule_numbers)
+        self.bits = bits
+        self.n_rows = n_rows
+        self.failed = set(failed)
+        self._index = {number: index for index, number in enumerate(self.rule_numbers)}
+
+    @classmethod
+    def from_masks(cls, rule_numbers, masks, n_rows):
+        """
+        Pack boolean violation masks.
+
+        Args:
+            rule_numbers (list): Rule identifiers
+            masks (list): Boolean mask per rule, or None for rules that failed
+            n_rows (int): Number of data rows
+
+        Returns:
+            ViolationMatrix: The packed masks
+        """
+        bits = np.zeros((len(rule_numbers), (n_rows + 7) // 8), dtype=np.uint8)
+        failed = []
+        for index, (number, mask) in enumerate(zip(rule_numbers, masks)):
+            if mask is None:
+                failed.append(number)
+            else:
+                bits[index] = np.packbits(mask)
+        return cls(rule_numbers, bits, n_rows, failed)
+
+    @property
+    def nbytes(self):
+        """Bytes used by the bits."""
+        return self.bits.nbytes
+
+    def mask(self, rule_number):
+        """
+        Boolean mask of the rows violating a rule.
+
+        Args:
+            rule_number (str): Rule identifier
+
+        Returns:
+            np.ndarray: Boolean array with one entry per row
+        """
+        return self._unpack(self.bits[self._index[rule_number]])
+
+    def rows(self, rule_number):
+        """
+        Positions of the rows violating a rule.
+
+        Args:
+            rule_number (str): Rule identifier
+
+        Returns:
+            np.ndarray: Row positions in ascending order
+        """
+        return np.flatnonzero(self.mask(rule_number))
+
+    def count(self, rule_number):
+        """
+        Number of rows violating a rule.
+
+        Args:
+            rule_number (str): Rule identifier
+
+        Returns:
+            int: Number of violating rows
+        """
+        return int(popcount(self.bits[self._index[rule_number]]))
+
+    def counts(self):
+        """
+        Number of violating rows of every rule.
+
+        Returns:
+            dict: Rule number to number of violating rows
+        """
+        return dict(zip(self.rule_numbers, popcount(self.bits).tolist()))
+
+    def any(self):
+        """
+        Rows violating at least one rule.
+
+        Returns:
+            np.ndarray: Boolean array with one entry per row
+        """
+        return self._unpack(np.bitwise_or.reduce(self.bits, axis=0))
+
+    def all(self):
+        """
+        Rows violating every rule.
+
+        Returns:
+            np.ndarray: Boolean array with one entry per row
+        """
+        return self._unpack(np.bitwise_and.reduce(self.bits, axis=0))
+
+    def row_counts(self):
+        """
+        Number of rules each row violates.
+
+        Returns:
+            np.ndarray: Count per row
+        """
+        counts = np.zeros(self.n_rows, dtype=np.int64)
+        for packed in self.bits:
+            counts += self._unpack(packed)
+        return counts
+
+    def masks(self):
+        """
+        Unpack the rules one at a time.
+
+        Yields:
+            np.ndarray: Boolean mask of each rule, in rule order
+        """
+        for packed in self.bits:
+            yield self._unpack(packed)
+
+    def rules_for_row(self, row):
+        """
+        Rules violated by one row.
+
+        Args:
+            row (int): Row position
+
+        Returns:
+            list: Rule numbers, in rule order
+
+        Raises:
+            IndexError: If the row is out of range
+        """
+        if not 0 <= row < self.n_rows:
+            raise IndexError(f"Row {row} out of range for {self.n_rows} rows")
+        column = self.bits[:, row // 8] >> (7 - row % 8) & 1
+        return [self.rule_numbers[index] for index in np.flatnonzero(column)]
+
+    def co_occurrence(self):
+        """
+        Rows violating each pair of rules, e.g. to find rules that always
+        fire together.
+
+        Returns:
+            np.ndarray: Symmetric (rules, rules) array; the diagonal holds
+            each rule's own count
+        """
+        size = len(self.rule_numbers)
+        result = np.zeros((size, size), dtype=np.int64)
+        for i in range(size):
+            result[i, i:] = popcount(self.bits[i] & self.bits[i:])
+            result[i:, i] = result[i, i:]
+        return result
+
+    def _unpack(self, packed):
+        """Unpack one packed row to a boolean mask."""
+        return np.unpackbits(packed, count=self.n_rows).view(bool)
+
+    def __len__(self):
+        """Number of rules."""
+        return len(self.rule_numbers)
+
+    def __repr__(self):
+        """String representation of the matrix."""
+        return f"ViolationMatrix({len(self)} rules x {self.n_rows} rows, {self.nbytes} bytes)"
@@ -0,0 +1,274 @@
+"""
+CSV readers.
+Pluggable parsers that turn raw file contents into dataframes: a
+multi-threaded pyarrow backend, used by default when pyarrow is installed,
+and the pandas C parser as a fallback.
+"""
+
+import io
+import logging
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # pragma: no cover - exercised when pyarrow is missing
+    pa = None
+    pa_csv = None
+
+logger = logging.getLogger("rules_engine")
+
+
+class MemoryReader(io.RawIOBase):
+    """Read-only binary file object over a buffer, without copying it."""
+
+    def __init__(self, buffer):
+        """
+        Initialize the reader.
+
+        Args:
+            buffer (bytes-like): Data to read
+        """
+        self._view = memoryview(buffer)
+        self._position = 0
+
+    def readable(self):
+        """The reader is always readable."""
+        return True
+
+    def readinto(self, target):
+        """Copy the next bytes of the buffer into ``target``."""
+        count = min(len(target), len(self._view) - self._position)
+        target[:count] = self._view[self._position:self._position + count]
+        self._position += count
+        return count
+
+    def close(self):
+        """Release the underlying buffer."""
+        self._view.release()
+        super().close()
+
+
+class PandasCSVReader:
+    """CSV reader backed by the single-threaded pandas C parser."""
+
+    name = "pandas"
+
+    def read(self, buffer, columns=None):
+        """
+        Parse CSV bytes into a dataframe.
+
+        Args:
+            buffer (bytes-like): Raw CSV contents
+            columns (set, optional): Names of the columns to parse; others are
+                skipped. Names missing from the file are ignored.
+
+        Returns:
+            pd.DataFrame: The parsed data
+        """
+        with MemoryReader(buffer) as reader:
+            return pd.read_csv(reader, usecols=self._usecols(columns))
+
+    def iter_chunks(self, stream, columns=None, chunk_rows=500_000, skip_rows=0):
+        """
+        Parse a binary stream chunk by chunk.
+
+        Args:
+            stream (file-like): Binary stream positioned at the start of the file
+            columns (set, optional): Names of the columns to parse
+            chunk_rows (int, optional): Rows per chunk
+            skip_rows (int, optional): Data rows to skip after the header
+
+        Yields:
+            pd.DataFrame: Consecutive chunks of the file
+        """
+        skiprows = range(1, skip_rows + 1) if skip_rows else None
+        yield from pd.read_csv(
+            stream, usecols=self._usecols(columns), chunksize=chunk_rows, skiprows=skiprows
+        )
+
+    @staticmethod
+    def _usecols(columns):
+        """Column filter that ignores names missing from the file."""
+        if columns is None:
+            return None
+        return lambda column: column in columns
+
+
+class ArrowCSVReader:
+    """
+    CSV reader backed by pyarrow's multi-threaded parser.
+
+    Columns are typed by Arrow and string columns stay Arrow-backed in the
+    resulting dataframe. Conversions are kept compatible with pandas, so
+    violation details are unchanged: date-like columns stay strings and empty
+    fields are null.
+    """
+
+    name = "arrow"
+
+    def __init__(self, use_threads=True, block_size=16 * 1024 * 1024):
+        """
+        Initialize the reader.
+
+        Args:
+            use_threads (bool, optional): Parse blocks on Arrow's thread pool
+            block_size (int, optional): Bytes per parsed block; also the unit
+                of parallelism and of streamed chunks
+
+        Raises:
+            ImportError: If pyarrow is not installed
+        """
+        if pa is None:
+            raise ImportError("pyarrow is required for the arrow CSV reader")
+        self.use_threads = use_threads
+        self.block_size = block_size
+
+    def read(self, buffer, columns=None):
+        """
+        Parse CSV bytes into a dataframe.
+
+        The reader is meant to own the only reference to ``buffer`` (pass the
+        download result straight in), so the raw bytes are freed as soon as
+        they are parsed.
+
+        Args:
+            buffer (bytes-like): Raw CSV contents
+            columns (set, optional): Names of the columns to parse; others are
+                skipped. Names missing from the file are ignored.
+
+        Returns:
+            pd.DataFrame: The parsed data
+        """
+        data = pa.py_buffer(buffer)
+        del buffer
+        try:
+            schema = pa_csv.open_csv(pa.BufferReader(data), read_options=self._read_options()).schema
+            table = pa_csv.read_csv(
+                pa.BufferReader(data),
+                read_options=self._read_options(),
+                convert_options=self._convert_options(schema, columns),
+            )
+        except pa.ArrowInvalid as e:
+            # Types are inferred from the first block; fall back if later rows disagree
+            logger.warning(f"Arrow CSV parsing failed, falling back to pandas: {str(e)}")
+            return PandasCSVReader().read(data, columns)
+        del data
+        return self._to_pandas(table)
+
+    def iter_chunks(self, stream, columns=None, chunk_rows=500_000, skip_rows=0):
+        """
+        Parse a binary stream block by block.
+
+        Each yielded chunk holds at most ``chunk_rows`` rows. If a later block
+        does not match the types inferred from the first one, the stream is
+        rewound and the remaining rows are parsed by pandas.
+
+        Args:
+            stream (file-like): Binary stream positioned at the start of the file
+            columns (set, optional): Names of the columns to parse
+            chunk_rows (int, optional): Maximum rows per chunk
+            skip_rows (int, optional): Data rows to skip after the header
+
+        Yields:
+            pd.DataFrame: Consecutive chunks of the file
+        """
+        rows_read = 0
+        try:
+            reader = pa_csv.open_csv(stream, read_options=self._read_options())
+            reader = pa_csv.open_csv(
+                self._rewind(stream),
+                read_options=self._read_options(skip_rows),
+                convert_options=self._convert_options(reader.schema, columns),
+            )
+            for batch in reader:
+                for start in range(0, batch.num_rows, chunk_rows):
+                    chunk = batch.slice(start, chunk_rows)
+                    rows_read += chunk.num_rows
+                    yield self._to_pandas(pa.Table.from_batches([chunk]))
+        except pa.ArrowInvalid as e:
+            logger.warning(f"Arrow CSV parsing failed after {rows_read} rows, falling back to pandas: {str(e)}")
+            yield from PandasCSVReader().iter_chunks(
+                self._rewind(stream), columns, chunk_rows, skip_rows + rows_read
+            )
+
+    def _read_options(self, skip_rows=0):
+        """Read options for the parser."""
+        return pa_csv.ReadOptions(
+            use_threads=self.use_threads,
+            block_size=self.block_size,
+            skip_rows_after_names=skip_rows,
+        )
+
+    @staticmethod
+    def _convert_options(schema, columns):
+        """Convert options that mirror pandas' type handling."""
+        # pandas leaves dates as strings; keep them that way so violation details match
+        column_types = {
+            field.name: pa.string()
+            for field in schema
+            if pa.types.is_timestamp(field.type) or pa.types.is_date(field.type) or pa.types.is_time(field.type)
+        }
+        return pa_csv.ConvertOptions(
+            column_types=column_types,
+            strings_can_be_null=True,
+            include_columns=None if columns is None else [name for name in schema.names if name in columns],
+        )
+
+    @staticmethod
+    def _rewind(stream):
+        """Seek a stream back to its start."""
+        stream.seek(0)
+        return stream
+
+    @staticmethod
+    def _to_pandas(table):
+        """Convert a table, keeping string columns Arrow-backed."""
+        string_dtype = _arrow_string_dtype()
+        types_mapper = None
+        if string_dtype is not None:
+            types_mapper = {pa.string(): string_dtype, pa.large_string(): string_dtype}.get
+        return table.to_pandas(self_destruct=True, split_blocks=True, types_mapper=types_mapper)
+
+
+def _arrow_string_dtype():
+    """
+    Arrow-backed string dtype with NaN missing values, if pandas supports it.
+
+    NaN (rather than pd.NA) semantics keep comparisons with missing values
+    behaving as they do for pandas' own parser.
+    """
+    try:
+        return pd.StringDtype("pyarrow", na_value=np.nan)
+    except TypeError:
+        return None
+
+
+READERS = {
+    PandasCSVReader.name: PandasCSVReader,
+    ArrowCSVReader.name: ArrowCSVReader,
+}
+
+
+def get_reader(name="auto"):
+    """
+    Create a CSV reader.
+
+    Args:
+        name (str, optional): ``"arrow"``, ``"pandas"`` or ``"auto"`` for the
+            Arrow reader when pyarrow is installed and pandas otherwise
+
+    Returns:
+        PandasCSVReader or ArrowCSVReader: The reader
+
+    Raises:
+        ValueError: If the reader name is unknown
+    """
+    if name == "auto":
+        name = ArrowCSVReader.name if pa is not None else PandasCSVReader.name
+    if name not in READERS:
+        raise ValueError(f"Unknown CSV reader: {name}")
+    return READERS[name]()
+
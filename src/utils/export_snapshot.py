@@ -0,0 +1,82 @@
+"""
+Rules snapshot export.
+Reads the rule definitions from BigQuery, compiles them and writes a rules
+snapshot that instances load at startup instead of querying BigQuery.
+
+Usage:
+    python -m rules_engine.utils.export_snapshot gs://my-bucket/rules/snapshot.json \
+        --table rules_engine.rules_definition
+
+Google Sheet backed rules are full SELECT statements over warehouse tables
+that the function cannot evaluate on a file, so they are not exported; run
+them in BigQuery with rules_engine.utils.sql_script --gsheet-table instead.
+"""
+
+import argparse
+import logging
+
+from rules_engine.connectors.bigquery_connector import BigQueryConnector
+from rules_engine.connectors.snapshot_loader import open_source
+from rules_engine.models.rules_snapshot import RulesSnapshot
+
+logger = logging.getLogger("rules_engine")
+
+
+def build_snapshot(bq, tables=()):
+    """
+    Export rules from BigQuery into a snapshot.
+
+    Args:
+        bq (BigQueryConnector): Connector used to query the rules
+        tables (iterable, optional): Tables with the rules_definition layout.
+            Defaults to the connector's rules table if no table is given.
+
+    Returns:
+        RulesSnapshot: Snapshot of every rule, with compiled plans
+    """
+    sources = list(tables) or [f"{bq.dataset_id}.{bq.rules_table}"]
+
+    rules = []
+    for table in sources:
+        rules.extend(bq.query_rules(table))
+
+    snapshot = RulesSnapshot(rules, sources=sources)
+    for rule in snapshot.rules:
+        if not rule.plan.is_native:
+            logger.warning(f"Rule {rule.rule_number} is not natively supported: {rule.plan.error}")
+    return snapshot
+
+
+def main(argv=None):
+    """
+    Export a rules snapshot from the command line.
+
+    Args:
+        argv (list, optional): Command line arguments
+
+    Returns:
+        RulesSnapshot: The snapshot written
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("output", help="Local path or gs://bucket/path to write the snapshot to")
+    parser.add_argument("--project", help="GCP project ID")
+    parser.add_argument("--dataset", default="rules_engine", help="Dataset of the default rules table")
+    parser.add_argument("--table", action="append", default=[], help="rules_definition style table")
+    args = parser.parse_args(argv)
+
+    bq = BigQueryConnector(project_id=args.project, dataset_id=args.dataset)
+    snapshot = build_snapshot(bq, args.table)
+
+    storage_client = None
+    if args.output.startswith("gs://"):
+        from google.cloud import storage
+
+        storage_client = storage.Client(project=args.project)
+    open_source(args.output, storage_client).write(snapshot.to_bytes())
+
+    print(f"Wrote rules snapshot {snapshot.version} with {len(snapshot)} rules to {args.output}")
+    return snapshot
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,497 @@
+"""
+Set-based SQL script generator.
+Turns the rule definitions into a static SQL script that runs every rule once
+and writes all of its violations with a single INSERT ... SELECT, replacing
+the per-row loop of docs/rules_engine.sql. With ``--single-scan``, rules on
+the same table are instead evaluated together in one scan of that table,
+replacing the per-rule loop of docs/wow_implementation.sql.
+
+Usage:
+    python -m rules_engine.utils.sql_script rules.sql --dataset my-project.rules_engine \
+        --source-table my-project.sales.transactions
+
+    python -m rules_engine.utils.sql_script rules.sql --single-scan \
+        --gsheet-table my-project.adp_control_data.ext_gsheet_rules_definition \
+        --target-table my-project.adp_control_data.rules_engine_violations
+"""
+
+import argparse
+import logging
+import re
+from datetime import datetime, timezone
+
+from rules_engine.connectors.bigquery_connector import BigQueryConnector
+
+logger = logging.getLogger("rules_engine")
+
+# Single-table rules that can share a scan: SELECT <columns> FROM <table> WHERE <predicate>
+_SIMPLE_RULE = re.compile(
+    r"^SELECT\s+(?P<columns>.+?)\s+FROM\s+(?P<table>`[^`]+`|[\w.-]+)\s+WHERE\s+(?P<predicate>.+)$",
+    re.IGNORECASE | re.DOTALL,
+)
+_COLUMN_LIST = re.compile(r"^\*$|^\w+(\s*,\s*\w+)*$")
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+# Clauses that make a rule more than a filter over one table
+_COMPLEX_CLAUSE = re.compile(
+    r"\b(SELECT|FROM|JOIN|GROUP|ORDER|LIMIT|HAVING|QUALIFY|UNION|EXCEPT|INTERSECT|WINDOW|OVER)\b",
+    re.IGNORECASE,
+)
+
+# Queries starting with these keywords are complete statements returning the
+# violating rows; anything else is a predicate over the source table
+_STATEMENT = re.compile(r"^\s*(\(\s*)*(SELECT|WITH)\b", re.IGNORECASE)
+
+# Violating rows kept per rule in single-scan output, so each rule's array
+# stays far below BigQuery's row size limit however many rows violate it
+DEFAULT_SCAN_MAX_ROWS = 1000
+
+
+class Dialect:
+    """SQL syntax differences between BigQuery and the local stand-in."""
+
+    def __init__(self, name, quote, string, string_type, uuid, timestamp, row_json, to_json,
+                 collect, count_if, collect_if, record, row_alias):
+        """
+        Initialize a dialect.
+
+        Args:
+            name (str): Dialect name
+            quote (callable): Quotes a table name
+            string (callable): Formats a string literal
+            string_type (str): Name of the string type
+            uuid (str): Expression generating a random UUID
+            timestamp (str): Expression for the current timestamp
+            row_json (str): Expression serializing row ``t`` as a JSON string
+            to_json (callable): Serializes an expression as a JSON string
+            collect (callable): Aggregates a value over all rows into an
+                array, optionally limited in length
+            count_if (callable): Counts the rows matching a predicate
+            collect_if (callable): Aggregates a value over the rows matching a
+                predicate into an array, optionally limited in length
+            record (callable): Builds a struct from (name, expression) pairs
+            row_alias (str): Alias naming the element ``r`` of an UNNEST
+        """
+        self.name = name
+        self.quote = quote
+        self.string = string
+        self.string_type = string_type
+        self.uuid = uuid
+        self.timestamp = timestamp
+        self.row_json = row_json
+        self.to_json = to_json
+        self.collect = collect
+        self.count_if = count_if
+        self.collect_if = collect_if
+        self.record = record
+        self.row_alias = row_alias
+
+
+def _bigquery_string(value):
+    """BigQuery string literal."""
+    escaped = str(value).replace("\\", "\\\\").replace("'", "\\'").replace("\n", "\\n")
+    return f"'{escaped}'"
+
+
+def _standard_string(value):
+    """Standard SQL string literal."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+DIALECTS = {
+    "bigquery": Dialect(
+        "bigquery",
+        quote=lambda table: f"`{table}`",
+        string=_bigquery_string,
+        string_type="STRING",
+        uuid="GENERATE_UUID()",
+        timestamp="CURRENT_TIMESTAMP()",
+        row_json="TO_JSON_STRING(t)",
+        to_json=lambda expression: f"TO_JSON_STRING({expression})",
+        collect=lambda value, limit=None: f"ARRAY_AGG({value}{f' LIMIT {limit}' if limit else ''})",
+        count_if=lambda predicate: f"COUNTIF({predicate})",
+        collect_if=lambda predicate, value, limit=None: (
+            f"ARRAY_AGG(IF({predicate}, {value}, NULL) IGNORE NULLS{f' LIMIT {limit}' if limit else ''})"
+        ),
+        record=lambda fields: "STRUCT(" + ", ".join(f"{value} AS {name}" for name, value in fields) + ")",
+        row_alias="r",
+    ),
+    # Used to validate generated scripts locally
+    "duckdb": Dialect(
+        "duckdb",
+        quote=lambda table: ".".join(f'"{part}"' for part in table.split(".")),
+        string=_standard_string,
+        string_type="VARCHAR",
+        uuid="CAST(gen_random_uuid() AS VARCHAR)",
+        timestamp="CURRENT_TIMESTAMP",
+        row_json="CAST(to_json(t) AS VARCHAR)",
+        to_json=lambda expression: f"CAST(to_json({expression}) AS VARCHAR)",
+        collect=lambda value, limit=None: f"list_slice(list({value}), 1, {limit})" if limit else f"list({value})",
+        count_if=lambda predicate: f"count_if({predicate})",
+        collect_if=lambda predicate, value, limit=None: (
+            f"list_slice(list({value}) FILTER (WHERE {predicate}), 1, {limit})"
+            if limit else f"list({value}) FILTER (WHERE {predicate})"
+        ),
+        record=lambda fields: "{" + ", ".join(f"'{name}': {value}" for name, value in fields) + "}",
+        row_alias="u(r)",
+    ),
+}
+
+
+def runnable_rules(rules):
+    """
+    Drop rules without a query, which cannot be turned into statements.
+
+    Args:
+        rules (list): Rule objects
+
+    Returns:
+        list: Rules with a query, in order
+    """
+    runnable = []
+    for rule in rules:
+        if rule.is_empty:
+            logger.error(f"Rule {rule.rule_number} has no query and will be skipped")
+        else:
+            runnable.append(rule)
+    return runnable
+
+
+def rule_select(rule, dialect, source_table=None):
+    """
+    SELECT statement returning the rows that violate a rule.
+
+    Args:
+        rule (Rule): The rule
+        dialect (Dialect): Target dialect
+        source_table (str, optional): Table predicate rules are applied to
+
+    Returns:
+        str: The statement, without a trailing semicolon
+
+    Raises:
+        ValueError: If the rule is a predicate and no source table is given
+    """
+    query = rule.rule_query.strip().rstrip(";").strip()
+    if _STATEMENT.match(query):
+        return query
+    if source_table is None:
+        raise ValueError(f"Rule {rule.rule_number} is a predicate; a source table is required")
+    return f"SELECT * FROM {dialect.quote(source_table)} WHERE {query}"
+
+
+def rule_insert(rule, dataset, dialect, source_table=None):
+    """
+    Statement writing every violation of a rule in one set-based insert.
+
+    Args:
+        rule (Rule): The rule
+        dataset (str): Dataset holding the rule_violations table
+        dialect (Dialect): Target dialect
+        source_table (str, optional): Table predicate rules are applied to
+
+    Returns:
+        str: INSERT ... SELECT statement
+    """
+    select = "\n".join("  " + line for line in rule_select(rule, dialect, source_table).splitlines())
+    return (
+        f"-- {rule.rule_number}: {' '.join(str(rule.rule_description).split())}\n"
+        f"INSERT INTO {dialect.quote(dataset + '.rule_violations')} (\n"
+        "  violation_id, rule_number, rule_description, violation_timestamp, violation_details\n"
+        ")\n"
+        "SELECT\n"
+        f"  {dialect.uuid},\n"
+        f"  {dialect.string(rule.rule_number)},\n"
+        f"  {dialect.string(rule.rule_description)},\n"
+        f"  {dialect.timestamp},\n"
+        f"  {dialect.row_json}\n"
+        "FROM (\n"
+        f"{select}\n"
+        ") AS t;\n"
+    )
+
+
+def rule_statements(rules, dataset, dialect="bigquery", source_table=None):
+    """
+    One set-based statement per rule, skipping rules without a query.
+
+    Args:
+        rules (list): Rule objects
+        dataset (str): Dataset holding the rule_violations table
+        dialect (str, optional): ``"bigquery"`` or ``"duckdb"``
+        source_table (str, optional): Table predicate rules are applied to
+
+    Returns:
+        list: (rule_number, statement) pairs
+    """
+    target = DIALECTS[dialect]
+    return [(rule.rule_number, rule_insert(rule, dataset, target, source_table)) for rule in runnable_rules(rules)]
+
+
+def generate_script(rules, dataset, dialect="bigquery", source_table=None):
+    """
+    Generate the script running every rule once.
+
+    Args:
+        rules (list): Rule objects
+        dataset (str): Dataset holding the rule_violations table
+        dialect (str, optional): ``"bigquery"`` or ``"duckdb"``
+        source_table (str, optional): Table predicate rules are applied to
+
+    Returns:
+        str: The SQL script
+    """
+    rules = runnable_rules(rules)
+    statements = [statement for _, statement in rule_statements(rules, dataset, dialect, source_table)]
+    header = (
+        "-- Rules Engine set-based script\n"
+        f"-- Generated by rules_engine.utils.sql_script on {datetime.now(timezone.utc).isoformat()}\n"
+        f"-- {len(rules)} rules; each runs once and writes all of its violations in one INSERT.\n"
+    )
+    return header + "\n" + "\n".join(statements)
+
+
+def simple_rule(rule, source_table=None):
+    """
+    Split a rule that filters a single table into its parts.
+
+    Args:
+        rule (Rule): The rule
+        source_table (str, optional): Table predicate rules are applied to
+
+    Returns:
+        tuple: Table name, selected columns (None for ``*``) and predicate, or
+        None if the rule does anything beyond filtering one table
+    """
+    query = rule.rule_query.strip().rstrip(";").strip()
+    if _STATEMENT.match(query):
+        match = _SIMPLE_RULE.match(query)
+        if match is None:
+            return None
+        table = match.group("table").strip("`")
+        columns = match.group("columns").strip()
+        predicate = match.group("predicate")
+        if not _COLUMN_LIST.match(columns):
+            return None
+        columns = None if columns == "*" else [column.strip() for column in columns.split(",")]
+    elif source_table is not None:
+        table, columns, predicate = source_table, None, query
+    else:
+        return None
+
+    if _COMPLEX_CLAUSE.search(_STRING_LITERAL.sub("''", predicate)):
+        return None
+    return table, columns, predicate
+
+
+def table_scan(table, rules, target_table, dialect, max_rows=None):
+    """
+    Statement evaluating several rules in one scan of their table.
+
+    Every rule contributes a conditional count and a conditional array of its
+    violating rows to a single aggregate over the table; the one-row result
+    is then fanned out into one violations row per rule with violations.
+
+    Args:
+        table (str): Table the rules filter
+        rules (list): (rule, columns, predicate) tuples from ``simple_rule``
+        target_table (str): Table with alert, keys, data and insert_ts columns
+        dialect (Dialect): Target dialect
+        max_rows (int, optional): Maximum violating rows kept per rule
+
+    Returns:
+        str: INSERT ... SELECT statement
+    """
+    aggregates = []
+    outputs = []
+    for index, (rule, columns, predicate) in enumerate(rules):
+        value = "b" if columns is None else dialect.record([(column, f"b.{column}") for column in columns])
+        predicate = " ".join(predicate.split())
+        aggregates.append(f"    -- {rule.rule_number}\n    {dialect.count_if(predicate)} AS rule_{index}_count")
+        aggregates.append(f"    {dialect.collect_if(predicate, value, max_rows)} AS rule_{index}_rows")
+        outputs.append("    " + dialect.record([
+            ("alert", dialect.string(rule.rule_description)),
+            ("violations", f"rule_{index}_count"),
+            ("data", dialect.to_json(f"rule_{index}_rows")),
+        ]))
+
+    return (
+        f"-- {len(rules)} rules in one scan of {table}\n"
+        f"INSERT INTO {dialect.quote(target_table)} (alert, keys, data, insert_ts)\n"
+        "WITH FRAMEWORK_BASE AS (\n"
+        "  SELECT\n"
+        + ",\n".join(aggregates) + "\n"
+        f"  FROM {dialect.quote(table)} AS b\n"
+        ")\n"
+        f"SELECT r.alert, CAST(NULL AS {dialect.string_type}), r.data, {dialect.timestamp}\n"
+        "FROM FRAMEWORK_BASE, UNNEST([\n"
+        + ",\n".join(outputs) + "\n"
+        f"]) AS {dialect.row_alias}\n"
+        "WHERE r.violations > 0;\n"
+    )
+
+
+def standalone_scan(rule, target_table, dialect, source_table=None, max_rows=None):
+    """
+    Statement running a rule that cannot share a scan on its own.
+
+    Args:
+        rule (Rule): The rule
+        target_table (str): Table with alert, keys, data and insert_ts columns
+        dialect (Dialect): Target dialect
+        source_table (str, optional): Table predicate rules are applied to
+        max_rows (int, optional): Maximum violating rows kept
+
+    Returns:
+        str: INSERT ... SELECT statement
+    """
+    select = "\n".join("  " + line for line in rule_select(rule, dialect, source_table).splitlines())
+    return (
+        f"-- {rule.rule_number}: runs on its own\n"
+        f"INSERT INTO {dialect.quote(target_table)} (alert, keys, data, insert_ts)\n"
+        f"SELECT {dialect.string(rule.rule_description)}, CAST(NULL AS {dialect.string_type}), "
+        f"{dialect.to_json(dialect.collect('b', max_rows))}, {dialect.timestamp}\n"
+        "FROM (\n"
+        f"{select}\n"
+        ") AS b\n"
+        "HAVING COUNT(*) > 0;\n"
+    )
+
+
+def scan_statements(rules, target_table, dialect="bigquery", source_table=None, max_rows=DEFAULT_SCAN_MAX_ROWS):
+    """
+    One statement per source table for the rules sharing its scan, plus one
+    per remaining rule. Rules without a query are skipped.
+
+    Args:
+        rules (list): Rule objects
+        target_table (str): Table with alert, keys, data and insert_ts columns
+        dialect (str, optional): ``"bigquery"`` or ``"duckdb"``
+        source_table (str, optional): Table predicate rules are applied to
+        max_rows (int, optional): Maximum violating rows kept per rule;
+            None or 0 keeps every row
+
+    Returns:
+        list: (label, statement) pairs, labelled with the rule number, or
+        the comma-separated rule numbers a shared scan covers
+    """
+    target = DIALECTS[dialect]
+    tables = {}
+    standalone = []
+    for rule in runnable_rules(rules):
+        parts = simple_rule(rule, source_table)
+        if parts is None:
+            standalone.append(rule)
+        else:
+            table, columns, predicate = parts
+            tables.setdefault(table, []).append((rule, columns, predicate))
+
+    statements = []
+    for table, grouped in tables.items():
+        label = ",".join(str(rule.rule_number) for rule, _, _ in grouped)
+        statements.append((label, table_scan(table, grouped, target_table, target, max_rows)))
+    statements += [
+        (rule.rule_number, standalone_scan(rule, target_table, target, source_table, max_rows))
+        for rule in standalone
+    ]
+    return statements
+
+
+def generate_scan_script(rules, target_table, dialect="bigquery", source_table=None, max_rows=DEFAULT_SCAN_MAX_ROWS):
+    """
+    Generate a script that scans each source table once for all of its rules.
+
+    Rules that only filter one table (``SELECT <columns> FROM <table> WHERE
+    <predicate>``, or a bare predicate on ``source_table``) are grouped by
+    table, so N rules on a table cost one scan instead of N. Other rules run
+    on their own. Output rows match docs/wow_implementation.sql: one row per
+    violated rule with its description as ``alert`` and the violating rows as
+    a JSON array in ``data``.
+
+    Args:
+        rules (list): Rule objects
+        target_table (str): Table with alert, keys, data and insert_ts columns
+        dialect (str, optional): ``"bigquery"`` or ``"duckdb"``
+        source_table (str, optional): Table predicate rules are applied to
+        max_rows (int, optional): Maximum violating rows kept per rule;
+            None or 0 keeps every row
+
+    Returns:
+        str: The SQL script
+    """
+    rules = runnable_rules(rules)
+    statements = scan_statements(rules, target_table, dialect, source_table, max_rows)
+    standalone = sum(1 for rule in rules if simple_rule(rule, source_table) is None)
+    shared = len(statements) - standalone
+    header = (
+        "-- Rules Engine single-scan script\n"
+        f"-- Generated by rules_engine.utils.sql_script on {datetime.now(timezone.utc).isoformat()}\n"
+        f"-- {len(rules)} rules; {len(rules) - standalone} share {shared} table scans, "
+        f"{standalone} run on their own.\n"
+    )
+    return header + "\n" + "\n".join(statement for _, statement in statements)
+
+
+def main(argv=None):
+    """
+    Generate the script from the rules in BigQuery, or run its statements.
+
+    Args:
+        argv (list, optional): Command line arguments
+
+    Returns:
+        str or list: The generated script, or one RuleQueryResult per
+        statement with ``--execute``
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("output", nargs="?", help="File to write the script to")
+    parser.add_argument("--project", help="GCP project ID")
+    parser.add_argument("--dataset", default="rules_engine", help="Dataset with the rules and violations tables")
+    parser.add_argument("--table", help="rules_definition style table; defaults to DATASET.rules_definition")
+    parser.add_argument("--gsheet-table", help="Google Sheet backed rules table to read instead")
+    parser.add_argument("--source-table", help="Table predicate rules are applied to")
+    parser.add_argument("--dialect", default="bigquery", choices=sorted(DIALECTS))
+    parser.add_argument("--single-scan", action="store_true", help="Evaluate all rules on a table in one scan")
+    parser.add_argument(
+        "--target-table",
+        help="Violations table (alert, keys, data, insert_ts) for --single-scan; "
+        "defaults to DATASET.rules_engine_violations",
+    )
+    parser.add_argument(
+        "--max-rows", type=int, default=DEFAULT_SCAN_MAX_ROWS,
+        help="Maximum violating rows kept per rule with --single-scan; 0 keeps every row",
+    )
+    parser.add_argument("--execute", action="store_true", help="Run the statements as concurrent jobs instead")
+    parser.add_argument("--concurrency", type=int, default=8, help="Maximum concurrent jobs with --execute")
+    args = parser.parse_args(argv)
+    if not args.execute and not args.output:
+        parser.error("an output file is required unless --execute is given")
+    target_table = args.target_table or f"{args.dataset}.rules_engine_violations"
+
+    bq = BigQueryConnector(project_id=args.project, dataset_id=args.dataset)
+    if args.gsheet_table:
+        rules = bq.query_rules(args.gsheet_table, "gsheet")
+    else:
+        rules = bq.query_rules(args.table)
+
+    if args.execute:
+        if args.single_scan:
+            statements = scan_statements(rules, target_table, "bigquery", args.source_table, args.max_rows)
+        else:
+            statements = rule_statements(rules, args.dataset, "bigquery", args.source_table)
+        results = bq.run_rule_queries(statements, args.concurrency)
+        for result in results:
+            print(result)
+        return results
+
+    if args.single_scan:
+        script = generate_scan_script(rules, target_table, args.dialect, args.source_table, args.max_rows)
+    else:
+        script = generate_script(rules, args.dataset, args.dialect, args.source_table)
+    with open(args.output, "w") as handle:
+        handle.write(script)
+    print(f"Wrote {len(rules)} rules to {args.output}")
+    return script
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+Unit tests for the BigQueryConnector.
+Tests rule loading, caching and violation writes with a mocked BigQuery client.
+"""
+
+import json
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+from google.api_core import exceptions
+from google.cloud import bigquery
+from unittest.mock import MagicMock
+from rules_engine.connectors.bigquery_connector import (
+    ROW_OVERHEAD_BYTES, BigQueryConnector, json_size, source_id, split_rows, violation_id,
+)
+from rules_engine.connectors.rules_cache import RulesCache
+from rules_engine.models.violation_batch import ViolationBatch
+
+MODIFIED = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def make_client(rules=(("R1", "Age check", "age < 18"),)):
+    """BigQuery client mock returning the given rule rows."""
+    client = MagicMock()
+    client.project = "test-project"
+    client.get_table.return_value = SimpleNamespace(modified=MODIFIED)
+    client.query.return_value.result.return_value = [
+        SimpleNamespace(rule_number=number, rule_description=description, rule_query=query)
+        for number, description, query in rules
+    ]
+    return client
+
+@pytest.fixture
+def clock():
+    """Clock for the rules cache."""
+    return FakeClock()
+
+@pytest.fixture
+def cache(clock):
+    """Empty rules cache driven by the fake clock."""
+    return RulesCache(clock=clock)
+
+def test_get_rules_builds_rules(cache):
+    """Test that rule rows are turned into Rule objects."""
+    connector = BigQueryConnector(client=make_client())
+
+    rules = connector.get_rules(cache=cache, ttl=60)
+
+    assert [(r.rule_number, r.rule_description, r.rule_query) for r in rules] == [("R1", "Age check", "age < 18")]
+    assert connector.rules_version == MODIFIED
+
+def test_get_rules_served_from_cache_within_ttl(cache, clock):
+    """Test that no BigQuery call is made while the TTL has not expired."""
+    client = make_client()
+    BigQueryConnector(client=client).get_rules(cache=cache, ttl=60)
+    clock.now += 59
+
+    rules = BigQueryConnector(client=client).get_rules(cache=cache, ttl=60)
+
+    assert len(rules) == 1
+    client.query.assert_called_once()
+    client.get_table.assert_called_once()
+    assert cache.info() == {"hits": 1, "reloads": 1, "stale_serves": 0}
+
+def test_get_rules_only_checks_version_when_unchanged(cache, clock):
+    """Test that an expired entry is revalidated without querying the rules."""
+    client = make_client()
+    first = BigQueryConnector(client=client).get_rules(cache=cache, ttl=60)
+    clock.now += 61
+
+    second = BigQueryConnector(client=client).get_rules(cache=cache, ttl=60)
+
+    assert second == first
+    assert client.get_table.call_count == 2
+    client.query.assert_called_once()
+
+    # Revalidation restarts the TTL
+    clock.now += 30
+    BigQueryConnector(client=client).get_rules(cache=cache, ttl=60)
+    assert client.get_table.call_count == 2
+
+def test_get_rules_reloads_when_table_changes(cache, clock):
+    """Test that rules are queried again when the table was modified."""
+    client = make_client()
+    connector = BigQueryConnector(client=client)
+    connector.get_rules(cache=cache, ttl=60)
+    clock.now += 61
+    modified = datetime(2024, 2, 1, tzinfo=timezone.utc)
+    client.get_table.return_value = SimpleNamespace(modified=modified)
+    client.query.return_value.result.return_value = [
+        SimpleNamespace(rule_number="R2", rule_description="Status check", rule_query="status == 'X'")
+    ]
+
+    rules = connector.get_rules(cache=cache, ttl=60)
+
+    assert [r.rule_number for r in rules] == ["R2"]
+    assert connector.rules_version == modified
+    assert client.query.call_count == 2
+
+def test_get_rules_serves_stale_rules_when_refresh_fails(cache, clock):
+    """Test that cached rules are used if BigQuery cannot be reached."""
+    client = make_client()
+    connector = BigQueryConnector(client=client)
+    connector.get_rules(cache=cache, ttl=60)
+    clock.now += 61
+    client.get_table.side_effect = RuntimeError("backend error")
+
+    rules = connector.get_rules(cache=cache, ttl=60)
+
+    assert [r.rule_number for r in rules] == ["R1"]
+    assert cache.info()["stale_serves"] == 1
+
+    # The failed refresh backs off for another TTL
+    clock.now += 30
+    connector.get_rules(cache=cache, ttl=60)
+    assert client.get_table.call_count == 2
+
+def test_get_rules_raises_without_cached_rules(cache):
+    """Test that a failure on the first load is not hidden."""
+    client = make_client()
+    client.query.side_effect = RuntimeError("backend error")
+
+    with pytest.raises(RuntimeError):
+        BigQueryConnector(client=client).get_rules(cache=cache, ttl=60)
+
+def test_get_rules_version_column(monkeypatch, cache):
+    """Test that a configured version column replaces the table timestamp."""
+    monkeypatch.setattr("rules_engine.config.settings.RULES_VERSION_COLUMN", "updated_at")
+    client = make_client()
+    version_job = MagicMock()
+    version_job.result.return_value = [SimpleNamespace(version=7)]
+    rules_job = client.query.return_value
+    client.query.side_effect = [version_job, rules_job]
+    connector = BigQueryConnector(client=client)
+
+    connector.get_rules(cache=cache, ttl=60)
+
+    assert connector.rules_version == 7
+    assert "MAX(updated_at)" in client.query.call_args_list[0].args[0]
+    client.get_table.assert_not_called()
+
+def test_rule_tables_are_cached_separately(cache):
+    """Test that datasets do not share cached rules."""
+    client = make_client()
+    BigQueryConnector(dataset_id="a", client=client).get_rules(cache=cache, ttl=60)
+    BigQueryConnector(dataset_id="b", client=client).get_rules(cache=cache, ttl=60)
+
+    assert client.query.call_count == 2
+
+def make_batches(count, details='{"id":1,"note":"a \\"quoted\\" value"}'):
+    """Two violation batches with ``count`` violations in total."""
+    first = count // 2
+    return [
+        ViolationBatch("R1", "First rule", range(first), [details] * first),
+        ViolationBatch("R2", "Second rule", range(count - first), [details] * (count - first)),
+    ]
+
+def test_json_size_matches_encoding():
+    """Test that encoded field sizes are computed exactly for ASCII values."""
+    for value in ['plain', 'with "quotes"', 'back\\slash', '{"a":"b\\"c"}', 12345, None, 1.5]:
+        assert json_size(value) == len(json.dumps(value))
+
+def test_log_violations_splits_by_row_count(monkeypatch):
+    """Test that streaming inserts respect the per-request row limit."""
+    monkeypatch.setattr("rules_engine.config.settings.INSERT_BATCH_ROWS", 4)
+    client = make_client()
+    client.insert_rows_json.return_value = []
+
+    BigQueryConnector(client=client).log_violations(make_batches(10))
+
+    sizes = [len(call.args[1]) for call in client.insert_rows_json.call_args_list]
+    assert sizes == [4, 4, 2]
+    rows = [row for call in client.insert_rows_json.call_args_list for row in call.args[1]]
+    assert [(row["rule_number"], row["row_number"]) for row in rows[4:7]] == [("R1", 4), ("R2", 0), ("R2", 1)]
+    client.load_table_from_file.assert_not_called()
+
+def test_log_violations_raises_on_rejected_rows(monkeypatch):
+    """Test that schema errors, e.g. a missing row_number column, fail the write."""
+    monkeypatch.setattr("rules_engine.config.settings.INSERT_BATCH_ROWS", 4)
+    client = make_client()
+    client.insert_rows_json.return_value = [{"index": 0, "errors": [{"message": "no such field: row_number."}]}]
+
+    with pytest.raises(RuntimeError, match="rejected 1 of 4 rows"):
+        BigQueryConnector(client=client).log_violations(make_batches(10))
+
+    assert client.insert_rows_json.call_count == 1
+
+def test_log_violations_splits_by_bytes(monkeypatch):
+    """Test that no streaming insert request exceeds the byte limit."""
+    monkeypatch.setattr("rules_engine.config.settings.INSERT_BATCH_BYTES", 2000)
+    client = make_client()
+    client.insert_rows_json.return_value = []
+
+    BigQueryConnector(client=client).log_violations(make_batches(50))
+
+    chunks = [call.args[1] for call in client.insert_rows_json.call_args_list]
+    assert sum(len(chunk) for chunk in chunks) == 50
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert len(json.dumps(chunk)) + ROW_OVERHEAD_BYTES * len(chunk) <= 2000
+
+def test_split_rows_sends_oversized_row_alone():
+    """Test that a row above the byte limit still gets written."""
+    rows = [{"details": "x" * 300}, {"details": "y"}, {"details": "z"}]
+
+    chunks = list(split_rows(rows, max_rows=10, max_bytes=200))
+
+    assert [len(chunk) for chunk in chunks] == [1, 2]
+
+def test_log_violations_uses_load_job_above_threshold(monkeypatch):
+    """Test that large volumes are written as newline-delimited JSON in one load job."""
+    monkeypatch.setattr("rules_engine.config.settings.LOAD_JOB_THRESHOLD_ROWS", 5)
+    client = make_client()
+    loaded = {}
+
+    def load_table_from_file(file_obj, destination, rewind=False, job_config=None):
+        if rewind:
+            file_obj.seek(0)
+        loaded["data"] = file_obj.read()
+        loaded["destination"] = destination
+        loaded["config"] = job_config
+        return MagicMock()
+
+    client.load_table_from_file.side_effect = load_table_from_file
+
+    BigQueryConnector(client=client).log_violations(make_batches(6))
+
+    client.insert_rows_json.assert_not_called()
+    rows = [json.loads(line) for line in loaded["data"].decode().splitlines()]
+    assert [row["row_number"] for row in rows] == [0, 1, 2, 0, 1, 2]
+    assert rows[0]["violation_details"] == '{"id":1,"note":"a \\"quoted\\" value"}'
+    assert loaded["destination"] == "rules_engine.rule_violations"
+    assert loaded["config"].source_format == bigquery.SourceFormat.NEWLINE_DELIMITED_JSON
+    assert loaded["config"].write_disposition == bigquery.WriteDisposition.WRITE_APPEND
+
+def test_failed_load_job_raises(monkeypatch):
+    """Test that a failed load job fails the write like rejected inserts do."""
+    monkeypatch.setattr("rules_engine.config.settings.LOAD_JOB_THRESHOLD_ROWS", 5)
+    client = make_client()
+    client.load_table_from_file.return_value.result.side_effect = exceptions.BadRequest("no such field: row_number")
+
+    with pytest.raises(exceptions.BadRequest, match="row_number"):
+        BigQueryConnector(client=client).log_violations(make_batches(6))
+
+def test_log_violations_skips_empty_batches():
+    """Test that nothing is written when there are no violations."""
+    client = make_client()
+    BigQueryConnector(client=client).log_violations([ViolationBatch.empty("R1", "d")])
+
+    client.insert_rows_json.assert_not_called()
+    client.load_table_from_file.assert_not_called()
+
+def test_violation_ids_are_deterministic_per_object_version():
+    """Test that reprocessing the same object version reproduces the IDs."""
+    source = source_id("bucket", "data/file.csv", "1700000000000001")
+    connector = BigQueryConnector(client=make_client())
+
+    first = [row["violation_id"] for row in connector.violation_rows(make_batches(6), source)]
+    second = [row["violation_id"] for row in connector.violation_rows(make_batches(6), source)]
+    other = [
+        row["violation_id"]
+        for row in connector.violation_rows(make_batches(6), source_id("bucket", "data/file.csv", "2"))
+    ]
+
+    assert first == second
+    assert len(set(first)) == 6
+    assert not set(first) & set(other)
+    assert first[0] == violation_id(source, "R1", 0)
+
+def test_violation_ids_are_random_without_source():
+    """Test that rows without a known object version get unique random IDs."""
+    connector = BigQueryConnector(client=make_client())
+
+    first = [row["violation_id"] for row in connector.violation_rows(make_batches(4))]
+    second = [row["violation_id"] for row in connector.violation_rows(make_batches(4))]
+
+    assert not set(first) & set(second)
+
+def test_violation_ids_are_sent_as_insert_ids():
+    """Test that streamed rows use their violation IDs for deduplication."""
+    client = make_client()
+    client.insert_rows_json.return_value = []
+
+    BigQueryConnector(client=client).log_violations(make_batches(4), source_id("b", "f.csv", 1))
+
+    call = client.insert_rows_json.call_args
+    assert call.kwargs["row_ids"] == [row["violation_id"] for row in call.args[1]]
+
+def test_violation_rows_limit_detail_columns(monkeypatch):
+    """Test that lazy batches are serialized with the configured columns only."""
+    monkeypatch.setattr("rules_engine.config.settings.DETAIL_COLUMNS", ("id",))
+    frame = pd.DataFrame({"id": [7, 8], "amount": [-1, 2]})
+    batch = ViolationBatch.lazy("R1", "Negative", frame, [0])
+
+    [row] = BigQueryConnector(client=make_client()).violation_rows([batch])
+
+    assert row["violation_details"] == '{"id":7}'
+    assert row["row_number"] == 0
+
+def test_query_rules_reads_optional_output_modes():
+    """Test that output mode columns are used when the rules table has them."""
+    client = make_client()
+    client.query.return_value.result.return_value = [
+        SimpleNamespace(rule_number="R1", rule_description="d", rule_query="a < 0", output_mode="sample", sample_size=5),
+        SimpleNamespace(rule_number="R2", rule_description="d", rule_query="a > 0"),
+    ]
+
+    rules = BigQueryConnector(client=client).query_rules()
+
+    assert [(rule.output_mode, rule.sample_size) for rule in rules] == [("sample", 5), ("all", None)]
+
+def test_violation_summaries_have_no_row_number():
+    """Test that summaries are written as one row per rule with stable IDs."""
+    client = make_client()
+    client.insert_rows_json.return_value = []
+    summary = {"rule_number": "R1", "rule_description": "d", "output_mode": "count", "violation_count": 7, "rows_written": 0}
+
+    BigQueryConnector(client=client).log_violation_summaries([summary], source="gs://b/f#1")
+
+    [row] = client.insert_rows_json.call_args.args[1]
+    assert row["row_number"] is None
+    assert json.loads(row["violation_details"]) == {"output_mode": "count", "violation_count": 7, "rows_written": 0}
+    assert row["violation_id"] == violation_id("gs://b/f#1", "R1", "summary")
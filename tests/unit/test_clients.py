@@ -0,0 +1,65 @@
+"""
+Unit tests for the shared Google Cloud clients.
+Tests that clients are created lazily, once per process.
+"""
+
+import threading
+
+import pytest
+from unittest.mock import MagicMock, patch
+from rules_engine.connectors import clients
+
+@pytest.fixture(autouse=True)
+def fresh_clients():
+    """Start and end every test without shared clients."""
+    clients.reset_clients()
+    with patch("rules_engine.connectors.clients.google.auth.default") as default:
+        default.return_value = (MagicMock(), "test-project")
+        yield default
+    clients.reset_clients()
+
+@patch("rules_engine.connectors.clients.bigquery.Client")
+@patch("rules_engine.connectors.clients.storage.Client")
+def test_clients_are_created_once(mock_storage, mock_bigquery, fresh_clients):
+    """Test that repeated invocations reuse the same clients and session."""
+    for _ in range(3):
+        storage_client = clients.get_storage_client()
+        bigquery_client = clients.get_bigquery_client()
+
+    assert storage_client is mock_storage.return_value
+    assert bigquery_client is mock_bigquery.return_value
+    mock_storage.assert_called_once()
+    mock_bigquery.assert_called_once()
+    fresh_clients.assert_called_once()
+
+    session = clients.get_http_session()
+    assert mock_storage.call_args.kwargs["_http"] is session
+    assert mock_bigquery.call_args.kwargs["_http"] is session
+    assert mock_storage.call_args.kwargs["project"] == "test-project"
+
+@patch("rules_engine.connectors.clients.storage.Client")
+def test_concurrent_first_use_creates_one_client(mock_storage):
+    """Test that threads racing on a cold instance share one client."""
+    barrier = threading.Barrier(8)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(clients.get_storage_client())
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    mock_storage.assert_called_once()
+    assert all(result is results[0] for result in results)
+
+def test_session_pool_size(monkeypatch):
+    """Test that the HTTPS adapter is sized from the settings."""
+    monkeypatch.setattr(clients.settings, "HTTP_POOL_SIZE", 5)
+
+    adapter = clients.get_http_session().get_adapter("https://storage.googleapis.com")
+
+    assert adapter._pool_maxsize == 5
@@ -0,0 +1,72 @@
+"""
+Unit tests for the rule query compiler.
+Tests compiled plans and the plan cache.
+"""
+
+import pytest
+from rules_engine.models import compiler
+from rules_engine.models.compiler import PlanCache, cache_info, clear_cache
+from rules_engine.models.rule import Rule
+
+@pytest.fixture(autouse=True)
+def empty_cache():
+    """Start every test with an empty process-wide cache."""
+    clear_cache()
+    yield
+    clear_cache()
+
+def test_warm_rules_reuse_compiled_plans():
+    """Test that recreating rules for a new invocation does not re-parse."""
+    queries = ["amount < 0", "status == 'ERROR'"]
+
+    first = [Rule("R%d" % i, "rule", query) for i, query in enumerate(queries)]
+    for rule in first:
+        rule.expression
+    second = [Rule("R%d" % i, "rule", query) for i, query in enumerate(queries)]
+    for rule in second:
+        rule.expression
+
+    assert cache_info()["misses"] == 2
+    assert cache_info()["hits"] == 2
+    assert first[0].plan is second[0].plan
+
+def test_parse_runs_once_per_query(monkeypatch):
+    """Test that a cached query is never handed to the parser again."""
+    calls = []
+    original = compiler.parse
+
+    def spy(query):
+        calls.append(query)
+        return original(query)
+
+    monkeypatch.setattr(compiler, "parse", spy)
+    cache = PlanCache()
+    cache.compile("amount < 0")
+    cache.compile("amount < 0")
+
+    assert calls == ["amount < 0"]
+
+def test_cache_evicts_least_recently_used():
+    """Test LRU eviction once the cache is full."""
+    cache = PlanCache(maxsize=2)
+    cache.compile("a < 1")
+    cache.compile("b < 1")
+    cache.compile("a < 1")
+    cache.compile("c < 1")
+
+    cache.compile("a < 1")
+    cache.compile("b < 1")
+
+    assert len(cache) == 2
+    assert cache.info()["hits"] == 2
+    assert cache.info()["misses"] == 4
+
+def test_unsupported_query_is_cached_as_fallback_plan():
+    """Test that queries needing DataFrame.eval are cached too."""
+    cache = PlanCache()
+
+    plan = cache.compile("status.str.len() > 3")
+
+    assert not plan.is_native
+    assert plan.error
+    assert cache.compile("status.str.len() > 3") is plan
@@ -0,0 +1,129 @@
+"""
+Unit tests for the rule query cost planner.
+Uses a fake client answering dry runs with fixed byte estimates.
+"""
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from google.api_core import exceptions
+from rules_engine.connectors.bigquery_connector import BigQueryConnector
+from rules_engine.connectors.cost_planner import CostPlanner, cost_rows, format_bytes
+
+GB = 1024 ** 3
+
+class FakeClient:
+    """Client estimating each query from a table of sizes."""
+
+    def __init__(self, sizes, deferred=()):
+        self.project = "test-project"
+        self.sizes = sizes
+        self.deferred = deferred
+        self.dry_runs = []
+        self.ran = []
+        self.inserted = []
+
+    def query(self, sql, job_config=None, job_id_prefix=None):
+        if "status = 'deferred'" in sql:
+            return SimpleNamespace(result=lambda: [SimpleNamespace(rule_number=number) for number in self.deferred])
+        if isinstance(self.sizes[sql], Exception):
+            raise self.sizes[sql]
+        if job_config is not None and job_config.dry_run:
+            self.dry_runs.append(sql)
+            return SimpleNamespace(total_bytes_processed=self.sizes[sql])
+        self.ran.append(sql)
+        return SimpleNamespace(
+            job_id=f"{job_id_prefix}1", result=lambda: [],
+            total_bytes_processed=self.sizes[sql] // 2, num_dml_affected_rows=1,
+        )
+
+    def insert_rows_json(self, table, rows):
+        self.inserted.append((table, rows))
+        return []
+
+QUERIES = [("R001", "big"), ("R002", "small"), ("R003", "medium"), ("R004", "broken")]
+
+SIZES = {"big": 50 * GB, "small": 1 * GB, "medium": 5 * GB, "broken": exceptions.BadRequest("Unrecognized name")}
+
+def test_format_bytes():
+    """Test that sizes are shown with binary units."""
+    assert format_bytes(512) == "512 B"
+    assert format_bytes(1536) == "1.5 KiB"
+    assert format_bytes(5 * GB) == "5.0 GiB"
+    assert format_bytes(3 * 1024 ** 5) == "3072.0 TiB"
+
+def test_plan_orders_queries_cheapest_first():
+    """Test that every query is dry-run and valid ones are ordered by bytes."""
+    client = FakeClient(SIZES)
+
+    plan = CostPlanner(client).plan(QUERIES)
+
+    assert sorted(client.dry_runs) == ["big", "medium", "small"]
+    assert plan.queries == [("R002", "small"), ("R003", "medium"), ("R001", "big")]
+    assert plan.estimated_bytes == 56 * GB
+    assert [result.estimated_bytes for result in plan.results] == [50 * GB, 1 * GB, 5 * GB, None]
+    assert plan.results[3].status == "rejected"
+    assert "Unrecognized name" in plan.results[3].error
+
+def test_plan_rejects_queries_over_the_rule_limit():
+    """Test that a single expensive rule is rejected."""
+    plan = CostPlanner(FakeClient(SIZES), max_rule_bytes=10 * GB).plan(QUERIES)
+
+    assert plan.queries == [("R002", "small"), ("R003", "medium")]
+    assert plan.results[0].status == "rejected"
+    assert "50.0 GiB exceeds the 10.0 GiB per-rule limit" in plan.results[0].error
+
+def test_plan_defers_queries_over_the_run_budget():
+    """Test that rules that no longer fit the budget are deferred."""
+    plan = CostPlanner(FakeClient(SIZES), max_total_bytes=8 * GB).plan(QUERIES)
+
+    assert plan.queries == [("R002", "small"), ("R003", "medium")]
+    assert plan.results[0].status == "deferred"
+    assert "remaining 2.0 GiB" in plan.results[0].error
+
+def test_plan_runs_previously_deferred_queries_first():
+    """Test that rules deferred by the last run get the budget before cheaper ones."""
+    plan = CostPlanner(FakeClient(SIZES), max_total_bytes=52 * GB).plan(QUERIES, priority={"R001"})
+
+    assert plan.queries == [("R001", "big"), ("R002", "small")]
+    assert plan.results[2].status == "deferred"
+
+def test_run_rule_queries_prioritizes_last_runs_deferred_rules():
+    """Test that the connector reads the deferred rules back from the costs table."""
+    client = FakeClient(SIZES, deferred=["R001"])
+
+    results = BigQueryConnector(client=client).run_rule_queries(
+        QUERIES, max_concurrency=1, max_rule_bytes=0, max_total_bytes=52 * GB
+    )
+
+    assert client.ran == ["big", "small"]
+    assert [result.status for result in results] == ["done", "done", "deferred", "rejected"]
+
+def test_run_rule_queries_records_estimates_and_actuals():
+    """Test that the connector plans, runs and records every rule."""
+    client = FakeClient(SIZES)
+    bq = BigQueryConnector(client=client)
+
+    results = bq.run_rule_queries(QUERIES, max_concurrency=1, max_rule_bytes=10 * GB, max_total_bytes=0)
+
+    assert client.ran == ["small", "medium"]
+    assert [result.status for result in results] == ["rejected", "done", "done", "rejected"]
+    assert results[2].estimated_bytes == 5 * GB and results[2].bytes_processed == 5 * GB // 2
+
+    [(table, rows)] = client.inserted
+    assert table == "rules_engine.rule_query_costs"
+    assert [row["rule_number"] for row in rows] == ["R001", "R002", "R003", "R004"]
+    assert len({row["run_id"] for row in rows}) == 1
+    assert rows[1]["estimated_bytes"] == GB and rows[1]["bytes_processed"] == GB // 2
+    assert rows[0]["bytes_processed"] is None
+
+def test_cost_rows_timestamp():
+    """Test that rows carry the given timestamp."""
+    client = FakeClient(SIZES)
+    plan = CostPlanner(client).plan(QUERIES[1:2])
+    recorded_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    [row] = cost_rows(plan.results, "run-1", recorded_at)
+
+    assert row["recorded_at"] == "2024-01-01T00:00:00+00:00"
+    assert row["status"] == "pending" and row["attempts"] == 0
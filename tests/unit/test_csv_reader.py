@@ -0,0 +1,98 @@
+"""
+Unit tests for the CSV readers.
+Tests the Arrow and pandas backends.
+"""
+
+import io
+
+import pytest
+import pandas as pd
+from rules_engine.models.violation_batch import rows_to_json
+from rules_engine.utils import csv_reader
+from rules_engine.utils.csv_reader import ArrowCSVReader, MemoryReader, PandasCSVReader, get_reader
+
+CSV = (
+    b"id,order_date,status,customer_id,amount\n"
+    b"1,2024-01-01,APPROVED,C1,10.5\n"
+    b"2,2024-01-02 10:00:00,\"PEND,ING\",,-3\n"
+    b"3,2024-01-03,,C3,\n"
+)
+
+@pytest.fixture(params=["arrow", "pandas"])
+def reader(request):
+    """Run a test against both backends."""
+    if request.param == "arrow":
+        pytest.importorskip("pyarrow")
+    return get_reader(request.param)
+
+def test_matches_pandas_read_csv(reader):
+    """Test that parsed rows serialize exactly like pandas' own parser."""
+    frame = reader.read(bytearray(CSV))
+
+    expected = pd.read_csv(io.BytesIO(CSV))
+    assert list(frame.columns) == list(expected.columns)
+    assert rows_to_json(frame) == rows_to_json(expected)
+
+def test_selected_columns_only(reader):
+    """Test that only the requested columns are parsed."""
+    frame = reader.read(CSV, columns={"amount", "id", "not_in_file"})
+
+    assert list(frame.columns) == ["id", "amount"]
+
+def test_iter_chunks(reader):
+    """Test that streamed chunks cover the file in order."""
+    chunks = list(reader.iter_chunks(io.BytesIO(CSV), columns={"id"}, chunk_rows=2))
+
+    assert [chunk["id"].tolist() for chunk in chunks] == [[1, 2], [3]]
+
+def test_arrow_strings_are_arrow_backed():
+    """Test that the Arrow backend keeps string columns in Arrow memory."""
+    pytest.importorskip("pyarrow")
+
+    frame = ArrowCSVReader().read(CSV)
+
+    assert frame["status"].dtype.storage == "pyarrow"
+    assert frame["amount"].dtype == "float64"
+
+def test_arrow_read_falls_back_when_later_rows_change_type():
+    """Test that a type change after the first block still parses."""
+    pytest.importorskip("pyarrow")
+    data = b"value\n" + b"1\n" * 1000 + b"not a number\n"
+
+    frame = ArrowCSVReader(block_size=256).read(data)
+
+    assert len(frame) == 1001
+    assert frame["value"].iloc[-1] == "not a number"
+
+def test_arrow_chunks_fall_back_without_repeating_rows():
+    """Test that a type change mid-stream continues with pandas after the last good row."""
+    pytest.importorskip("pyarrow")
+    data = b"value\n" + b"1\n" * 1000 + b"not a number\n" + b"2\n" * 10
+
+    chunks = list(ArrowCSVReader(block_size=256).iter_chunks(io.BytesIO(data), chunk_rows=100))
+
+    values = [value for chunk in chunks for value in chunk["value"].tolist()]
+    assert len(values) == 1011
+    assert values[1000] == "not a number"
+
+def test_auto_uses_pandas_without_pyarrow(monkeypatch):
+    """Test that pandas is the fallback when pyarrow is missing."""
+    monkeypatch.setattr(csv_reader, "pa", None)
+
+    assert isinstance(get_reader(), PandasCSVReader)
+    with pytest.raises(ImportError):
+        ArrowCSVReader()
+
+def test_unknown_reader():
+    """Test that an unknown reader name is rejected."""
+    with pytest.raises(ValueError):
+        get_reader("excel")
+
+def test_memory_reader_reads_without_copying():
+    """Test reading a bytearray through the file object wrapper."""
+    buffer = bytearray(b"abcdef")
+
+    with MemoryReader(buffer) as reader:
+        assert reader.read(4) == b"abcd"
+        assert reader.read() == b"ef"
+        assert reader.read() == b""
@@ -0,0 +1,53 @@
+"""
+Unit tests for rule expressions.
+Tests parsing rule queries and evaluating them against a dataframe.
+"""
+
+import pytest
+import numpy as np
+import pandas as pd
+from rules_engine.models.expression import Evaluator, UnsupportedExpression, parse
+
+@pytest.fixture
+def frame():
+    """Frame with a missing value used by the tests."""
+    return pd.DataFrame({
+        "amount": [1.0, -2.0, np.nan, 4.0],
+        "status": ["A", "B", "C", None]
+    })
+
+@pytest.mark.parametrize("query", [
+    "amount < 0",
+    "amount < 0 & status == 'B'",
+    "amount > 0 | status != 'A'",
+    "~(amount >= 1)",
+    "not amount >= 1",
+    "0 < amount <= 4",
+    "status in ['A', 'C']",
+    "status not in ('A', 'C')",
+    "status == ['A', 'C']",
+    "amount * 2 + 1 > 3",
+    "-amount > 1"
+])
+def test_mask_matches_pandas_query(frame, query):
+    """Test that native evaluation agrees with DataFrame.query."""
+    expected = frame.index.isin(frame.query(query).index)
+
+    mask = Evaluator(frame).mask(parse(query))
+
+    assert mask.tolist() == expected.tolist()
+
+def test_commuted_conditions_share_a_key():
+    """Test that operand order does not change the parsed expression."""
+    assert parse("a < 1 and b == 'x'") == parse("b == 'x' & a < 1")
+
+@pytest.mark.parametrize("query", [
+    "status.str.startswith('A')",
+    "amount > @threshold",
+    "`unit price` > 1",
+    "amount <"
+])
+def test_unsupported_queries_raise(query):
+    """Test that unsupported syntax is reported."""
+    with pytest.raises(UnsupportedExpression):
+        parse(query)
@@ -3,9 +3,14 @@ Unit tests for the GCS connector.
 Tests the GCSConnector class functionality.
 """
 
+import base64
+import threading
+import time
+
+import google_crc32c
 import pytest
 from unittest.mock import MagicMock, patch
-from rules_engine.connectors.gcs_connector import GCSConnector
+from rules_engine.connectors.gcs_connector import ChecksumMismatch, GCSConnector, IncompleteDownload
 
 @patch('rules_engine.connectors.gcs_connector.storage.Client')
 def test_read_file(mock_client):
@@ -46,3 +51,164 @@ def test_write_file(mock_client):
     mock_client.return_value.get_bucket.assert_called_once_with("test-bucket")
     mock_bucket.blob.assert_called_once_with("test-file.txt")
     mock_blob.upload_from_string.assert_called_once_with("test content")
+
+@patch('rules_engine.connectors.gcs_connector.storage.Client')
+def test_open_file(mock_client):
+    """Test opening a file in GCS for chunked reads."""
+    # Set up mocks
+    mock_bucket = MagicMock()
+    mock_blob = MagicMock()
+    mock_bucket.blob.return_value = mock_blob
+    mock_client.return_value.get_bucket.return_value = mock_bucket
+
+    # Create connector and open file
+    connector = GCSConnector()
+    reader = connector.open_file("test-bucket", "test-file.csv", chunk_size=1024)
+
+    # Assert the blob was opened for binary reads in chunks
+    mock_bucket.blob.assert_called_once_with("test-file.csv")
+    mock_blob.open.assert_called_once_with("rb", chunk_size=1024)
+    assert reader is mock_blob.open.return_value
+
+class FakeBlob:
+    """Local stand-in for a GCS blob that serves ranged downloads from memory."""
+
+    def __init__(self, data, crc32c=None, content_encoding=None):
+        """Serve the given bytes, with the CRC32C GCS would report."""
+        self.data = data
+        self.size = len(data)
+        self.generation = 7
+        self.content_encoding = content_encoding
+        self.crc32c = crc32c or base64.b64encode(google_crc32c.Checksum(data).digest()).decode()
+        self.ranges = []
+        self.dropped = 0
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def download_to_file(self, file_obj, start, end, if_generation_match, checksum):
+        """Write an inclusive byte range, tracking concurrent calls."""
+        assert if_generation_match == self.generation
+        with self.lock:
+            self.ranges.append((start, end))
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.01)
+        # Deliver the range in several writes, like a streamed response body
+        # Optionally drop the tail of each range, like a truncated response
+        for offset in range(start, end + 1 - self.dropped, 3):
+            file_obj.write(self.data[offset:min(offset + 3, end + 1 - self.dropped)])
+        with self.lock:
+            self.active -= 1
+
+    def download_as_bytes(self, if_generation_match):
+        """Return the whole object."""
+        return self.data
+
+class FakeBucket:
+    """Local stand-in for a GCS bucket holding named blobs."""
+
+    def __init__(self, blobs):
+        """Hold blobs keyed by name."""
+        self.blobs = blobs
+
+    def get_blob(self, name):
+        """Return the blob, or None if it does not exist."""
+        return self.blobs.get(name)
+
+def sliced_connector(mock_client, blob):
+    """Connector whose client serves a single fake blob."""
+    mock_client.return_value.get_bucket.return_value = FakeBucket({"big.csv": blob})
+    return GCSConnector()
+
+@patch('rules_engine.connectors.gcs_connector.storage.Client')
+def test_read_bytes_sliced(mock_client):
+    """Test that ranged slices are fetched concurrently and reassembled."""
+    data = bytes(range(256)) * 4 + b"tail"
+    blob = FakeBlob(data)
+    connector = sliced_connector(mock_client, blob)
+
+    content = connector.read_bytes_sliced("test-bucket", "big.csv", slice_size=100, max_workers=4)
+
+    assert content == data
+    assert sorted(blob.ranges) == [(start, min(start + 99, len(data) - 1)) for start in range(0, len(data), 100)]
+    assert 1 < blob.max_active <= 4
+
+@patch('rules_engine.connectors.gcs_connector.storage.Client')
+def test_read_bytes_sliced_detects_corruption(mock_client):
+    """Test that a CRC32C mismatch is reported."""
+    blob = FakeBlob(b"x" * 1000, crc32c=base64.b64encode(b"\0\0\0\0").decode())
+    connector = sliced_connector(mock_client, blob)
+
+    with pytest.raises(ChecksumMismatch):
+        connector.read_bytes_sliced("test-bucket", "big.csv", slice_size=100)
+
+@patch('rules_engine.connectors.gcs_connector.storage.Client')
+def test_read_bytes_sliced_detects_short_ranges_without_checksum(mock_client):
+    """Test that a truncated range is reported when there is no CRC32C to catch it."""
+    blob = FakeBlob(b"x" * 1000)
+    blob.crc32c = None
+    blob.dropped = 1
+    connector = sliced_connector(mock_client, blob)
+
+    with pytest.raises(IncompleteDownload, match="99 of 100 bytes"):
+        connector.read_bytes_sliced("test-bucket", "big.csv", slice_size=100)
+
+@patch('rules_engine.connectors.gcs_connector.storage.Client')
+def test_read_bytes_sliced_defaults_to_the_slice_setting(mock_client, monkeypatch):
+    """Test that the slice size comes from RULES_ENGINE_DOWNLOAD_SLICE_BYTES."""
+    monkeypatch.setattr("rules_engine.config.settings.DOWNLOAD_SLICE_BYTES", 250)
+    blob = FakeBlob(b"x" * 1000)
+    connector = sliced_connector(mock_client, blob)
+
+    connector.read_bytes_sliced("test-bucket", "big.csv")
+
+    assert sorted(blob.ranges) == [(0, 249), (250, 499), (500, 749), (750, 999)]
+
+@patch('rules_engine.connectors.gcs_connector.storage.Client')
+def test_read_bytes_sliced_gzip_is_downloaded_whole(mock_client):
+    """Test that gzip-encoded objects are not split into ranges."""
+    blob = FakeBlob(b"x" * 1000, content_encoding="gzip")
+    connector = sliced_connector(mock_client, blob)
+
+    content = connector.read_bytes_sliced("test-bucket", "big.csv", slice_size=100)
+
+    assert content == b"x" * 1000
+    assert blob.ranges == []
+
+@patch('rules_engine.connectors.gcs_connector.storage.Client')
+def test_read_bytes_sliced_missing_object(mock_client):
+    """Test that a missing object raises FileNotFoundError."""
+    connector = sliced_connector(mock_client, None)
+
+    with pytest.raises(FileNotFoundError):
+        connector.read_bytes_sliced("test-bucket", "other.csv")
+
+@patch('rules_engine.connectors.gcs_connector.storage.Client')
+def test_read_bytes(mock_client):
+    """Test reading a file from GCS without decoding it."""
+    # Set up mocks
+    mock_bucket = MagicMock()
+    mock_blob = MagicMock()
+    mock_blob.download_as_bytes.return_value = b"test content"
+    mock_bucket.blob.return_value = mock_blob
+    mock_client.return_value.get_bucket.return_value = mock_bucket
+
+    # Create connector and read file
+    connector = GCSConnector()
+    content = connector.read_bytes("test-bucket", "test-file.csv")
+
+    # Assert the raw bytes were returned
+    mock_bucket.blob.assert_called_once_with("test-file.csv")
+    mock_blob.download_as_text.assert_not_called()
+    assert content == b"test content"
+
+@patch('rules_engine.connectors.gcs_connector.storage.Client')
+def test_reuses_given_client(mock_client):
+    """Test that a shared client is used instead of creating one."""
+    shared = MagicMock()
+
+    connector = GCSConnector(shared)
+
+    assert connector.client is shared
+    mock_client.assert_not_called()
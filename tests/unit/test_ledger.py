@@ -0,0 +1,59 @@
+"""
+Unit tests for the processed object ledger.
+Tests duplicate detection in memory and through the SQLite store.
+"""
+
+from unittest.mock import MagicMock
+from rules_engine.connectors.ledger import ProcessedLedger, SQLiteLedgerStore
+
+KEY = ProcessedLedger.key("bucket", "data/file.csv", 1700000000000001, "abc123")
+
+def test_key_normalizes_generation():
+    """Test that generations from event payloads (strings) match integers."""
+    assert ProcessedLedger.key("bucket", "data/file.csv", "1700000000000001", "abc123") == KEY
+
+def test_ledger_skips_recorded_keys():
+    """Test that only recorded object versions count as duplicates."""
+    ledger = ProcessedLedger()
+
+    assert not ledger.seen(KEY)
+    ledger.record(KEY)
+    assert ledger.seen(KEY)
+    assert not ledger.seen(ProcessedLedger.key("bucket", "data/file.csv", 2, "abc123"))
+    assert not ledger.seen(ProcessedLedger.key("bucket", "data/file.csv", 1700000000000001, "new-rules"))
+
+    assert ledger.info() == {"skipped": 1, "recorded": 1, "size": 1}
+
+def test_ledger_evicts_least_recently_used_keys():
+    """Test that memory use is bounded."""
+    ledger = ProcessedLedger(max_entries=2)
+    keys = [ProcessedLedger.key("b", "f", generation, "v") for generation in range(3)]
+    for key in keys:
+        ledger.record(key)
+
+    assert not ledger.seen(keys[0])
+    assert ledger.seen(keys[2])
+
+def test_store_persists_across_ledgers(tmp_path):
+    """Test that a cold instance sees keys recorded by another instance."""
+    path = str(tmp_path / "ledger.db")
+    ProcessedLedger(SQLiteLedgerStore(path)).record(KEY)
+
+    store = SQLiteLedgerStore(path)
+    cold = ProcessedLedger(store)
+
+    assert cold.seen(KEY)
+    assert cold.info()["size"] == 1
+    store.add(KEY)
+    assert store.contains(KEY)
+
+def test_store_errors_do_not_fail_processing():
+    """Test that an unavailable store degrades to the in-memory ledger."""
+    store = MagicMock()
+    store.contains.side_effect = RuntimeError("unavailable")
+    store.add.side_effect = RuntimeError("unavailable")
+    ledger = ProcessedLedger(store)
+
+    assert not ledger.seen(KEY)
+    ledger.record(KEY)
+    assert ledger.seen(KEY)
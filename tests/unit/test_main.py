@@ -0,0 +1,156 @@
+"""
+Unit tests for the Cloud Function entry point.
+Tests processing a file end to end with mocked connectors.
+"""
+
+import io
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+import main
+from rules_engine.config import settings
+from rules_engine.connectors import ledger
+from rules_engine.models.rule import Rule
+
+CSV = "id,amount,note\n" + "".join(f"{i},{-1 if i % 3 == 0 else 1},n{i}\n" for i in range(10))
+
+@pytest.fixture(autouse=True)
+def fresh_ledger():
+    """Start and end every test with an empty processed object ledger."""
+    ledger.reset_ledger()
+    yield
+    ledger.reset_ledger()
+
+def run(monkeypatch, generation=None, rules=None, summaries=None, write_error=None, **settings_overrides):
+    """Process the test file and return the logged violation batches."""
+    for name, value in settings_overrides.items():
+        monkeypatch.setattr(settings, name, value)
+    event = SimpleNamespace(data={"bucket": "b", "name": "f.csv", "size": str(len(CSV)), "generation": generation})
+
+    with patch("main.GCSConnector") as gcs, patch("main.BigQueryConnector") as bq, \
+            patch("main.get_storage_client"), patch("main.get_bigquery_client"):
+        gcs.return_value.read_bytes.return_value = CSV.encode()
+        gcs.return_value.open_file.side_effect = lambda *args: io.BytesIO(CSV.encode())
+        bq.return_value.get_rules.return_value = rules or [Rule("R001", "Amount must be positive", "amount < 0")]
+        bq.return_value.log_violations.side_effect = write_error
+
+        main.process_gcs_file(event)
+
+    if summaries is not None:
+        summaries.extend(
+            summary for call in bq.return_value.log_violation_summaries.call_args_list for summary in call[0][0]
+        )
+    return [batch for call in bq.return_value.log_violations.call_args_list for batch in call[0][0]]
+
+def test_process_whole_file(monkeypatch):
+    """Test that a small file is read in one piece."""
+    batches = run(monkeypatch)
+
+    assert len(batches) == 1
+    assert batches[0].row_numbers.tolist() == [0, 3, 6, 9]
+
+def test_streaming_keeps_global_row_numbers(monkeypatch):
+    """Test that chunked evaluation reports rows relative to the whole file."""
+    batches = run(monkeypatch, STREAMING_THRESHOLD_BYTES=10, CHUNK_ROWS=4, KEY_COLUMNS=("id",))
+
+    assert len(batches) == 3
+    assert [row for batch in batches for row in batch.row_numbers] == [0, 3, 6, 9]
+    assert json.loads(batches[2].details[0]) == {"id": 9, "amount": -1}
+
+def test_rules_snapshot_replaces_bigquery_rules(monkeypatch, tmp_path):
+    """Test that configured snapshot rules are used without querying BigQuery."""
+    from rules_engine.connectors import snapshot_loader
+    from rules_engine.models.rules_snapshot import RulesSnapshot
+
+    path = tmp_path / "snapshot.json"
+    path.write_bytes(RulesSnapshot([Rule("S001", "Id above 7", "id > 7")]).to_bytes())
+    snapshot_loader.reset_loaders()
+    try:
+        batches = run(monkeypatch, RULES_SNAPSHOT_URI=str(path))
+    finally:
+        snapshot_loader.reset_loaders()
+
+    assert [(batch.rule_number, batch.row_numbers.tolist()) for batch in batches] == [("S001", [8, 9])]
+
+def test_missing_rules_snapshot_falls_back_to_bigquery(monkeypatch, tmp_path):
+    """Test that BigQuery rules are used if the snapshot cannot be loaded."""
+    from rules_engine.connectors import snapshot_loader
+
+    snapshot_loader.reset_loaders()
+    try:
+        batches = run(monkeypatch, RULES_SNAPSHOT_URI=str(tmp_path / "missing.json"))
+    finally:
+        snapshot_loader.reset_loaders()
+
+    assert [batch.rule_number for batch in batches] == ["R001"]
+
+def test_synchronous_writes_match_background_writes(monkeypatch):
+    """Test that disabling the background writer gives the same violations."""
+    background = run(monkeypatch, STREAMING_THRESHOLD_BYTES=10, CHUNK_ROWS=4)
+    synchronous = run(monkeypatch, STREAMING_THRESHOLD_BYTES=10, CHUNK_ROWS=4, WRITE_QUEUE_SIZE=0)
+
+    assert [b.row_numbers.tolist() for b in synchronous] == [b.row_numbers.tolist() for b in background]
+
+def test_summary_only_runs_do_not_write(monkeypatch):
+    """Test that violations are only counted when writing is disabled."""
+    assert run(monkeypatch, WRITE_VIOLATIONS=False) == []
+
+def test_summary_only_runs_do_not_encode_samples(monkeypatch):
+    """Test that sample-mode rules serialize nothing when writing is disabled."""
+    from rules_engine.models import violation_batch
+    monkeypatch.setattr(violation_batch, "rows_to_json", lambda frame: pytest.fail("rows encoded"))
+    rules = [Rule("R001", "Amount must be positive", "amount < 0", output_mode="sample", sample_size=2)]
+
+    assert run(monkeypatch, rules=rules, WRITE_VIOLATIONS=False) == []
+
+def test_output_modes_limit_written_rows(monkeypatch):
+    """Test that count and first-K rules write a summary and at most K rows."""
+    rules = [
+        Rule("R001", "Amount must be positive", "amount < 0", output_mode="first", sample_size=3),
+        Rule("R002", "Amount must be negative", "amount > 0", output_mode="count"),
+    ]
+    summaries = []
+
+    batches = run(monkeypatch, rules=rules, summaries=summaries, STREAMING_THRESHOLD_BYTES=10, CHUNK_ROWS=4)
+
+    assert [row for batch in batches for row in batch.row_numbers] == [0, 3, 6]
+    assert {batch.rule_number for batch in batches} == {"R001"}
+    assert [(s["rule_number"], s["violation_count"], s["rows_written"]) for s in summaries] == [
+        ("R001", 4, 3), ("R002", 6, 0)
+    ]
+
+def test_object_generation_is_passed_for_violation_ids(monkeypatch):
+    """Test that violations are written with the triggering object's version."""
+    with patch("main.ViolationWriter") as writer:
+        writer.return_value.__enter__.return_value = writer.return_value
+        event = SimpleNamespace(data={"bucket": "b", "name": "f.csv", "size": str(len(CSV)), "generation": "42"})
+        with patch("main.GCSConnector") as gcs, patch("main.BigQueryConnector") as bq, \
+                patch("main.get_storage_client"), patch("main.get_bigquery_client"):
+            gcs.return_value.read_bytes.return_value = CSV.encode()
+            bq.return_value.get_rules.return_value = [Rule("R001", "Amount must be positive", "amount < 0")]
+            main.process_gcs_file(event)
+
+    assert writer.call_args.args[2] == "gs://b/f.csv#42"
+
+def test_duplicate_events_are_skipped(monkeypatch):
+    """Test that a redelivered event for the same object version is not processed again."""
+    assert len(run(monkeypatch, generation="7")) == 1
+    assert run(monkeypatch, generation="7") == []
+    assert len(run(monkeypatch, generation="8")) == 1
+
+    assert ledger.get_ledger().info()["skipped"] == 1
+
+def test_failed_writes_are_not_recorded_in_the_ledger(monkeypatch):
+    """Test that a retry after a failed write processes the object again."""
+    with pytest.raises(RuntimeError, match="rejected"):
+        run(monkeypatch, generation="7", write_error=RuntimeError("BigQuery rejected 4 of 4 rows"))
+
+    assert len(run(monkeypatch, generation="7")) == 1
+    assert ledger.get_ledger().info()["skipped"] == 0
+
+def test_duplicate_events_are_processed_without_ledger(monkeypatch):
+    """Test that the ledger can be disabled."""
+    assert len(run(monkeypatch, generation="7", LEDGER_ENABLED=False)) == 1
+    assert len(run(monkeypatch, generation="7", LEDGER_ENABLED=False)) == 1
@@ -0,0 +1,129 @@
+"""
+Unit tests for the concurrent rule query runner.
+Uses a fake job client that simulates job latency and BigQuery quota errors.
+"""
+
+import threading
+import time
+
+from google.api_core import exceptions
+from rules_engine.connectors.query_runner import RuleQueryRunner, is_quota_error
+
+
+class FakeJob:
+    """Query job that takes some time and may fail."""
+
+    def __init__(self, client, job_id, error):
+        self.client = client
+        self.job_id = job_id
+        self.error = error
+        self.total_bytes_processed = 1024
+        self.num_dml_affected_rows = 3
+
+    def result(self):
+        with self.client.lock:
+            self.client.running += 1
+            self.client.peak = max(self.client.peak, self.client.running)
+        try:
+            time.sleep(self.client.latency)
+            if self.error is not None:
+                raise self.error
+        finally:
+            with self.client.lock:
+                self.client.running -= 1
+        return []
+
+
+class FakeClient:
+    """Client whose jobs fail with queued errors per SQL statement."""
+
+    def __init__(self, latency=0.05, errors=None):
+        self.latency = latency
+        self.errors = errors or {}
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+        self.prefixes = []
+        self.configs = []
+
+    def query(self, sql, job_config=None, job_id_prefix=None):
+        with self.lock:
+            self.prefixes.append(job_id_prefix)
+            self.configs.append(job_config)
+            queued = self.errors.get(sql, [])
+            error = queued.pop(0) if queued else None
+        return FakeJob(self, f"{job_id_prefix}{len(self.prefixes)}", error)
+
+
+def quota_error():
+    """Forbidden error as BigQuery returns it for exceeded quotas."""
+    return exceptions.Forbidden("Quota exceeded", errors=[{"reason": "quotaExceeded"}])
+
+def test_is_quota_error():
+    """Test that only rate and quota limits are treated as retryable."""
+    assert is_quota_error(exceptions.TooManyRequests("slow down"))
+    assert is_quota_error(quota_error())
+    assert not is_quota_error(exceptions.Forbidden("Access denied", errors=[{"reason": "accessDenied"}]))
+    assert not is_quota_error(exceptions.BadRequest("Syntax error"))
+
+def test_runs_queries_concurrently_up_to_the_limit():
+    """Test that jobs overlap without exceeding the concurrency cap."""
+    client = FakeClient(latency=0.1)
+    queries = [(f"R{i:03d}", f"SELECT {i}") for i in range(8)]
+
+    started = time.monotonic()
+    results = RuleQueryRunner(client, max_concurrency=4).run(queries)
+    elapsed = time.monotonic() - started
+
+    assert client.peak == 4
+    assert elapsed < 0.6
+    assert [result.rule_number for result in results] == [number for number, _ in queries]
+    assert all(result.ok and result.attempts == 1 for result in results)
+    assert results[0].bytes_processed == 1024 and results[0].rows_affected == 3
+    assert results[0].run_seconds >= 0.1
+    assert results[0].job_id.startswith("rule_R000_")
+
+def test_quota_errors_are_retried_with_backoff():
+    """Test that throttled queries are retried and their attempts counted."""
+    client = FakeClient(latency=0, errors={"SELECT 1": [exceptions.TooManyRequests("slow down"), quota_error()]})
+    delays = []
+
+    [result] = RuleQueryRunner(client, backoff=2.0, sleep=delays.append).run([("R001", "SELECT 1")])
+
+    assert result.ok
+    assert result.attempts == 3
+    assert len(delays) == 2
+    assert 1.0 <= delays[0] <= 2.0 and 2.0 <= delays[1] <= 4.0
+
+def test_retries_are_bounded():
+    """Test that a query keeps failing once its retries are used up."""
+    client = FakeClient(latency=0, errors={"SELECT 1": [quota_error() for _ in range(5)]})
+
+    [result] = RuleQueryRunner(client, max_retries=2, sleep=lambda delay: None).run([("R001", "SELECT 1")])
+
+    assert result.status == "failed"
+    assert result.attempts == 3
+    assert "Quota exceeded" in result.error
+
+def test_failures_do_not_stop_other_rules():
+    """Test that a broken rule fails alone and is not retried."""
+    client = FakeClient(latency=0, errors={"SELECT broken": [exceptions.BadRequest("Syntax error")]})
+
+    results = RuleQueryRunner(client, sleep=lambda delay: None).run(
+        [("R001", "SELECT 1"), ("R/2", "SELECT broken"), ("R003", "SELECT 3")]
+    )
+
+    assert [result.status for result in results] == ["done", "failed", "done"]
+    assert results[1].attempts == 1
+    assert "Syntax error" in results[1].error
+    assert "rule_R_2_" in client.prefixes
+
+def test_maximum_bytes_billed_is_set_on_jobs():
+    """Test that jobs carry the per-rule byte limit as a hard cap."""
+    client = FakeClient(latency=0)
+
+    RuleQueryRunner(client, maximum_bytes_billed=10**12).run([("R001", "SELECT 1")])
+    RuleQueryRunner(client).run([("R002", "SELECT 2")])
+
+    assert client.configs[0].maximum_bytes_billed == 10**12
+    assert client.configs[1] is None
@@ -6,6 +6,7 @@ Tests the Rule class functionality.
 import pytest
 import pandas as pd
 from rules_engine.models.rule import Rule
+from rules_engine.models.violation_batch import ViolationBatch, rows_to_json
 
 def test_rule_initialization():
     """Test that a Rule can be initialized with the correct properties."""
@@ -69,3 +70,98 @@ def test_apply_rule_without_violations():
     
     # Should find no violations
     assert len(violations) == 0
+
+def test_apply_rule_logs_failures(caplog):
+    """Test that a failing rule is logged and yields no violations."""
+    df = pd.DataFrame({"id": [1, 2]})
+
+    batch = Rule("R001", "Amount must be positive", "amount < 0").apply(df)
+
+    assert len(batch) == 0
+    assert "Error applying rule R001" in caplog.text
+
+def test_apply_rule_returns_columnar_batch():
+    """Test that violations come back as a batch with row positions."""
+    df = pd.DataFrame({"id": [1, 2, 3, 4], "amount": [100, -50, 200, -10]})
+    rule = Rule(
+        rule_number="R001",
+        rule_description="Amount must be positive",
+        rule_query="amount < 0"
+    )
+
+    violations = rule.apply(df)
+
+    assert isinstance(violations, ViolationBatch)
+    assert list(violations.row_numbers) == [1, 3]
+    assert violations.to_records()[1]["rule_number"] == "R001"
+
+def test_apply_rule_details_match_row_json():
+    """Test that batch details are identical to serializing each row."""
+    data = {
+        "id": [1, 2, 3],
+        "amount": [-1.5, 2.0, -0.25],
+        "status": ["NEW", None, "line\nbreak"],
+        "flag": [True, False, True]
+    }
+    df = pd.DataFrame(data)
+    rule = Rule(
+        rule_number="R001",
+        rule_description="Amount must be positive",
+        rule_query="amount < 0"
+    )
+
+    violations = rule.apply(df)
+
+    expected = [row.to_json() for _, row in df[df["amount"] < 0].iterrows()]
+    assert violations.details == expected
+
+def test_rows_to_json_upcasts_like_iterrows():
+    """Test that mixed numeric frames serialize with the common dtype."""
+    df = pd.DataFrame({"id": [1, 2], "amount": [1.5, -2.25]})
+
+    expected = [row.to_json() for _, row in df.iterrows()]
+    assert rows_to_json(df) == expected
+
+def test_violation_details_are_serialized_lazily(monkeypatch):
+    """Test that counting violations does not encode any JSON."""
+    from rules_engine.models import violation_batch
+    calls = []
+    monkeypatch.setattr(violation_batch, "rows_to_json", lambda frame: calls.append(len(frame)) or ["{}"] * len(frame))
+    df = pd.DataFrame({"id": [1, 2, 3, 4], "amount": [100, -50, 200, -10]})
+
+    batch = Rule("R001", "Amount must be positive", "amount < 0").apply(df)
+
+    assert len(batch) == 2 and not batch.materialized and calls == []
+    batch.details
+    batch.details
+    assert calls == [2] and batch.source is None
+
+def test_serialize_selected_columns():
+    """Test that a writer can ask for a subset of the columns."""
+    df = pd.DataFrame({"id": [1, 2], "amount": [-1, 5], "note": ["a", "b"]})
+
+    batch = Rule("R001", "Amount must be positive", "amount < 0").apply(df)
+
+    assert batch.serialize(["id", "missing"]) == ['{"id":1}']
+    assert batch.details == ['{"id":1,"amount":-1,"note":"a"}']
+
+def test_serialize_selected_columns_of_serialized_batch():
+    """Test that the column subset also applies once details are serialized."""
+    df = pd.DataFrame({"id": [1, 2], "amount": [-1.5, 5.0], "note": ["a", "b"]})
+    batch = Rule("R001", "Amount must be positive", "amount < 0").apply(df)
+    batch.details
+
+    assert batch.serialize(["note", "id"]) == ['{"id":1,"note":"a"}']
+    assert batch.serialize(["id", "amount", "note"]) == batch.details
+
+def test_pickled_batches_carry_details_not_the_frame():
+    """Test that batches sent between processes serialize their rows first."""
+    import pickle
+    df = pd.DataFrame({"id": [1, 2], "amount": [-1, 5]})
+    batch = Rule("R001", "Amount must be positive", "amount < 0").violations(df, df["amount"] < 0, 10)
+
+    copy = pickle.loads(pickle.dumps(batch))
+
+    assert copy.source is None
+    assert copy.details == ['{"id":1,"amount":-1}']
+    assert copy.row_numbers.tolist() == [10]
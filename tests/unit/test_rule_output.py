@@ -0,0 +1,131 @@
+"""
+Unit tests for rule output modes.
+Tests counts, first-K rows and reservoir samples across several chunks.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from rules_engine.models.rule import Rule
+from rules_engine.models.rule_output import RuleOutput, sample_seed
+from rules_engine.models.violation_batch import ViolationBatch
+
+def chunks(rule, sizes=(40, 25, 35)):
+    """Apply a rule to consecutive chunks of a frame whose every row violates it."""
+    offset = 0
+    for size in sizes:
+        frame = pd.DataFrame({"id": np.arange(offset, offset + size), "amount": -1})
+        yield rule.violations(frame, np.ones(size, dtype=bool), offset)
+        offset += size
+
+def run(rule, **kwargs):
+    """Feed the chunks to a rule output and return it with the written batches."""
+    output = RuleOutput(rule, **kwargs)
+    written = [output.add(batch) for batch in chunks(rule)] + [output.finish()]
+    return output, [batch for batch in written if batch is not None]
+
+def test_all_mode_writes_every_violation():
+    """Test that the default mode passes batches through."""
+    output, written = run(Rule("R001", "Negative", "amount < 0"))
+
+    assert output.mode == "all"
+    assert [len(batch) for batch in written] == [40, 25, 35]
+    assert output.summary()["rows_written"] == 100
+
+def test_count_mode_writes_nothing():
+    """Test that only the exact count is kept."""
+    output, written = run(Rule("R001", "Negative", "amount < 0", output_mode="COUNT"))
+
+    assert written == []
+    assert output.summary() == {
+        "rule_number": "R001", "rule_description": "Negative", "output_mode": "count",
+        "violation_count": 100, "rows_written": 0,
+    }
+
+def test_first_mode_keeps_the_first_rows_across_chunks():
+    """Test that the first K rows are written, spanning chunk boundaries."""
+    output, written = run(Rule("R001", "Negative", "amount < 0", output_mode="first", sample_size=50))
+
+    assert [batch.row_numbers.tolist() for batch in written] == [list(range(40)), list(range(40, 50))]
+    assert not written[1].materialized
+    assert json.loads(written[1].details[0]) == {"id": 40, "amount": -1}
+    assert output.count == 100 and output.written == 50
+
+def test_sample_mode_keeps_a_sorted_sample():
+    """Test that a sample of K distinct rows is written once, after the last chunk."""
+    output, written = run(Rule("R001", "Negative", "amount < 0", output_mode="sample", sample_size=10), seed=1)
+
+    [batch] = written
+    rows = batch.row_numbers.tolist()
+    assert len(rows) == 10 and rows == sorted(set(rows))
+    assert [json.loads(detail)["id"] for detail in batch.details] == rows
+    assert output.count == 100 and output.written == 10
+
+def test_sample_smaller_than_reservoir_keeps_everything():
+    """Test that all rows are kept when fewer violate the rule than the sample size."""
+    output, [batch] = run(Rule("R001", "Negative", "amount < 0", output_mode="sample"), default_sample_size=500)
+
+    assert batch.row_numbers.tolist() == list(range(100))
+
+def test_sample_is_uniform():
+    """Test that every row is about equally likely to be sampled."""
+    rule = Rule("R001", "Negative", "amount < 0", output_mode="sample", sample_size=10)
+    batches = [
+        ViolationBatch("R001", "Negative", rows, [str(row) for row in rows])
+        for rows in (range(0, 40), range(40, 65), range(65, 100))
+    ]
+    hits = np.zeros(100)
+    for seed in range(2000):
+        output = RuleOutput(rule, seed=seed)
+        for batch in batches:
+            output.add(batch)
+        hits[output.finish().row_numbers] += 1
+
+    # Each row is expected in 10% of the 2000 samples
+    assert hits.sum() == 20_000
+    assert hits.min() > 140 and hits.max() < 260
+
+def test_sample_only_serializes_the_final_sample(monkeypatch):
+    """Test that only the sampled rows are encoded, and only when finished."""
+    from rules_engine.models import violation_batch
+    encoded = []
+    original = violation_batch.rows_to_json
+    monkeypatch.setattr(violation_batch, "rows_to_json", lambda frame: encoded.append(len(frame)) or original(frame))
+    rule = Rule("R001", "Negative", "amount < 0", output_mode="sample", sample_size=5)
+    output = RuleOutput(rule, seed=3)
+
+    for batch in chunks(rule):
+        output.add(batch)
+    assert encoded == []
+
+    sample = output.finish()
+
+    assert sum(encoded) == 5 and len(encoded) <= 3
+    assert [json.loads(detail)["id"] for detail in sample.details] == sample.row_numbers.tolist()
+
+def test_sample_seed_is_stable_per_object_and_rule():
+    """Test that retries of an event sample the same rows."""
+    rule = Rule("R001", "Negative", "amount < 0", output_mode="sample", sample_size=10)
+    seed = sample_seed("gs://b/f.csv#1", "R001")
+
+    first = run(rule, seed=seed)[1][0].row_numbers.tolist()
+    again = run(rule, seed=sample_seed("gs://b/f.csv#1", "R001"))[1][0].row_numbers.tolist()
+
+    assert first == again
+    assert sample_seed(None, "R001") is None
+    assert sample_seed("gs://b/f.csv#1", "R002") != seed
+
+def test_unknown_mode_writes_everything():
+    """Test that a typo in the rules table does not lose violations."""
+    output, written = run(Rule("R001", "Negative", "amount < 0", output_mode="sampel"))
+
+    assert output.mode == "all" and output.written == 100
+
+@pytest.mark.parametrize("size", [0, 1])
+def test_tiny_sample_sizes(size):
+    """Test sample sizes of zero and one."""
+    output, written = run(Rule("R001", "Negative", "amount < 0", output_mode="sample", sample_size=size), seed=0)
+
+    assert output.written == size and sum(len(batch) for batch in written) == size
@@ -0,0 +1,176 @@
+"""
+Unit tests for the RuleSet model.
+Tests evaluating several rules in a single pass.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import numpy as np
+import pandas as pd
+from rules_engine.models.expression import Evaluator
+from rules_engine.models.rule import Rule
+from rules_engine.models.rule_set import RuleSet, get_executor, reset_executor
+
+@pytest.fixture
+def transactions():
+    """Small transactions frame used by the tests."""
+    return pd.DataFrame({
+        "id": [1, 2, 3, 4, 5],
+        "amount": [100, -50, 200, -10, 0],
+        "status": ["APPROVED", "ERROR", "PENDING", "ERROR", "APPROVED"]
+    })
+
+def test_apply_matches_individual_rules(transactions):
+    """Test that the fused pass finds the same violations as each rule alone."""
+    rules = [
+        Rule("R001", "Amount must be positive", "amount < 0"),
+        Rule("R002", "No errors", "status == 'ERROR'"),
+        Rule("R003", "Negative errors", "status == 'ERROR' and amount < 0"),
+        Rule("R004", "Zero amount", "amount == 0 | amount > 150")
+    ]
+
+    batches = RuleSet(rules).apply(transactions)
+
+    assert [batch.rule_number for batch in batches] == ["R001", "R002", "R003", "R004"]
+    for rule, batch in zip(rules, batches):
+        assert batch.details == rule.apply(transactions).details
+    assert list(batches[3].row_numbers) == [2, 4]
+
+def test_evaluate_shares_subexpressions(transactions):
+    """Test that a condition used by several rules is computed once."""
+    rules = [
+        Rule("R001", "Negative amount", "amount < 0"),
+        Rule("R002", "Negative error", "status == 'ERROR' and amount < 0"),
+        Rule("R003", "Negative error", "amount < 0 & status == 'ERROR'")
+    ]
+    computed = []
+    original = Evaluator._compute
+
+    def spy(self, expression):
+        computed.append(expression)
+        return original(self, expression)
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(Evaluator, "_compute", spy)
+        RuleSet(rules).evaluate(transactions)
+
+    assert len(computed) == len(set(computed))
+    assert computed.count(("column", "amount")) == 1
+    assert sum(1 for expression in computed if expression[0] == "and") == 1
+
+def test_unsupported_query_falls_back_to_eval(transactions):
+    """Test that queries the parser does not handle still run through pandas."""
+    rule = Rule("R001", "Long status", "status.str.len() == 7")
+
+    batches = RuleSet([rule]).apply(transactions)
+
+    assert rule.expression is None
+    assert list(batches[0].row_numbers) == [2]
+
+def test_failing_rule_yields_empty_batch(transactions):
+    """Test that a broken rule does not stop the other rules."""
+    rules = [
+        Rule("R001", "Missing column", "missing_column > 1"),
+        Rule("R002", "Amount must be positive", "amount < 0")
+    ]
+
+    batches = RuleSet(rules).apply(transactions)
+
+    assert len(batches[0]) == 0
+    assert len(batches[1]) == 2
+
+def test_referenced_columns_include_key_columns():
+    """Test that the column set covers every rule plus the key columns."""
+    rules = [
+        Rule("R001", "Amount must be positive", "amount < 0"),
+        Rule("R002", "Customer ID must be provided", "customer_id IS NULL OR status = 'X'")
+    ]
+
+    columns = RuleSet(rules).referenced_columns(["id"])
+
+    assert columns == {"id", "amount", "customer_id", "status"}
+
+def test_referenced_columns_unknown_for_fallback_rules():
+    """Test that a DataFrame.eval rule disables column pruning."""
+    rules = [
+        Rule("R001", "Amount must be positive", "amount < 0"),
+        Rule("R002", "Long status", "status.str.len() > 7")
+    ]
+
+    assert RuleSet(rules).referenced_columns() is None
+
+PARALLEL_RULES = [
+    Rule("R001", "Negative amount", "amount < 0"),
+    Rule("R002", "Long status", "status.str.len() > 7"),
+    Rule("R003", "Missing column", "missing_column > 1"),
+    Rule("R004", "Negative error", "status == 'ERROR' and amount < 0"),
+    Rule("R005", "Error or negative", "amount < 0 or status == 'ERROR'"),
+]
+
+def test_parallel_evaluation_matches_serial():
+    """Test that masks from the thread pool are identical and in rule order."""
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({
+        "amount": rng.normal(0, 10, 1000),
+        "status": rng.choice(["APPROVED", "ERROR", "PENDING"], 1000),
+    })
+    serial = RuleSet(PARALLEL_RULES).evaluate(frame)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        parallel = RuleSet(PARALLEL_RULES, executor, min_parallel_rows=0).evaluate(frame)
+
+    assert parallel[2] is None and serial[2] is None
+    for expected, mask in zip(serial, parallel):
+        if expected is not None:
+            assert np.array_equal(expected, mask)
+
+def test_parallel_evaluation_computes_subexpressions_once(transactions):
+    """Test that threads share one evaluator without repeating work."""
+    computed = []
+    original = Evaluator._compute
+    lock = threading.Lock()
+
+    def spy(self, expression):
+        with lock:
+            computed.append(expression)
+        return original(self, expression)
+
+    with pytest.MonkeyPatch.context() as mp, ThreadPoolExecutor(max_workers=4) as executor:
+        mp.setattr(Evaluator, "_compute", spy)
+        RuleSet(PARALLEL_RULES, executor, min_parallel_rows=0).evaluate(transactions)
+
+    assert len(computed) == len(set(computed))
+    assert computed.count(("column", "amount")) == 1
+
+def test_small_frames_are_evaluated_serially(transactions):
+    """Test that frames below the threshold never touch the executor."""
+    class Unused:
+        def submit(self, *args):
+            raise AssertionError("executor used")
+
+    masks = RuleSet(PARALLEL_RULES, Unused(), min_parallel_rows=100).evaluate(transactions)
+
+    assert list(masks[0]) == [False, True, False, True, False]
+
+def test_get_executor_is_shared():
+    """Test that the pool is reused across invocations and skipped for one thread."""
+    try:
+        assert get_executor(1) is None
+        executor = get_executor(4)
+        assert get_executor(4) is executor
+        assert get_executor(2) is not executor
+    finally:
+        reset_executor()
+
+def test_null_rule_query_only_skips_that_rule(transactions):
+    """Test that a NULL query in the rules table fails alone without disabling pruning."""
+    rules = [Rule("R1", "ok", "amount < 0"), Rule("R2", "null", None), Rule("R3", "blank", "  ")]
+
+    rule_set = RuleSet(rules)
+    batches = rule_set.apply(transactions)
+
+    assert [len(batch) for batch in batches] == [2, 0, 0]
+    assert rule_set.referenced_columns() == {"amount"}
+    assert rules[1].plan.error == "Rule query is empty"
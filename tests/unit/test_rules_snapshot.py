@@ -0,0 +1,176 @@
+"""
+Unit tests for rules snapshots.
+Tests serializing snapshots, loading them and picking up newer ones.
+"""
+
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from unittest.mock import MagicMock, patch
+from rules_engine.connectors.bigquery_connector import BigQueryConnector
+from rules_engine.connectors.snapshot_loader import GCSSnapshotSource, LocalSnapshotSource, SnapshotLoader, open_source
+from rules_engine.models.rule import Rule
+from rules_engine.models.rules_snapshot import RulesSnapshot
+from rules_engine.utils import export_snapshot
+from rules_engine.utils.export_snapshot import build_snapshot
+
+RULES = [
+    Rule("R1", "Negative amount", "amount < 0 and status in ['A', 'B']"),
+    Rule("R2", "Missing customer", "customer_id IS NULL OR customer_id LIKE 'X%'"),
+]
+
+class FakeClock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_snapshot_round_trip_keeps_plans():
+    """Test that loaded rules evaluate like the originals without recompiling."""
+    snapshot = RulesSnapshot(RULES)
+    df = pd.DataFrame({
+        "amount": [-1, 2, -3, -4],
+        "status": ["A", "A", "C", "B"],
+        "customer_id": [None, "X1", "Y", "Z"],
+    })
+
+    with patch("rules_engine.models.rules_snapshot.compile_query") as compile_query:
+        loaded = RulesSnapshot.from_bytes(snapshot.to_bytes())
+    compile_query.assert_not_called()
+
+    assert loaded.version == snapshot.version
+    assert loaded.referenced_columns() == {"amount", "status", "customer_id"}
+    for original, rule in zip(RULES, loaded.rules):
+        assert rule.expression == original.expression
+        assert rule.plan.dialect == original.plan.dialect
+        np.testing.assert_array_equal(rule.evaluate(df), original.evaluate(df))
+
+def test_snapshot_version_depends_on_rules_only():
+    """Test that re-exporting unchanged rules keeps the version."""
+    assert RulesSnapshot(RULES).version == RulesSnapshot(list(RULES)).version
+    changed = [RULES[0], Rule("R2", "Missing customer", "customer_id IS NULL")]
+    assert RulesSnapshot(changed).version != RulesSnapshot(RULES).version
+
+def test_snapshot_recompiles_for_other_compiler_version():
+    """Test that plans from another compiler version are not trusted."""
+    document = json.loads(RulesSnapshot(RULES).to_bytes())
+    document["compiler_version"] = -1
+    document["rules"][0]["expression"] = ["literal", True]
+
+    loaded = RulesSnapshot.from_bytes(json.dumps(document).encode())
+
+    assert loaded.rules[0].expression == RULES[0].expression
+
+def test_snapshot_keeps_unsupported_rules():
+    """Test that rules without a native plan survive the round trip."""
+    rule = Rule("R3", "Full query", "SELECT * FROM t WHERE amount < 0")
+    loaded = RulesSnapshot.from_bytes(RulesSnapshot([rule]).to_bytes())
+
+    assert loaded.rules[0].expression is None
+    assert loaded.rules[0].plan.error
+    assert loaded.referenced_columns() is None
+
+def test_blank_rules_keep_column_pruning():
+    """Test that a rule without a query does not disable pruning for the snapshot."""
+    rules = RULES + [Rule("R4", "Unfinished rule", None), Rule("R5", "Blank rule", "  ")]
+
+    document = json.loads(RulesSnapshot(rules).to_bytes())
+    loaded = RulesSnapshot.from_bytes(json.dumps(document).encode())
+
+    assert document["columns"] == ["amount", "customer_id", "status"]
+    assert loaded.referenced_columns() == {"amount", "status", "customer_id"}
+    assert loaded.rules[2].is_empty and loaded.rules[3].is_empty
+
+def test_snapshot_rejects_unknown_format():
+    """Test that other documents are not mistaken for snapshots."""
+    with pytest.raises(ValueError):
+        RulesSnapshot.from_bytes(b'{"format": 99, "rules": []}')
+
+def test_loader_applies_newer_snapshot_in_background(tmp_path):
+    """Test that a warm loader swaps in a newly published snapshot."""
+    source = LocalSnapshotSource(str(tmp_path / "snapshot.json"))
+    source.write(RulesSnapshot(RULES[:1]).to_bytes())
+    clock = FakeClock()
+    loader = SnapshotLoader(source, check_interval=60, clock=clock)
+
+    first = loader.current()
+    source.write(RulesSnapshot(RULES).to_bytes())
+    clock.now = 30
+    assert loader.current() is first
+
+    clock.now = 61
+    assert loader.current() is first
+    loader.wait()
+
+    assert [r.rule_number for r in loader.current().rules] == ["R1", "R2"]
+
+def test_loader_keeps_snapshot_when_check_fails(tmp_path):
+    """Test that a broken newer snapshot does not replace a working one."""
+    source = LocalSnapshotSource(str(tmp_path / "snapshot.json"))
+    source.write(RulesSnapshot(RULES).to_bytes())
+    loader = SnapshotLoader(source)
+    first = loader.current()
+    source.write(b"not json")
+
+    assert loader.refresh() is False
+    assert loader.current() is first
+
+def test_loader_raises_without_snapshot(tmp_path):
+    """Test that a missing snapshot fails the first load."""
+    loader = SnapshotLoader(LocalSnapshotSource(str(tmp_path / "missing.json")))
+    with pytest.raises(FileNotFoundError):
+        loader.current()
+
+def test_gcs_source_downloads_new_generations_only():
+    """Test that an unchanged object is not downloaded again."""
+    client = MagicMock()
+    blob = client.bucket.return_value.get_blob.return_value
+    blob.generation = 5
+    blob.download_as_bytes.return_value = b"data"
+    source = open_source("gs://bucket/rules/snapshot.json", client)
+
+    assert isinstance(source, GCSSnapshotSource)
+    assert source.fetch() == (b"data", 5)
+    assert source.fetch(5) is None
+    client.bucket.assert_called_with("bucket")
+    blob.download_as_bytes.assert_called_once_with(if_generation_match=5)
+
+def test_build_snapshot_reads_every_table():
+    """Test that rules from every rules_definition table end up in the snapshot."""
+    client = MagicMock()
+    client.query.return_value.result.side_effect = [
+        [SimpleNamespace(rule_number="R1", rule_description="d1", rule_query="amount < 0")],
+        [SimpleNamespace(rule_number="R2", rule_description="d2", rule_query="qty > 5")],
+    ]
+    bq = BigQueryConnector(client=client)
+
+    snapshot = build_snapshot(bq, ["ds.rules_definition", "ds.more_rules"])
+
+    assert [r.rule_number for r in snapshot.rules] == ["R1", "R2"]
+    assert snapshot.sources == ("ds.rules_definition", "ds.more_rules")
+    assert "`ds.more_rules`" in client.query.call_args_list[1].args[0]
+
+def test_export_does_not_accept_gsheet_tables():
+    """Test that warehouse-only Google Sheet rules cannot be exported to a snapshot."""
+    with pytest.raises(SystemExit):
+        export_snapshot.main(["snapshot.json", "--gsheet-table", "p.ds.ext_gsheet_rules_definition"])
+
+def test_snapshot_keeps_output_modes():
+    """Test that output modes survive a round trip and change the version."""
+    sampled = [Rule("R1", "Negative amount", "amount < 0", output_mode="sample", sample_size=5)]
+
+    loaded = RulesSnapshot.from_bytes(RulesSnapshot(sampled).to_bytes())
+
+    assert (loaded.rules[0].output_mode, loaded.rules[0].sample_size) == ("sample", 5)
+    assert RulesSnapshot.content_version(sampled) != RulesSnapshot.content_version(
+        [Rule("R1", "Negative amount", "amount < 0")]
+    )
+    assert RulesSnapshot.content_version(RULES) == RulesSnapshot.content_version(
+        [Rule(rule.rule_number, rule.rule_description, rule.rule_query, output_mode="all") for rule in RULES]
+    )
@@ -0,0 +1,141 @@
+"""
+Unit tests for process-pool sharding.
+Compares sharded evaluation in worker processes with serial evaluation.
+"""
+
+import json
+import os
+from unittest.mock import MagicMock
+
+import pytest
+import numpy as np
+import pandas as pd
+from rules_engine.connectors.bigquery_connector import BigQueryConnector
+from rules_engine.models import sharding
+from rules_engine.models.rule import Rule
+from rules_engine.models.rule_set import RuleSet
+from rules_engine.models.sharding import ProcessSharder, evaluate_shard, get_process_pool, write_shared_frame
+
+pytest.importorskip("pyarrow")
+
+RULES = [
+    Rule("R001", "Negative amount", "amount < 0"),
+    Rule("R002", "Bad status", "status LIKE 'ERR%'"),
+    Rule("R003", "Missing customer", "customer_id IS NULL"),
+    Rule("R004", "Missing column", "missing_column > 1"),
+]
+
+@pytest.fixture
+def transactions():
+    """Mixed-type frame with nulls."""
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "id": np.arange(1000),
+        "amount": rng.normal(0, 10, 1000).round(2),
+        "status": rng.choice(["APPROVED", "ERROR", "ERR_TIMEOUT"], 1000),
+        "customer_id": np.where(rng.random(1000) < 0.1, None, "C1"),
+    })
+
+@pytest.fixture(scope="module")
+def pool():
+    """Shared worker pool, started once for the module."""
+    yield get_process_pool(2)
+    sharding.reset_process_pool()
+
+def assert_same(batches, expected):
+    """Compare batches rule by rule."""
+    assert [batch.rule_number for batch in batches] == [batch.rule_number for batch in expected]
+    for batch, other in zip(batches, expected):
+        assert batch.details == other.details
+        assert list(batch.row_numbers) == list(other.row_numbers)
+
+def test_sharded_evaluation_matches_serial(transactions, pool, tmp_path):
+    """Test that per-shard batches merge into the serial result."""
+    expected = RuleSet(RULES).apply(transactions, row_offset=500)
+    rule_set = RuleSet(RULES, sharder=ProcessSharder(2, min_rows=100, directory=str(tmp_path)))
+
+    batches = list(rule_set.iter_apply(transactions, row_offset=500))
+
+    assert_same(batches, expected)
+    assert len(batches[0]) > 0 and len(batches[3]) == 0
+    assert batches[0].row_numbers[0] >= 500
+    assert os.listdir(tmp_path) == []
+
+def test_sharded_matrix_matches_serial(transactions, pool, tmp_path):
+    """Test that worker positions are packed into the same matrix as serial masks."""
+    expected = RuleSet(RULES).evaluate_matrix(transactions)
+    rule_set = RuleSet(RULES, sharder=ProcessSharder(2, min_rows=100, directory=str(tmp_path)))
+
+    matrix = rule_set.evaluate_matrix(transactions)
+
+    assert np.array_equal(matrix.bits, expected.bits)
+    assert matrix.failed == expected.failed == {"R004"}
+
+def test_small_frames_stay_in_process(transactions):
+    """Test that frames below the threshold are not sent to workers."""
+    class Unused:
+        def submit(self, *args):
+            raise AssertionError("pool used")
+
+    sharder = ProcessSharder(2, min_rows=10_000, executor=Unused())
+
+    assert_same(RuleSet(RULES, sharder=sharder).apply(transactions), RuleSet(RULES).apply(transactions))
+
+def test_pool_failure_falls_back_to_serial(transactions, tmp_path):
+    """Test that a failing pool does not lose any violations."""
+    class Broken:
+        def submit(self, *args):
+            raise RuntimeError("pool is gone")
+
+    sharder = ProcessSharder(2, min_rows=0, directory=str(tmp_path), executor=Broken())
+
+    assert_same(RuleSet(RULES, sharder=sharder).apply(transactions), RuleSet(RULES).apply(transactions))
+    assert os.listdir(tmp_path) == []
+
+def test_workers_reuse_compiled_rule_sets(transactions, tmp_path, monkeypatch):
+    """Test that a worker compiles each rules version once."""
+    monkeypatch.setattr(sharding, "_worker_rule_sets", {})
+    definitions = [(rule.rule_number, rule.rule_description, rule.rule_query) for rule in RULES]
+    path = write_shared_frame(transactions, str(tmp_path))
+
+    first = evaluate_shard("v1", definitions, path, 0, 10)
+    cached = sharding._worker_rule_sets["v1"]
+    second = evaluate_shard("v1", definitions, path, 10, 20)
+
+    masks = RuleSet(RULES).evaluate(transactions.iloc[:20])
+    assert sharding._worker_rule_sets == {"v1": cached}
+    assert [list(a) + list(b) for a, b in zip(first[:3], second[:3])] == [list(np.flatnonzero(m)) for m in masks[:3]]
+    assert first[3] is None and second[3] is None
+
+def test_sharded_batches_reference_the_parent_frame(transactions, pool, tmp_path):
+    """Test that workers only return positions and details are built in the parent."""
+    rule_set = RuleSet(RULES, sharder=ProcessSharder(2, min_rows=100, directory=str(tmp_path)))
+
+    batches = list(rule_set.iter_apply(transactions))
+
+    assert not batches[0].materialized
+    assert batches[0].serialize(["id"])[0] == f'{{"id":{batches[0].row_numbers[0]}}}'
+
+def test_sharded_rows_limit_detail_columns(transactions, pool, tmp_path, monkeypatch):
+    """Test that violation rows of sharded batches keep only the configured columns."""
+    monkeypatch.setattr("rules_engine.config.settings.DETAIL_COLUMNS", ("id", "amount"))
+    rule_set = RuleSet(RULES, sharder=ProcessSharder(2, min_rows=100, directory=str(tmp_path)))
+    batch = next(rule_set.iter_apply(transactions))
+
+    rows = list(BigQueryConnector(client=MagicMock()).violation_rows([batch]))
+
+    assert len(rows) == len(batch)
+    assert all(list(json.loads(row["violation_details"])) == ["id", "amount"] for row in rows)
+
+def test_unconvertible_frame_falls_back_to_serial(tmp_path):
+    """Test that a mixed-type column Arrow cannot convert is evaluated in process."""
+    class Unused:
+        def submit(self, *args):
+            raise AssertionError("pool used")
+
+    frame = pd.DataFrame({"code": [1, "a", 2, "b"], "amount": [-1, 2, -3, 4]})
+    rules = [Rule("R001", "Negative amount", "amount < 0")]
+    sharder = ProcessSharder(2, min_rows=0, directory=str(tmp_path), executor=Unused())
+
+    assert_same(RuleSet(rules, sharder=sharder).apply(frame), RuleSet(rules).apply(frame))
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,100 @@
+"""
+Unit tests for the SQL predicate parser.
+Tests SQL-style rules against SQLite's three-valued logic.
+"""
+
+import sqlite3
+
+import pytest
+import numpy as np
+import pandas as pd
+from rules_engine.models.compiler import compile_plan
+from rules_engine.models.expression import Evaluator, UnsupportedExpression
+from rules_engine.models.rule import Rule
+from rules_engine.models.sql_predicate import parse_sql
+
+@pytest.fixture
+def orders():
+    """Orders with missing values in every column."""
+    return pd.DataFrame({
+        "amount": [10.0, -5.0, np.nan, 0.0, 250.0, 99.5],
+        "status": ["APPROVED", "CANCELLED", "PENDING", None, "REJECTED", "approved"],
+        "customer_id": ["C1", "", None, "C4", "C5", None]
+    })
+
+def sqlite_rows(frame, predicate):
+    """Row positions where SQLite evaluates the predicate to true."""
+    connection = sqlite3.connect(":memory:")
+    frame.to_sql("t", connection, index=False)
+    rows = connection.execute(f"SELECT rowid - 1 FROM t WHERE {predicate} ORDER BY rowid")
+    return [row[0] for row in rows]
+
+@pytest.mark.parametrize("predicate", [
+    "status NOT IN ('APPROVED', 'PENDING', 'REJECTED')",
+    "customer_id IS NULL OR customer_id = ''",
+    "status IN ('APPROVED', NULL)",
+    "status NOT IN ('APPROVED', NULL)",
+    "NOT (amount > 0)",
+    "NOT (amount > 0 AND status = 'APPROVED')",
+    "NOT (amount > 0 OR status <> 'APPROVED')",
+    "amount BETWEEN 0 AND 100",
+    "amount NOT BETWEEN 0 AND 100",
+    "amount * 2 - 1 >= 19",
+    "amount = NULL",
+    "amount IS NOT NULL AND amount != 0",
+    "-amount > 1",
+    "status not in ('APPROVED', 'PENDING', 'REJECTED')",
+    "status in ('APPROVED', null)",
+    "not (amount > 0)",
+    "customer_id is null or customer_id = ''",
+    "amount < 0 or status not in ('APPROVED', 'CANCELLED')",
+    "amount not between 0 and 100"
+])
+def test_matches_sql_three_valued_logic(orders, predicate):
+    """Test that compiled rules agree with a SQL engine, whatever the keyword case."""
+    mask = Evaluator(orders).mask(compile_plan(predicate).expression)
+
+    assert np.flatnonzero(mask).tolist() == sqlite_rows(orders, predicate)
+
+@pytest.mark.parametrize("predicate, expected", [
+    ("status LIKE 'APP%'", [0]),
+    ("status LIKE '_E%'", [2, 4]),
+    ("status NOT LIKE '%ED'", [2, 5]),
+    ("customer_id LIKE 'C_'", [0, 3, 4])
+])
+def test_like_is_case_sensitive(orders, predicate, expected):
+    """Test LIKE wildcards with BigQuery's case-sensitive matching."""
+    mask = Evaluator(orders).mask(parse_sql(predicate))
+
+    assert np.flatnonzero(mask).tolist() == expected
+
+def test_sample_rules_run_natively(orders):
+    """Test that the sample rules from the setup guide run without BigQuery."""
+    rules = [
+        Rule("R002", "Status must be valid", 'status NOT IN ("APPROVED", "PENDING", "REJECTED")'),
+        Rule("R003", "Customer ID must be provided", 'customer_id IS NULL OR customer_id = ""')
+    ]
+
+    status, customer = [rule.apply(orders) for rule in rules]
+
+    assert [rule.plan.dialect for rule in rules] == ["sql", "sql"]
+    assert status.row_numbers.tolist() == [1, 5]
+    assert customer.row_numbers.tolist() == [1, 2, 5]
+
+def test_pandas_syntax_is_preferred():
+    """Test that queries valid in both dialects keep DataFrame.query semantics."""
+    assert compile_plan("amount < 0").dialect == "pandas"
+    assert compile_plan("amount <> 0").dialect == "sql"
+    assert compile_plan("status is null").dialect == "sql"
+
+@pytest.mark.parametrize("predicate", [
+    "amount >",
+    "status IN (other_column)",
+    "status NOT amount",
+    "LOWER(status) = 'x'",
+    "amount > 0 ;"
+])
+def test_unsupported_predicates_raise(predicate):
+    """Test that unsupported SQL is reported."""
+    with pytest.raises(UnsupportedExpression):
+        parse_sql(predicate)
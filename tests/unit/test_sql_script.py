@@ -0,0 +1,172 @@
+"""
+Unit tests for the set-based SQL script generator.
+Runs generated scripts against DuckDB as a local stand-in for BigQuery.
+"""
+
+import json
+from unittest.mock import MagicMock
+
+import pytest
+from rules_engine.models.rule import Rule
+from rules_engine.utils import sql_script
+from rules_engine.utils.sql_script import (
+    DEFAULT_SCAN_MAX_ROWS, DIALECTS, generate_scan_script, generate_script, rule_select,
+)
+
+duckdb = pytest.importorskip("duckdb")
+
+RULES = [
+    Rule("R001", "Negative amount", "SELECT id, amount FROM sales.transactions WHERE amount < 0;"),
+    Rule(
+        "R002",
+        "Customer's status isn't valid",
+        "WITH bad AS (SELECT * FROM sales.transactions WHERE status NOT IN ('A', 'B'))\nSELECT id, status FROM bad",
+    ),
+    Rule("R003", "Missing customer", "customer_id IS NULL"),
+]
+
+@pytest.fixture
+def connection():
+    """DuckDB database with a transactions table and an empty violations table."""
+    connection = duckdb.connect()
+    connection.execute("CREATE SCHEMA sales")
+    connection.execute("CREATE SCHEMA rules_engine")
+    connection.execute("CREATE TABLE sales.transactions (id INTEGER, amount DOUBLE, status VARCHAR, customer_id VARCHAR)")
+    connection.execute(
+        "INSERT INTO sales.transactions VALUES"
+        " (1, -5, 'A', 'c1'), (2, 10, 'C', 'c2'), (3, -1, 'B', NULL), (4, 3, 'A', 'c4')"
+    )
+    connection.execute(
+        "CREATE TABLE rules_engine.rule_violations (violation_id VARCHAR, rule_number VARCHAR,"
+        " rule_description VARCHAR, violation_timestamp TIMESTAMP, row_number BIGINT, violation_details VARCHAR)"
+    )
+    yield connection
+    connection.close()
+
+def test_generated_script_writes_every_violation(connection):
+    """Test that one statement per rule writes all of its violations."""
+    script = generate_script(RULES, "rules_engine", "duckdb", source_table="sales.transactions")
+    connection.execute(script)
+
+    rows = connection.execute(
+        "SELECT rule_number, rule_description, violation_details, violation_id, violation_timestamp"
+        " FROM rules_engine.rule_violations ORDER BY rule_number, violation_details"
+    ).fetchall()
+
+    found = [(number, json.loads(details)) for number, _, details, _, _ in rows]
+    assert found == [
+        ("R001", {"id": 1, "amount": -5.0}),
+        ("R001", {"id": 3, "amount": -1.0}),
+        ("R002", {"id": 2, "status": "C"}),
+        ("R003", {"id": 3, "amount": -1.0, "status": "B", "customer_id": None}),
+    ]
+    assert rows[2][1] == "Customer's status isn't valid"
+    assert len({row[3] for row in rows}) == 4
+    assert all(row[4] is not None for row in rows)
+
+def test_each_rule_runs_once():
+    """Test that the script contains each rule query once, in one INSERT per rule."""
+    script = generate_script(RULES, "rules_engine", source_table="sales.transactions")
+
+    assert script.count("INSERT INTO `rules_engine.rule_violations`") == len(RULES)
+    assert script.count("SELECT id, amount FROM sales.transactions WHERE amount < 0") == 1
+    assert "FROM `sales.transactions` WHERE customer_id IS NULL" in script
+    assert "'Customer\\'s status isn\\'t valid'" in script
+    assert "TO_JSON_STRING(t)" in script
+    assert "VALUES" not in script
+
+def test_rules_without_a_query_are_skipped(caplog):
+    """Test that a NULL rule_query is logged and does not abort the script."""
+    rules = RULES + [Rule("R009", "Unfinished rule", None)]
+
+    script = generate_script(rules, "rules_engine", source_table="sales.transactions")
+    scan = generate_scan_script(rules, "ds.rules_engine_violations", source_table="sales.transactions")
+
+    assert script.count("INSERT INTO") == len(RULES) and "R009" not in script
+    assert "R009" not in scan and f"-- {len(RULES)} rules;" in scan
+    assert "Rule R009 has no query" in caplog.text
+
+def test_predicate_rules_need_a_source_table():
+    """Test that predicates cannot be turned into statements without a table."""
+    with pytest.raises(ValueError, match="R003"):
+        generate_script(RULES, "rules_engine")
+
+SCAN_RULES = RULES + [
+    Rule("R004", "Large amount", "SELECT * FROM `sales.transactions` WHERE amount > 5"),
+    Rule("R005", "Unknown customer", "SELECT t.id FROM sales.transactions t JOIN sales.customers c USING (customer_id)"),
+]
+
+def violations_table(connection):
+    """Create the single-scan violations table."""
+    connection.execute("CREATE TABLE rules_engine.rules_engine_violations (alert VARCHAR, keys VARCHAR, data VARCHAR, insert_ts TIMESTAMP)")
+
+def test_single_scan_groups_rules_by_table():
+    """Test that filters on one table share a scan and other rules run alone."""
+    script = generate_scan_script(SCAN_RULES, "ds.rules_engine_violations", source_table="sales.transactions")
+
+    assert script.count("FROM `sales.transactions` AS b") == 1
+    assert script.count("COUNTIF(") == 3
+    assert "ARRAY_AGG(IF(amount < 0, STRUCT(b.id AS id, b.amount AS amount), NULL) IGNORE NULLS LIMIT 1000)" in script
+    assert "TO_JSON_STRING(ARRAY_AGG(b LIMIT 1000))" in script
+    assert "COUNTIF(customer_id IS NULL)" in script
+    # The CTE rule and the join keep their own queries
+    assert "WITH bad AS" in script
+    assert "JOIN sales.customers" in script
+    assert script.count("INSERT INTO `ds.rules_engine_violations`") == 3
+
+def test_scan_statements_are_labelled_with_rule_numbers():
+    """Test that shared scans are recorded under the rules they cover, not the table."""
+    statements = sql_script.scan_statements(SCAN_RULES, "ds.rules_engine_violations", source_table="sales.transactions")
+
+    assert [label for label, _ in statements] == ["R001,R003,R004", "R002", "R005"]
+
+def test_single_scan_matches_separate_queries(connection):
+    """Test that the shared scan writes the same violations as one query per rule."""
+    connection.execute("CREATE TABLE sales.customers (customer_id VARCHAR)")
+    connection.execute("INSERT INTO sales.customers VALUES ('c1'), ('c4')")
+    violations_table(connection)
+
+    connection.execute(generate_scan_script(SCAN_RULES, "rules_engine.rules_engine_violations", "duckdb", "sales.transactions"))
+    rows = connection.execute("SELECT alert, data, keys, insert_ts FROM rules_engine.rules_engine_violations").fetchall()
+    found = {alert: sorted(json.loads(data), key=json.dumps) for alert, data, _, _ in rows}
+
+    expected = {}
+    for rule in SCAN_RULES:
+        query = rule_select(rule, DIALECTS["duckdb"], "sales.transactions").replace("`", "")
+        result = connection.execute(query)
+        names = [column[0] for column in result.description]
+        matches = [dict(zip(names, row)) for row in result.fetchall()]
+        if matches:
+            expected[rule.rule_description] = sorted(matches, key=json.dumps)
+
+    assert found == expected
+    assert set(found) == {"Negative amount", "Customer's status isn't valid", "Missing customer", "Large amount", "Unknown customer"}
+    assert all(keys is None and insert_ts is not None for _, _, keys, insert_ts in rows)
+
+def test_single_scan_limits_rows_per_rule(connection):
+    """Test that the number of violating rows kept per rule can be capped."""
+    violations_table(connection)
+    script = generate_scan_script(RULES[:1], "rules_engine.rules_engine_violations", "duckdb", max_rows=1)
+
+    connection.execute(script)
+
+    [(data,)] = connection.execute("SELECT data FROM rules_engine.rules_engine_violations").fetchall()
+    assert len(json.loads(data)) == 1
+
+def test_single_scan_rows_are_capped_by_default():
+    """Test that shared and standalone scans keep a bounded number of rows unless disabled."""
+    capped = generate_scan_script(SCAN_RULES, "ds.rules_engine_violations", source_table="sales.transactions")
+    unbounded = generate_scan_script(SCAN_RULES, "ds.rules_engine_violations", source_table="sales.transactions", max_rows=0)
+
+    assert capped.count(f"LIMIT {DEFAULT_SCAN_MAX_ROWS})") == 5
+    assert "LIMIT" not in unbounded
+
+def test_target_table_defaults_to_the_dataset(tmp_path, monkeypatch):
+    """Test that the single-scan target table is qualified with --dataset."""
+    bq = MagicMock()
+    bq.query_rules.return_value = RULES[:1]
+    monkeypatch.setattr(sql_script, "BigQueryConnector", lambda **kwargs: bq)
+
+    script = sql_script.main([str(tmp_path / "rules.sql"), "--single-scan", "--dataset", "proj.ds"])
+
+    assert "INSERT INTO `proj.ds.rules_engine_violations`" in script
@@ -0,0 +1,105 @@
+"""
+Unit tests for the ViolationMatrix model.
+Tests bit packing and cross-rule queries against plain boolean masks.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+from rules_engine.models.rule import Rule
+from rules_engine.models.rule_set import RuleSet
+from rules_engine.models.violation_matrix import ViolationMatrix, popcount
+
+MASKS = [
+    np.array([True, False, True, False, False, True, False, False, True, True, False]),
+    np.array([True, False, False, False, False, True, False, False, False, True, False]),
+    None,
+]
+
+@pytest.fixture
+def matrix():
+    """Matrix of two rules over 11 rows, plus a failed rule."""
+    return ViolationMatrix.from_masks(["R001", "R002", "R003"], MASKS, 11)
+
+def test_masks_round_trip(matrix):
+    """Test that packing keeps every bit, including a partial last byte."""
+    assert matrix.bits.shape == (3, 2)
+    assert np.array_equal(matrix.mask("R001"), MASKS[0])
+    assert list(matrix.rows("R002")) == [0, 5, 9]
+    assert not matrix.mask("R003").any()
+    assert matrix.failed == {"R003"}
+    assert [list(mask) for mask in matrix.masks()][:2] == [list(MASKS[0]), list(MASKS[1])]
+
+def test_counts(matrix):
+    """Test popcounts per rule."""
+    assert matrix.count("R001") == 5
+    assert matrix.counts() == {"R001": 5, "R002": 3, "R003": 0}
+    assert popcount(np.packbits(np.ones(20, dtype=bool))) == 20
+
+def test_any_all_and_row_counts(matrix):
+    """Test row-wise reductions across rules."""
+    assert np.array_equal(matrix.any(), MASKS[0] | MASKS[1])
+    assert not matrix.all().any()
+    both = ViolationMatrix.from_masks(["R001", "R002"], MASKS[:2], 11)
+    assert np.array_equal(both.all(), MASKS[0] & MASKS[1])
+    assert list(matrix.row_counts()) == list(MASKS[0].astype(int) + MASKS[1].astype(int))
+
+def test_rules_for_row(matrix):
+    """Test row-to-rule lookups."""
+    assert matrix.rules_for_row(0) == ["R001", "R002"]
+    assert matrix.rules_for_row(2) == ["R001"]
+    assert matrix.rules_for_row(10) == []
+    with pytest.raises(IndexError):
+        matrix.rules_for_row(11)
+
+def test_co_occurrence(matrix):
+    """Test pairwise counts of rows violating both rules."""
+    assert matrix.co_occurrence().tolist() == [[5, 3, 0], [3, 3, 0], [0, 0, 0]]
+
+def test_memory_is_one_bit_per_rule_per_row():
+    """Test the packed size of a large matrix."""
+    masks = [np.random.default_rng(i).random(100_000) < 0.5 for i in range(8)]
+
+    matrix = ViolationMatrix.from_masks([f"R{i}" for i in range(8)], masks, 100_000)
+
+    assert matrix.nbytes == 8 * 100_000 // 8
+
+def test_rule_set_evaluate_matrix():
+    """Test that the rule set builds the matrix from its rules."""
+    frame = pd.DataFrame({"amount": [1, -2, 3, -4], "status": ["A", "E", "E", "A"]})
+    rules = [Rule("R001", "Negative", "amount < 0"), Rule("R002", "Error", "status == 'E'")]
+
+    matrix = RuleSet(rules).evaluate_matrix(frame)
+
+    assert matrix.counts() == {"R001": 2, "R002": 2}
+    assert matrix.rules_for_row(1) == ["R001", "R002"]
+
+def test_parallel_evaluate_matrix_matches_serial():
+    """Test that masks packed as threads finish land in their rule's row."""
+    frame = pd.DataFrame({"amount": np.arange(-50, 50), "status": ["A", "E"] * 50})
+    rules = [
+        Rule("R001", "Negative", "amount < 0"),
+        Rule("R002", "Error", "status == 'E'"),
+        Rule("R003", "Broken", "missing > 1"),
+        Rule("R004", "Large", "amount > 40"),
+    ]
+
+    with ThreadPoolExecutor(2) as executor:
+        parallel = RuleSet(rules, executor, min_parallel_rows=0).evaluate_matrix(frame)
+    serial = RuleSet(rules).evaluate_matrix(frame)
+
+    assert np.array_equal(parallel.bits, serial.bits)
+    assert parallel.failed == serial.failed == {"R003"}
+
+def test_iter_apply_reuses_a_given_matrix(monkeypatch):
+    """Test that callers holding the matrix do not evaluate the rules twice."""
+    frame = pd.DataFrame({"amount": [1, -2, 3, -4]})
+    rule_set = RuleSet([Rule("R001", "Negative", "amount < 0")])
+    matrix = rule_set.evaluate_matrix(frame)
+    monkeypatch.setattr(rule_set, "evaluate_matrix", lambda dataframe: pytest.fail("evaluated again"))
+
+    [batch] = rule_set.iter_apply(frame, row_offset=10, matrix=matrix)
+
+    assert list(batch.row_numbers) == [11, 13]
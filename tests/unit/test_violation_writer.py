@@ -0,0 +1,165 @@
+"""
+Unit tests for the background violation writer.
+Tests ordering, backpressure, flushing and error handling.
+"""
+
+import threading
+
+import pandas as pd
+import pytest
+from unittest.mock import MagicMock
+from rules_engine.connectors.violation_writer import ViolationWriter
+from rules_engine.models.violation_batch import ViolationBatch
+
+def batch(rule_number, count=1):
+    """Violation batch with ``count`` violations."""
+    return ViolationBatch(rule_number, "d", range(count), ["{}"] * count)
+
+class BlockingConnector:
+    """Connector whose writes wait until released."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.written = []
+
+    def log_violations(self, violations, source=None):
+        self.started.set()
+        self.release.wait(5)
+        self.written.extend(b.rule_number for b in violations)
+
+def test_writer_flushes_in_order_on_exit():
+    """Test that every submission is written, in order, before the block ends."""
+    bq = BlockingConnector()
+    bq.release.set()
+
+    with ViolationWriter(bq, max_pending=2) as writer:
+        for index in range(10):
+            writer.submit([batch(f"R{index}", 2)])
+
+    assert bq.written == [f"R{index}" for index in range(10)]
+    assert writer.written == 20
+
+def test_small_submissions_are_written_together():
+    """Test that per-rule, per-chunk batches are buffered up to the row threshold."""
+    bq = MagicMock()
+
+    with ViolationWriter(bq, max_pending=2, flush_rows=5) as writer:
+        for index in range(7):
+            writer.submit([batch(f"R{index}", 1), batch(f"E{index}", 0)])
+
+    calls = [[b.rule_number for b in call.args[0]] for call in bq.log_violations.call_args_list]
+    assert calls == [["R0", "R1", "R2", "R3", "R4"], ["R5", "R6"]]
+    assert writer.written == 7
+
+def test_buffer_is_written_at_the_byte_threshold():
+    """Test that large details trigger a write before the row threshold."""
+    bq = MagicMock()
+    writer = ViolationWriter(bq, max_pending=0, flush_rows=1000, flush_bytes=10)
+
+    writer.submit([ViolationBatch("R1", "d", [0], ['{"note":"long text"}'])])
+
+    bq.log_violations.assert_called_once()
+    writer.close()
+
+def test_lazy_batches_are_serialized_when_buffered(monkeypatch):
+    """Test that buffered batches keep only the configured columns, not their frame."""
+    monkeypatch.setattr("rules_engine.config.settings.DETAIL_COLUMNS", ("id",))
+    bq = MagicMock()
+    frame = pd.DataFrame({"id": [7, 8], "amount": [-1, 2]})
+
+    with ViolationWriter(bq, max_pending=0) as writer:
+        writer.submit([ViolationBatch.lazy("R1", "Negative", frame, [0])])
+        [buffered] = writer._buffer
+        assert buffered.source is None and buffered.serialize(("id",)) == ['{"id":7}']
+
+    bq.log_violations.assert_called_once()
+
+def test_writes_overlap_with_submitting():
+    """Test that submit returns while an earlier write is still in progress."""
+    bq = BlockingConnector()
+    writer = ViolationWriter(bq, max_pending=2, flush_rows=1)
+
+    writer.submit([batch("R1")])
+    assert bq.started.wait(5)
+    writer.submit([batch("R2")])
+    assert bq.written == []
+
+    bq.release.set()
+    writer.close()
+    assert bq.written == ["R1", "R2"]
+
+def test_submit_blocks_when_queue_is_full():
+    """Test that a slow writer applies backpressure to the producer."""
+    bq = BlockingConnector()
+    writer = ViolationWriter(bq, max_pending=1, flush_rows=1)
+    writer.submit([batch("R1")])
+    assert bq.started.wait(5)
+    writer.submit([batch("R2")])
+
+    third = threading.Thread(target=writer.submit, args=([batch("R3")],))
+    third.start()
+    third.join(0.2)
+    assert third.is_alive()
+
+    bq.release.set()
+    third.join(5)
+    writer.close()
+    assert bq.written == ["R1", "R2", "R3"]
+
+def test_write_error_is_raised():
+    """Test that a failed write fails the invocation and stops later writes."""
+    bq = MagicMock()
+    bq.log_violations.side_effect = [RuntimeError("quota exceeded"), None]
+    writer = ViolationWriter(bq, max_pending=4, flush_rows=1)
+    writer.submit([batch("R1")])
+
+    with pytest.raises(RuntimeError, match="quota exceeded"):
+        writer.submit([batch("R2")]) or writer.close()
+
+    assert bq.log_violations.call_count == 1
+
+def test_serialization_error_is_raised_instead_of_hanging():
+    """Test that a batch failing to serialize on the thread fails close instead of blocking."""
+    class Unserializable(ViolationBatch):
+        def compact(self, columns=None):
+            raise ValueError("cannot serialize")
+
+    bq = MagicMock()
+    writer = ViolationWriter(bq, max_pending=1)
+    done = threading.Event()
+
+    def produce():
+        try:
+            for index in range(5):
+                writer.submit([Unserializable(f"R{index}", "d", [0], ["{}"])])
+            writer.close()
+        except ValueError:
+            done.set()
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    producer.join(5)
+
+    assert done.is_set()
+    bq.log_violations.assert_not_called()
+
+def test_exit_does_not_mask_block_error():
+    """Test that an error raised while evaluating takes precedence."""
+    bq = MagicMock()
+    bq.log_violations.side_effect = RuntimeError("write failed")
+
+    with pytest.raises(ValueError):
+        with ViolationWriter(bq) as writer:
+            writer.submit([batch("R1")])
+            raise ValueError("evaluation failed")
+
+def test_synchronous_mode():
+    """Test that a queue size of 0 writes inside submit."""
+    bq = MagicMock()
+    writer = ViolationWriter(bq, max_pending=0, flush_rows=1)
+
+    writer.submit([batch("R1")])
+
+    bq.log_violations.assert_called_once()
+    writer.close()